@@ -0,0 +1,28 @@
+# Generated by Django 2.0.13 on 2026-10-18 11:16
+
+from django.db import migrations
+import djen_project.fields
+
+
+def compress_text(apps, schema_editor):
+    djen_project.fields.recompress_rows(apps.get_model('blog', 'Post'), ['text'])
+
+
+def decompress_text(apps, schema_editor):
+    djen_project.fields.decompress_rows(apps.get_model('blog', 'Post'), ['text'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='text',
+            field=djen_project.fields.CompressedTextField(),
+        ),
+        migrations.RunPython(compress_text, decompress_text),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 2.0.13 on 2026-10-18 11:18
+
+from django.db import migrations, models
+from django.db.models import Count
+
+BATCH_SIZE = 500
+
+
+def count_comments(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Comment = apps.get_model('blog', 'Comment')
+    last_pk = 0
+    while True:
+        pks = list(Post.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:BATCH_SIZE])
+        if not pks:
+            break
+        counts = Comment.objects.filter(post__in=pks).values_list('post').annotate(Count('id')).order_by()
+        for post_id, count in counts:
+            Post.objects.filter(pk=post_id).update(comment_count=count)
+        last_pk = pks[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0002_compress_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'created_on'], name='comment_post_created_on_idx'),
+        ),
+        migrations.RunPython(count_comments, migrations.RunPython.noop),
+    ]
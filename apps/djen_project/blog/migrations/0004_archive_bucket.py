@@ -0,0 +1,60 @@
+# Generated by Django 2.0.13 on 2026-10-18 11:19
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.utils import timezone
+
+BATCH_SIZE = 2000
+
+
+def build_archive(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    ArchiveBucket = apps.get_model('blog', 'ArchiveBucket')
+    counts = Counter()
+    last_pk = 0
+    while True:
+        batch = list(Post.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', 'created_on')[:BATCH_SIZE])
+        if not batch:
+            break
+        for pk, created_on in batch:
+            if timezone.is_aware(created_on):
+                created_on = timezone.localtime(created_on)
+            counts['year', created_on.year, 0] += 1
+            counts['month', created_on.year, created_on.month] += 1
+            counts['week', created_on.year, int(created_on.strftime('%W'))] += 1
+        last_pk = batch[-1][0]
+    ArchiveBucket.objects.bulk_create(
+        ArchiveBucket(period=period, year=year, number=number, post_count=count)
+        for (period, year, number), count in counts.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_comment_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveBucket',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('year', 'Year'), ('month', 'Month'), ('week', 'Week')], max_length=5)),
+                ('year', models.PositiveSmallIntegerField()),
+                ('number', models.PositiveSmallIntegerField()),
+                ('post_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='created_on',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterUniqueTogether(
+            name='archivebucket',
+            unique_together={('period', 'year', 'number')},
+        ),
+        migrations.RunPython(build_archive, migrations.RunPython.noop),
+    ]
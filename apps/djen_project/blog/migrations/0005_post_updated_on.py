@@ -0,0 +1,28 @@
+# Generated by Django 2.0.13 on 2026-10-18 15:05
+
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+
+def copy_created_on(apps, schema_editor):
+    # existing posts are taken as unchanged since they were written
+    Post = apps.get_model('blog', 'Post')
+    Post.objects.update(updated_on=F('created_on'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_archive_bucket'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='updated_on',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_created_on, migrations.RunPython.noop),
+    ]
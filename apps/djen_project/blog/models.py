@@ -1,16 +1,26 @@
-from django.db import models
+import datetime
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Q
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.template.defaultfilters import slugify
+from django.utils import timezone
 
 from django.contrib.auth.models import User
 
+from djen_project.fields import CompressedTextField
+
 # Create your models here.
 
 class Post(models.Model):
     title = models.CharField(max_length=100)
     slug = models.SlugField(unique=True)
-    text = models.TextField()
-    created_on = models.DateTimeField(auto_now_add=True)
+    text = CompressedTextField()
+    created_on = models.DateTimeField(auto_now_add=True, db_index=True)
+    updated_on = models.DateTimeField(auto_now=True, db_index=True)
     author = models.ForeignKey(User,on_delete=models.CASCADE)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.title
@@ -25,7 +35,11 @@ class Post(models.Model):
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
-        super(Post, self).save(*args, **kwargs)
+        with transaction.atomic():
+            adding = self._state.adding
+            super(Post, self).save(*args, **kwargs)
+            if adding:
+                ArchiveBucket.objects.record(self.created_on, 1)
 
 class Comment(models.Model):
     name = models.CharField(max_length=42)
@@ -35,5 +49,93 @@ class Comment(models.Model):
     post = models.ForeignKey(Post,on_delete=models.CASCADE)
     created_on = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', 'created_on'], name='comment_post_created_on_idx'),
+        ]
+
+    def __str__(self):
+        return self.text
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            adding = self._state.adding
+            super(Comment, self).save(*args, **kwargs)
+            if adding:
+                Post.objects.filter(pk=self.post_id).update(comment_count=F('comment_count') + 1)
+
+
+class ArchiveBucketManager(models.Manager):
+    def keys_for(self, created_on):
+        if timezone.is_aware(created_on):
+            created_on = timezone.localtime(created_on)
+        return [
+            (ArchiveBucket.YEAR, created_on.year, 0),
+            (ArchiveBucket.MONTH, created_on.year, created_on.month),
+            (ArchiveBucket.WEEK, created_on.year, int(created_on.strftime('%W'))),
+        ]
+
+    def record(self, created_on, delta):
+        """Adds ``delta`` posts to every bucket ``created_on`` falls in"""
+        for period, year, number in self.keys_for(created_on):
+            bucket = self.filter(period=period, year=year, number=number)
+            if bucket.update(post_count=F('post_count') + delta) or delta < 0:
+                continue
+            try:
+                with transaction.atomic():
+                    self.create(period=period, year=year, number=number, post_count=delta)
+            except IntegrityError:
+                bucket.update(post_count=F('post_count') + delta)
+
+    def adjacent(self, period, year, number, previous=False):
+        """The closest non-empty bucket before or after ``(year, number)``"""
+        buckets = self.filter(period=period, post_count__gt=0)
+        if previous:
+            buckets = buckets.filter(Q(year__lt=year) | Q(year=year, number__lt=number))
+            buckets = buckets.order_by('-year', '-number')
+        else:
+            buckets = buckets.filter(Q(year__gt=year) | Q(year=year, number__gt=number))
+            buckets = buckets.order_by('year', 'number')
+        return buckets.first()
+
+
+class ArchiveBucket(models.Model):
+    """Number of posts created in a year, month or week, for the archives"""
+
+    YEAR = 'year'
+    MONTH = 'month'
+    WEEK = 'week'
+    PERIOD_CHOICES = (
+        (YEAR, 'Year'),
+        (MONTH, 'Month'),
+        (WEEK, 'Week'),
+    )
+
+    period = models.CharField(max_length=5, choices=PERIOD_CHOICES)
+    year = models.PositiveSmallIntegerField()
+    number = models.PositiveSmallIntegerField()
+    post_count = models.PositiveIntegerField(default=0)
+
+    objects = ArchiveBucketManager()
+
+    class Meta:
+        unique_together = ('period', 'year', 'number')
+
     def __str__(self):
-        return self.text
\ No newline at end of file
+        return "%s %s/%s: %s posts" % (self.period, self.year, self.number, self.post_count)
+
+    def start_date(self):
+        if self.period == self.WEEK:
+            return datetime.datetime.strptime('%s-%s-1' % (self.year, self.number), '%Y-%W-%w').date()
+        return datetime.date(self.year, self.number or 1, 1)
+
+
+@receiver(post_delete, sender=Post)
+def remove_from_archive(sender, instance, **kwargs):
+    ArchiveBucket.objects.record(instance.created_on, -1)
+
+
+# Also catches queryset and cascading deletes, which skip Comment.delete().
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    Post.objects.filter(pk=instance.post_id).update(comment_count=F('comment_count') - 1)
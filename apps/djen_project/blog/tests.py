@@ -1,3 +1,90 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Post, Comment, ArchiveBucket
+
+
+class ViewPostTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user('author', password='secret')
+        self.post = Post.objects.create(title="Hello world", text="First post", author=self.author)
+        for i in range(60):
+            Comment.objects.create(post=self.post, name="reader %s" % i,
+                                   email="reader@example.com", text="comment %s" % i)
+
+    def test_comment_count_is_maintained(self):
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 60)
+        Comment.objects.filter(post=self.post)[:1].get().delete()
+        Comment.objects.filter(name__in=["reader 1", "reader 2"]).delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 57)
+
+    def test_comments_are_paginated_without_n_plus_one(self):
+        url = reverse('blog_post_detail', args=[self.post.slug])
+        # post with author, then one page of comments
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertContains(response, "Comments (60)")
+        self.assertEqual(len(response.context['comments']), 50)
+        response = self.client.get(url, {'page': 2})
+        self.assertEqual([c.text for c in response.context['comments']],
+                         ["comment %s" % i for i in range(50, 60)])
+
+    def test_posting_a_comment(self):
+        url = reverse('blog_post_detail', args=[self.post.slug])
+        response = self.client.post(url, {'name': "me", 'email': "me@example.com", 'text': "nice"})
+        self.assertRedirects(response, url)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 61)
+
+    def test_session_is_saved_only_when_details_change(self):
+        url = reverse('blog_post_detail', args=[self.post.slug])
+        details = {'name': "me", 'email': "me@example.com", 'text': "nice"}
+        self.client.post(url, details)
+        self.assertEqual(self.client.session['name'], "me")
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(url, details)
+        self.assertFalse([q for q in queries.captured_queries if 'django_session' in q['sql']])
+        self.client.post(url, dict(details, name="me again"))
+        self.assertEqual(self.client.session['name'], "me again")
+
+
+class ArchiveTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user('author', password='secret')
+        for slug, when in [('jan', datetime.datetime(2018, 1, 10, 12)),
+                           ('march', datetime.datetime(2018, 3, 5, 12)),
+                           ('march-2', datetime.datetime(2018, 3, 6, 12))]:
+            post = Post.objects.create(title=slug, slug=slug, text="text", author=self.author)
+            Post.objects.filter(pk=post.pk).update(created_on=timezone.make_aware(when))
+        ArchiveBucket.objects.all().delete()
+        for post in Post.objects.all():
+            ArchiveBucket.objects.record(post.created_on, 1)
+
+    def test_buckets_are_maintained(self):
+        month = ArchiveBucket.objects.get(period=ArchiveBucket.MONTH, year=2018, number=3)
+        self.assertEqual(month.post_count, 2)
+        Post.objects.get(slug='march').delete()
+        month.refresh_from_db()
+        self.assertEqual(month.post_count, 1)
+
+    def test_month_archive_links_skip_empty_months(self):
+        # bucket lookups for previous and next, then the month's posts
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('blog_archive_month', args=[2018, 3]))
+        self.assertEqual(response.context['previous_month'], datetime.date(2018, 1, 1))
+        self.assertIsNone(response.context['next_month'])
+        self.assertContains(response, reverse('blog_archive_month', args=[2018, 1]))
+        self.assertEqual(len(response.context['date_list']), 2)
 
-# Create your tests here.
+    def test_week_archive(self):
+        response = self.client.get(reverse('blog_archive_week', args=[2018, 10]))
+        self.assertEqual(len(response.context['object_list']), 2)
+        self.assertEqual(response.context['previous_week'], datetime.date(2018, 1, 8))
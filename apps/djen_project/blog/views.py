@@ -1,12 +1,16 @@
 # Create your views here.
 
 from django.contrib.auth.decorators import user_passes_test
+from django.core.paginator import Paginator
 from django.shortcuts import redirect, render_to_response, get_object_or_404, render
+from django.utils import timezone
 from django.views.generic.dates import MonthArchiveView, WeekArchiveView
 
-from .models import Post
+from .models import Post, ArchiveBucket
 from .forms import PostForm, CommentForm
 
+COMMENTS_PER_PAGE = 50
+
 @user_passes_test(lambda u: u.is_superuser)
 def add_post(request):
     form = PostForm(request.POST or None)
@@ -18,28 +22,87 @@ def add_post(request):
     return render(request, 'blog/add_post.html',{ 'form': form })
 
 def view_post(request, slug):
-    post = get_object_or_404(Post, slug=slug)
+    post = get_object_or_404(Post.objects.select_related('author'), slug=slug)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.post = post
         comment.save()
-        request.session["name"] = comment.name
-        request.session["email"] = comment.email
-        request.session["website"] = comment.website
+        # only touch the session (and its storage) when the details change
+        for key in ('name', 'email', 'website'):
+            if request.session.get(key) != getattr(comment, key):
+                request.session[key] = getattr(comment, key)
         return redirect(request.path)
     form.initial['name'] = request.session.get('name')
     form.initial['email'] = request.session.get('email')
     form.initial['website'] = request.session.get('website')
-    return render(request, 'blog/blog_post.html',{'post': post,'form': form,})
+    paginator = Paginator(post.comment_set.order_by('created_on', 'id'), COMMENTS_PER_PAGE)
+    # Post.comment_count is kept up to date, so the paginator needn't COUNT.
+    paginator.count = post.comment_count
+    comments = paginator.get_page(request.GET.get('page'))
+    return render(request, 'blog/blog_post.html',{'post': post,'form': form, 'comments': comments})
 
-class PostMonthArchiveView(MonthArchiveView):
-    queryset = Post.objects.all()
+class ArchiveBucketMixin(object):
+    """
+    Takes the previous/next links of a date archive from ``ArchiveBucket``
+    instead of querying the posts table for them.
+    """
+    queryset = Post.objects.only('title', 'slug', 'created_on', 'comment_count')
     date_field = "created_on"
     allow_future = True
+    archive_period = None
 
-class PostWeekArchiveView(WeekArchiveView):
-    queryset = Post.objects.all()
-    date_field = "created_on"
+    def get_archive_key(self):
+        """``(year, number)`` of the period shown, numbered as in ``ArchiveBucket``"""
+        year = int(self.get_year())
+        if self.archive_period == ArchiveBucket.MONTH:
+            return year, int(self.get_month())
+        if self.archive_period == ArchiveBucket.WEEK:
+            return year, int(self.get_week())
+        return year, 0
+
+    def get_adjacent_bucket(self, previous):
+        buckets = self.__dict__.setdefault('_adjacent_buckets', {})
+        if previous not in buckets:
+            year, number = self.get_archive_key()
+            buckets[previous] = ArchiveBucket.objects.adjacent(self.archive_period, year, number, previous)
+        return buckets[previous]
+
+    def get_adjacent_date(self, previous):
+        bucket = self.get_adjacent_bucket(previous)
+        return bucket.start_date() if bucket else None
+
+    def get_date_list(self, queryset, date_type=None, ordering='ASC'):
+        # get_dated_queryset() has already fetched this period's posts, so
+        # work out the days from them rather than running a dates() query.
+        days = set()
+        for post in queryset:
+            created_on = post.created_on
+            if timezone.is_aware(created_on):
+                created_on = timezone.localtime(created_on)
+            days.add(created_on.replace(hour=0, minute=0, second=0, microsecond=0))
+        return sorted(days, reverse=ordering == 'DESC')
+
+    def get_context_data(self, **kwargs):
+        kwargs.setdefault('previous_archive', self.get_adjacent_bucket(True))
+        kwargs.setdefault('next_archive', self.get_adjacent_bucket(False))
+        return super(ArchiveBucketMixin, self).get_context_data(**kwargs)
+
+class PostMonthArchiveView(ArchiveBucketMixin, MonthArchiveView):
+    archive_period = ArchiveBucket.MONTH
+
+    def get_next_month(self, date):
+        return self.get_adjacent_date(False)
+
+    def get_previous_month(self, date):
+        return self.get_adjacent_date(True)
+
+class PostWeekArchiveView(ArchiveBucketMixin, WeekArchiveView):
     week_format = "%W"
-    allow_future = True
\ No newline at end of file
+    archive_period = ArchiveBucket.WEEK
+
+    def get_next_week(self, date):
+        return self.get_adjacent_date(False)
+
+    def get_previous_week(self, date):
+        return self.get_adjacent_date(True)
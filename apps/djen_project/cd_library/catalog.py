@@ -0,0 +1,151 @@
+"""
+Reading and writing the CD catalog as CSV or JSON Lines.
+
+Rows are streamed one at a time in both directions. Imports are applied in
+batches: each batch is one transaction that looks up which of its rows
+already exist by their natural key ``(title, artist, date)``, updates those
+and ``bulk_create``s the rest, then adjusts the facet counts by the
+difference, so memory and transaction size stay bounded however big the
+file is.
+"""
+
+import csv
+import datetime
+import json
+from collections import Counter
+
+from django.db import transaction
+
+from .models import CD, CDFacet, GENRE_CHOICES
+
+FIELDS = ('title', 'artist', 'date', 'genre', 'description')
+FORMATS = ('csv', 'jsonl')
+
+_GENRES = dict((code.lower(), code) for code, _ in GENRE_CHOICES)
+_GENRES.update((label.lower(), code) for code, label in GENRE_CHOICES)
+
+
+class InvalidRow(ValueError):
+    pass
+
+
+def format_for(path):
+    """The format implied by a file name, or ``None``"""
+    for name in FORMATS:
+        if path.endswith('.' + name) or path.endswith('.%s.gz' % name):
+            return name
+    if path.endswith('.json') or path.endswith('.ndjson'):
+        return 'jsonl'
+    return None
+
+
+def read_rows(stream, format):
+    """Yields ``(line number, dict)`` for each record of a text stream"""
+    if format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                raise InvalidRow("line %d: %s" % (number, e))
+            if not isinstance(row, dict):
+                raise InvalidRow("line %d: not an object" % number)
+            yield number, row
+
+
+def _text(row, name, strip=True):
+    # JSON records may hold numbers where text is expected
+    value = row.get(name)
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list)):
+        raise InvalidRow("%s must be text, not %r" % (name, value))
+    return str(value).strip() if strip else str(value)
+
+
+def clean_row(row):
+    """A validated ``CD`` from an imported record, or ``InvalidRow``"""
+    values = {}
+    for name in ('title', 'artist'):
+        value = _text(row, name)
+        max_length = CD._meta.get_field(name).max_length
+        if not value:
+            raise InvalidRow("%s is required" % name)
+        if len(value) > max_length:
+            raise InvalidRow("%s is longer than %d characters" % (name, max_length))
+        values[name] = value
+    try:
+        values['date'] = datetime.datetime.strptime(_text(row, 'date'), '%Y-%m-%d').date()
+    except ValueError:
+        raise InvalidRow("date %r is not YYYY-MM-DD" % row.get('date'))
+    genre = _GENRES.get(_text(row, 'genre').lower())
+    if genre is None:
+        raise InvalidRow("genre %r is not one of %s" % (
+            row.get('genre'), ', '.join(code for code, _ in GENRE_CHOICES)))
+    values['genre'] = genre
+    values['description'] = _text(row, 'description', strip=False) or None
+    return CD(**values)
+
+
+def import_batch(cds):
+    """
+    Upserts ``cds`` on ``(title, artist, date)``, later rows winning.
+    Returns ``(created, updated)``.
+    """
+    batch = dict(((cd.title, cd.artist, cd.date), cd) for cd in cds)
+    facet_deltas = Counter()
+    updated = 0
+    with transaction.atomic():
+        existing = CD.objects.filter(title__in=set(title for title, _, _ in batch)).only(*FIELDS)
+        for old in existing:
+            cd = batch.pop((old.title, old.artist, old.date), None)
+            if cd is None:
+                continue
+            if (old.genre, old.description) != (cd.genre, cd.description):
+                CD.objects.filter(pk=old.pk).update(genre=cd.genre, description=cd.description)
+                facet_deltas[CDFacet.GENRE, old.genre] -= 1
+                facet_deltas[CDFacet.GENRE, cd.genre] += 1
+            updated += 1
+        new = list(batch.values())
+        CD.objects.bulk_create(new)
+        for cd in new:
+            for facet, value in cd.facet_values().items():
+                facet_deltas[facet, value] += 1
+        # bulk_create skips CD.save, so the facet counts are adjusted here
+        for (facet, value), delta in sorted(facet_deltas.items()):
+            if delta:
+                CDFacet.objects.adjust(facet, value, delta)
+    return len(new), updated
+
+
+def export_row(cd):
+    return {
+        'title': cd.title,
+        'artist': cd.artist,
+        'date': cd.date.isoformat(),
+        'genre': cd.genre,
+        'description': cd.description or '',
+    }
+
+
+class RowWriter(object):
+    """Writes exported rows to a text stream in ``format``"""
+
+    def __init__(self, stream, format):
+        self.stream = stream
+        self.format = format
+        if format == 'csv':
+            self.writer = csv.DictWriter(stream, FIELDS)
+            self.writer.writeheader()
+
+    def write(self, cd):
+        row = export_row(cd)
+        if self.format == 'csv':
+            self.writer.writerow(row)
+        else:
+            self.stream.write(json.dumps(row) + '\n')
@@ -0,0 +1,57 @@
+import gzip
+import io
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cd_library import catalog
+from cd_library.models import CD
+
+class Command(BaseCommand):
+    help = """
+            writes the CD catalog as CSV or JSON Lines,
+            in the format import_cds reads
+
+            CDs are streamed from the database in chunks,
+            so memory use stays flat however big the
+            catalog is. Progress goes to stderr.
+           """
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-',
+                            help="File to write, '-' for stdout (default); .gz files are compressed")
+        parser.add_argument('--format', choices=catalog.FORMATS,
+                            help='csv or jsonl (default: from the file name, else jsonl)')
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help='Rows fetched from the database at a time (default: 2000)')
+
+    def open(self, path):
+        if path == '-':
+            return io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', newline='')
+        if path.endswith('.gz'):
+            return gzip.open(path, 'wt', encoding='utf-8', newline='')
+        return open(path, 'w', encoding='utf-8', newline='')
+
+    def handle(self, path, **options):
+        format = options['format'] or catalog.format_for(path) or 'jsonl'
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be positive")
+        started = time.monotonic()
+        written = 0
+        stream = self.open(path)
+        try:
+            writer = catalog.RowWriter(stream, format)
+            cds = CD.objects.only(*catalog.FIELDS).order_by('pk')
+            for cd in cds.iterator(chunk_size=options['chunk_size']):
+                writer.write(cd)
+                written += 1
+        finally:
+            if path == '-':
+                stream.flush()
+                stream.detach()
+            else:
+                stream.close()
+        elapsed = time.monotonic() - started
+        self.stderr.write("%d rows in %.2fs (%.0f rows/sec)" % (
+            written, elapsed, written / elapsed if elapsed else 0))
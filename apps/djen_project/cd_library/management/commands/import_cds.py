@@ -0,0 +1,71 @@
+import gzip
+import io
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cd_library import catalog
+
+class Command(BaseCommand):
+    help = """
+            loads CDs from a CSV or JSON Lines file
+
+            Rows are validated against the CD fields and
+            GENRE_CHOICES, then written in batches, one
+            transaction each. A CD already in the catalog
+            with the same title, artist and date is updated
+            instead of added again. Invalid rows are reported
+            and skipped.
+           """
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to read, '-' for stdin; .gz files are decompressed")
+        parser.add_argument('--format', choices=catalog.FORMATS,
+                            help='csv or jsonl (default: from the file name)')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Rows written per transaction (default: 500)')
+
+    def open(self, path):
+        if path == '-':
+            return io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', newline='')
+        if path.endswith('.gz'):
+            return gzip.open(path, 'rt', encoding='utf-8', newline='')
+        return open(path, encoding='utf-8', newline='')
+
+    def handle(self, path, **options):
+        format = options['format'] or catalog.format_for(path)
+        if format is None:
+            raise CommandError("Can't tell the format of %s, pass --format" % path)
+        started = time.monotonic()
+        created = updated = invalid = read = 0
+        batch = []
+
+        def flush():
+            nonlocal created, updated
+            added, changed = catalog.import_batch(batch)
+            created += added
+            updated += changed
+            del batch[:]
+            if options['verbosity'] > 1:
+                self.stdout.write("%d rows read" % read)
+
+        with self.open(path) as stream:
+            try:
+                for line, row in catalog.read_rows(stream, format):
+                    read += 1
+                    try:
+                        batch.append(catalog.clean_row(row))
+                    except catalog.InvalidRow as e:
+                        invalid += 1
+                        self.stderr.write("line %d: %s" % (line, e))
+                        continue
+                    if len(batch) >= options['batch_size']:
+                        flush()
+            except catalog.InvalidRow as e:
+                raise CommandError(str(e))
+            if batch:
+                flush()
+        elapsed = time.monotonic() - started
+        self.stdout.write("%d rows in %.2fs (%.0f rows/sec): %d added, %d updated, %d invalid" % (
+            read, elapsed, read / elapsed if elapsed else 0, created, updated, invalid))
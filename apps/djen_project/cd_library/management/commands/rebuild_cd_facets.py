@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from cd_library.models import CDFacet
+
+class Command(BaseCommand):
+    help = """
+            recounts the genre, artist and year facets
+            of the CD catalog from scratch
+
+            CD saves and deletes keep the counts current;
+            run this after changing CDs with queryset
+            update() or bulk_create(), which bypass them.
+           """
+
+    def handle(self, **options):
+        started = time.monotonic()
+        CDFacet.objects.rebuild()
+        self.stdout.write("counted %d facet values in %.2fs" % (
+            CDFacet.objects.count(), time.monotonic() - started))
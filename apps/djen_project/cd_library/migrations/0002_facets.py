@@ -0,0 +1,53 @@
+# Generated by Django 2.0.13 on 2026-10-18 11:40
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import ExtractYear
+
+
+def count_facets(apps, schema_editor):
+    CD = apps.get_model('cd_library', 'CD')
+    CDFacet = apps.get_model('cd_library', 'CDFacet')
+    facets = []
+    for facet, field in (('genre', 'genre'), ('artist', 'artist')):
+        facets.extend(CDFacet(facet=facet, value=row[field], count=row['n'])
+                      for row in CD.objects.values(field).annotate(n=Count('id')).order_by())
+    years = CD.objects.annotate(year=ExtractYear('date')).values('year').annotate(n=Count('id')).order_by()
+    facets.extend(CDFacet(facet='year', value=str(row['year']), count=row['n']) for row in years)
+    CDFacet.objects.bulk_create(facets)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cd_library', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CDFacet',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facet', models.CharField(choices=[('genre', 'Genre'), ('artist', 'Artist'), ('year', 'Year')], max_length=10)),
+                ('value', models.CharField(max_length=40)),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='cd',
+            index=models.Index(fields=['genre', 'date'], name='cd_genre_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cd',
+            index=models.Index(fields=['artist', 'date'], name='cd_artist_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cd',
+            index=models.Index(fields=['date'], name='cd_date_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='cdfacet',
+            unique_together={('facet', 'value')},
+        ),
+        migrations.RunPython(count_facets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 2.0.13 on 2026-10-18 11:41
+
+from django.db import IntegrityError, migrations
+from django.db.models import Count, F
+
+
+def remove_duplicates(apps, schema_editor):
+    """
+    Deletes CDs that repeat an earlier one exactly: same title, artist and
+    date, and the same genre and description. If CDs share a title, artist
+    and date but differ otherwise, nothing is deleted and the migration
+    stops with a list of them, to be merged by hand first.
+    """
+    CD = apps.get_model('cd_library', 'CD')
+    CDFacet = apps.get_model('cd_library', 'CDFacet')
+    keys = (CD.objects.values_list('title', 'artist', 'date')
+            .annotate(n=Count('id')).filter(n__gt=1).order_by())
+    groups = []
+    conflicts = []
+    for title, artist, date, n in keys:
+        cds = list(CD.objects.filter(title=title, artist=artist, date=date).order_by('pk')
+                   .values_list('pk', 'genre', 'description'))
+        if len(set((genre, description) for _, genre, description in cds)) > 1:
+            conflicts.append("%r by %r (%s): pks %s" % (
+                title, artist, date, ', '.join(str(pk) for pk, _, _ in cds)))
+        else:
+            groups.append((title, artist, date, cds))
+    if conflicts:
+        raise IntegrityError(
+            "Cannot make (title, artist, date) unique, these CDs share one but differ in genre or "
+            "description:\n%s" % '\n'.join(conflicts))
+    for title, artist, date, cds in groups:
+        kept, genre, _ = cds[0]
+        extra = [pk for pk, _, _ in cds[1:]]
+        for facet, value in (('genre', genre), ('artist', artist), ('year', str(date.year))):
+            CDFacet.objects.filter(facet=facet, value=value).update(count=F('count') - len(extra))
+        CD.objects.filter(pk__in=extra).delete()
+        print("\n  removed CDs %s, copies of CD %s: %r by %r (%s)" % (
+            ', '.join(str(pk) for pk in extra), kept, title, artist, date), end='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cd_library', '0002_facets'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='cd',
+            unique_together={('title', 'artist', 'date')},
+        ),
+    ]
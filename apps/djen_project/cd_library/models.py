@@ -1,4 +1,10 @@
-from django.db import models
+from collections import Counter
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F
+from django.db.models.functions import ExtractYear
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 
 # Create your models here.
 GENRE_CHOICES = (
@@ -15,5 +21,107 @@ class CD(models.Model):
     date = models.DateField()
     genre = models.CharField(max_length=1, choices=GENRE_CHOICES)
 
+    class Meta:
+        # the natural key imports upsert on, see cd_library.catalog
+        unique_together = ('title', 'artist', 'date')
+        indexes = [
+            models.Index(fields=['genre', 'date'], name='cd_genre_date_idx'),
+            models.Index(fields=['artist', 'date'], name='cd_artist_date_idx'),
+            models.Index(fields=['date'], name='cd_date_idx'),
+        ]
+
     def __str__(self):
         return "%s by %s, %s" %(self.title, self.artist, self.date.year)
+
+    def facet_values(self):
+        # the date is still a string if it was assigned one and never cleaned
+        date = CD._meta.get_field('date').to_python(self.date)
+        return {
+            CDFacet.GENRE: self.genre,
+            CDFacet.ARTIST: self.artist,
+            CDFacet.YEAR: str(date.year),
+        }
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            old = None
+            if not self._state.adding:
+                old = CD.objects.filter(pk=self.pk).only('genre', 'artist', 'date').first()
+            super(CD, self).save(*args, **kwargs)
+            old_values = old.facet_values() if old is not None else {}
+            for facet, value in self.facet_values().items():
+                if old_values.get(facet) != value:
+                    CDFacet.objects.adjust(facet, value, 1)
+                    if facet in old_values:
+                        CDFacet.objects.adjust(facet, old_values[facet], -1)
+
+
+class CDFacetManager(models.Manager):
+    def adjust(self, facet, value, delta):
+        if self.filter(facet=facet, value=value).update(count=F('count') + delta) or delta < 0:
+            return
+        try:
+            with transaction.atomic():
+                self.create(facet=facet, value=value, count=delta)
+        except IntegrityError:
+            # created concurrently
+            self.filter(facet=facet, value=value).update(count=F('count') + delta)
+
+    def counts(self, limit=20):
+        """``{facet: [(value, label, count), ...]}``, biggest first, ``limit`` per facet"""
+        genres = dict(GENRE_CHOICES)
+        counts = {}
+        for facet, _ in CDFacet.FACET_CHOICES:
+            rows = (self.filter(facet=facet, count__gt=0).order_by('-count', 'value')
+                    .values_list('value', 'count')[:limit])
+            counts[facet] = [(value, genres.get(value, value) if facet == CDFacet.GENRE else value, count)
+                             for value, count in rows]
+        return counts
+
+    def rebuild(self):
+        """Recounts every facet from the catalog, for when the counters have drifted"""
+        counts = Counter()
+        for row in CD.objects.values('genre').annotate(n=Count('id')):
+            counts[CDFacet.GENRE, row['genre']] = row['n']
+        for row in CD.objects.values('artist').annotate(n=Count('id')):
+            counts[CDFacet.ARTIST, row['artist']] = row['n']
+        for row in CD.objects.annotate(year=ExtractYear('date')).values('year').annotate(n=Count('id')):
+            counts[CDFacet.YEAR, str(row['year'])] = row['n']
+        with transaction.atomic():
+            self.all().delete()
+            self.bulk_create(CDFacet(facet=facet, value=value, count=count)
+                             for (facet, value), count in counts.items())
+
+
+class CDFacet(models.Model):
+    """
+    How many CDs have a given genre, artist or release year. Kept up to date
+    by ``CD.save`` and CD deletes, so the browse page never has to count
+    over the whole catalog.
+    """
+    GENRE = 'genre'
+    ARTIST = 'artist'
+    YEAR = 'year'
+    FACET_CHOICES = (
+        (GENRE, 'Genre'),
+        (ARTIST, 'Artist'),
+        (YEAR, 'Year'),
+    )
+
+    facet = models.CharField(max_length=10, choices=FACET_CHOICES)
+    value = models.CharField(max_length=40)
+    count = models.IntegerField(default=0)
+
+    objects = CDFacetManager()
+
+    class Meta:
+        unique_together = ('facet', 'value')
+
+    def __str__(self):
+        return "%s=%s (%s)" % (self.facet, self.value, self.count)
+
+
+@receiver(post_delete, sender=CD)
+def cd_deleted(sender, instance, **kwargs):
+    for facet, value in instance.facet_values().items():
+        CDFacet.objects.adjust(facet, value, -1)
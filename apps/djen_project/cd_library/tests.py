@@ -1,3 +1,141 @@
+import datetime
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
+
+from . import catalog
+from .models import CD, CDFacet
 
 # Create your tests here.
+
+class FacetTest(TestCase):
+    def counts(self, facet):
+        return dict((value, count) for value, _, count in CDFacet.objects.counts()[facet])
+
+    def test_counts_follow_saves_and_deletes(self):
+        kid_a = CD.objects.create(title="Kid A", artist="Radiohead", date=datetime.date(2000, 10, 2), genre='R')
+        CD.objects.create(title="Amnesiac", artist="Radiohead", date='2001-06-05', genre='R')
+        CD.objects.create(title="Kind of Blue", artist="Miles Davis", date=datetime.date(1959, 8, 17), genre='J')
+        self.assertEqual(self.counts('genre'), {'R': 2, 'J': 1})
+        self.assertEqual(self.counts('year'), {'2000': 1, '2001': 1, '1959': 1})
+
+        kid_a.genre = 'P'
+        kid_a.save()
+        self.assertEqual(self.counts('genre'), {'R': 1, 'J': 1, 'P': 1})
+        self.assertEqual(self.counts('artist'), {'Radiohead': 2, 'Miles Davis': 1})
+
+        kid_a.delete()
+        self.assertEqual(self.counts('genre'), {'R': 1, 'J': 1})
+        self.assertEqual(self.counts('artist'), {'Radiohead': 1, 'Miles Davis': 1})
+        self.assertEqual(self.counts('year'), {'2001': 1, '1959': 1})
+
+        before = CDFacet.objects.counts()
+        CDFacet.objects.all().update(count=0)
+        CDFacet.objects.rebuild()
+        self.assertEqual(CDFacet.objects.counts(), before)
+
+
+class CDListTest(TestCase):
+    def setUp(self):
+        CD.objects.bulk_create(
+            CD(title="Album %s" % i, artist="Artist %s" % (i % 3), genre='RJ'[i % 2],
+               date=datetime.date(1990 + i % 10, 1, 1) + datetime.timedelta(days=i))
+            for i in range(120)
+        )
+        CDFacet.objects.rebuild()
+
+    def test_filters_and_cursor_pages(self):
+        url = reverse('cd_library_cd_api')
+        seen = []
+        params = {'genre': 'J', 'artist': 'Artist 1'}
+        while True:
+            with self.assertNumQueries(4):  # a page and three facets
+                response = self.client.get(url, params).json()
+            seen.extend(response['results'])
+            if not response['next']:
+                break
+            params['cursor'] = response['next']
+        expected = CD.objects.filter(genre='J', artist='Artist 1').order_by('-date', '-id')
+        self.assertEqual([cd['id'] for cd in seen], [cd.id for cd in expected])
+        self.assertEqual(response['facets']['genre'], [{'value': 'J', 'label': 'Jazz', 'count': 60},
+                                                       {'value': 'R', 'label': 'Rock', 'count': 60}])
+
+    def test_year_filter(self):
+        response = self.client.get(reverse('cd_library_cd_list'), {'year': '1995'})
+        self.assertEqual(set(cd.date.year for cd in response.context['object_list']), {1995})
+        self.assertEqual(len(response.context['object_list']), 12)
+        for year in ('x', '0', '99999', '\u00b2'):
+            self.assertEqual(self.client.get(reverse('cd_library_cd_list'), {'year': year}).status_code, 404)
+
+    def test_facet_links_keep_other_filters(self):
+        response = self.client.get(reverse('cd_library_cd_list'), {'artist': 'Artist 1', 'year': '1995'})
+        self.assertContains(response, 'href="?artist=Artist+1&amp;genre=J&amp;year=1995"')
+        self.assertContains(response, 'href="?artist=Artist+1&amp;year=1991"')
+
+
+class ImportExportTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def path(self, name, content=None):
+        path = os.path.join(self.directory.name, name)
+        if content is not None:
+            with open(path, 'w') as f:
+                f.write(content)
+        return path
+
+    def test_import_upserts_and_skips_invalid_rows(self):
+        CD.objects.create(title="Kid A", artist="Radiohead", date=datetime.date(2000, 10, 2), genre='R')
+        path = self.path('cds.csv', "title,artist,date,genre,description\n"
+                                    "Kid A,Radiohead,2000-10-02,Pop,Reissue\n"
+                                    "Kind of Blue,Miles Davis,1959-08-17,J,\n"
+                                    "Bad,Nobody,1959-08-17,Polka,\n"
+                                    "Worse,Nobody,not a date,R,\n")
+        out, err = io.StringIO(), io.StringIO()
+        call_command('import_cds', path, batch_size=1, stdout=out, stderr=err)
+        self.assertIn("4 rows", out.getvalue())
+        self.assertIn("1 added, 1 updated, 2 invalid", out.getvalue())
+        self.assertIn("line 4: genre 'Polka'", err.getvalue())
+        self.assertEqual(CD.objects.get(title="Kid A").genre, 'P')
+        self.assertEqual(CD.objects.count(), 2)
+        counts = dict((value, count) for value, _, count in CDFacet.objects.counts()['genre'])
+        self.assertEqual(counts, {'P': 1, 'J': 1})
+
+    def test_round_trip(self):
+        CD.objects.bulk_create(
+            CD(title="Album %s" % i, artist="Artist %s" % (i % 7), genre='RBJP'[i % 4],
+               date=datetime.date(1990, 1, 1) + datetime.timedelta(days=i), description="CD %s" % i)
+            for i in range(50)
+        )
+        for name in ('cds.csv', 'cds.jsonl.gz'):
+            exported = self.path(name)
+            call_command('export_cds', exported, chunk_size=7, stderr=io.StringIO())
+            before = list(CD.objects.order_by('pk').values('title', 'artist', 'date', 'genre', 'description'))
+            CD.objects.all().delete()
+            call_command('import_cds', exported, batch_size=20, stdout=io.StringIO())
+            self.assertEqual(list(CD.objects.order_by('pk').values('title', 'artist', 'date', 'genre',
+                                                                   'description')), before)
+
+    def test_import_jsonl(self):
+        rows = [{'title': "Blue", 'artist': "Joni Mitchell", 'date': '1971-06-22', 'genre': 'pop'}] * 2
+        path = self.path('cds.jsonl', '\n'.join(json.dumps(row) for row in rows))
+        call_command('import_cds', path, stdout=io.StringIO())
+        self.assertEqual(CD.objects.get().genre, 'P')
+        self.assertEqual(CDFacet.objects.get(facet='artist', value="Joni Mitchell").count, 1)
+
+    def test_non_string_values(self):
+        cd = catalog.clean_row({'title': 1999, 'artist': "Prince", 'date': '1982-10-27', 'genre': 'pop'})
+        self.assertEqual(cd.title, "1999")
+        with self.assertRaises(catalog.InvalidRow):
+            catalog.clean_row({'title': ["Blue"], 'artist': "Joni Mitchell", 'date': '1971-06-22', 'genre': 'pop'})
+        rows = [{'title': 5, 'artist': "Artist", 'date': '2001-01-01', 'genre': 'rock'},
+                {'title': "Six", 'artist': {}, 'date': '2001-01-01', 'genre': 'rock'}]
+        path = self.path('cds.jsonl', '\n'.join(json.dumps(row) for row in rows))
+        call_command('import_cds', path, stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertEqual(list(CD.objects.values_list('title', flat=True)), ["5"])
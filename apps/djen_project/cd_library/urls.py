@@ -0,0 +1,7 @@
+from django.urls import path
+from .views import CDList, CDBrowseAPI
+
+urlpatterns = [
+    path('', CDList.as_view(), name='cd_library_cd_list'),
+    path('api/', CDBrowseAPI.as_view(), name='cd_library_cd_api'),
+]
@@ -1,3 +1,82 @@
-from django.shortcuts import render
+import datetime
+
+from django.http import Http404, JsonResponse
+from django.utils.http import urlencode
+from django.views.generic.list import ListView
+
+from djen_project.pagination import CursorPaginationMixin
+
+from .models import CD, CDFacet
 
 # Create your views here.
+
+class CDList(CursorPaginationMixin, ListView):
+    """
+    The catalog, newest first, narrowed by ``?genre=``, ``?artist=`` and
+    ``?year=``. Each filter is served by one of ``CD``'s ``(facet, date)``
+    indexes and the facet counts come from ``CDFacet``, so they are counts
+    over the whole catalog rather than within the current filters.
+    """
+    paginate_by = 50
+    cursor_ordering = ('-date', '-id')
+    template_name = 'cd_library/cd_list.html'
+
+    def get_filters(self):
+        filters = {}
+        for name in ('genre', 'artist', 'year'):
+            value = self.request.GET.get(name)
+            if value:
+                filters[name] = value
+        if 'year' in filters:
+            try:
+                year = int(filters['year'])
+            except ValueError:
+                year = None
+            if year is None or not datetime.MINYEAR <= year <= datetime.MAXYEAR:
+                raise Http404("Invalid year %r" % filters['year'])
+        return filters
+
+    def get_queryset(self):
+        self.filters = self.get_filters()
+        queryset = CD.objects.only('id', 'title', 'artist', 'date', 'genre')
+        if 'genre' in self.filters:
+            queryset = queryset.filter(genre=self.filters['genre'])
+        if 'artist' in self.filters:
+            queryset = queryset.filter(artist=self.filters['artist'])
+        if 'year' in self.filters:
+            queryset = queryset.filter(date__year=int(self.filters['year']))
+        return queryset
+
+    def get_context_data(self, **kwargs):
+        context = super(CDList, self).get_context_data(**kwargs)
+        context['facets'] = CDFacet.objects.counts()
+        context['filters'] = self.filters
+        context['filter_query'] = urlencode(sorted(self.filters.items()))
+        # each facet value links to the current filters narrowed by it
+        context['facet_links'] = dict(
+            (facet, [(label, count, urlencode(sorted(dict(self.filters, **{facet: value}).items())))
+                     for value, label, count in counts])
+            for facet, counts in context['facets'].items())
+        return context
+
+
+class CDBrowseAPI(CDList):
+    """``CDList`` as JSON, with ``next``/``previous`` cursors"""
+
+    def render_to_response(self, context, **response_kwargs):
+        page = context['page_obj']
+        return JsonResponse({
+            'results': [{
+                'id': cd.id,
+                'title': cd.title,
+                'artist': cd.artist,
+                'date': cd.date.isoformat(),
+                'genre': cd.genre,
+            } for cd in context['object_list']],
+            'facets': dict((facet, [{'value': value, 'label': label, 'count': count}
+                                    for value, label, count in counts])
+                           for facet, counts in context['facets'].items()),
+            'filters': context['filters'],
+            'next': page.next_cursor if page else None,
+            'previous': page.previous_cursor if page else None,
+        })
@@ -0,0 +1,48 @@
+"""
+Helpers for storing text compressed in binary columns.
+
+Compressed values start with a two byte header: ``MAGIC`` followed by a codec
+tag. ``MAGIC`` can never start a UTF-8 string, so anything without it is
+plain UTF-8 text and values written before compression was switched on keep
+reading correctly.
+"""
+
+import lzma
+import zlib
+
+MAGIC = b'\xfe'
+
+CODECS = {
+    'zlib': (b'z', lambda data: zlib.compress(data, 6), zlib.decompress),
+    'lzma': (b'x', lzma.compress, lzma.decompress),
+}
+TAGS = dict((tag, decompress) for tag, _, decompress in CODECS.values())
+
+
+def compress(text, codec='zlib', min_length=0):
+    """
+    Encode ``text`` for storage. Text shorter than ``min_length`` bytes, or
+    text that does not shrink, is stored as plain UTF-8.
+    """
+    data = text.encode('utf-8')
+    if len(data) < min_length:
+        return data
+    tag, compressor, _ = CODECS[codec]
+    compressed = MAGIC + tag + compressor(data)
+    if len(compressed) >= len(data):
+        return data
+    return compressed
+
+
+def decompress(value):
+    """Decode a value written by ``compress`` (or a legacy plain value)."""
+    if value is None or isinstance(value, str):
+        return value
+    data = bytes(value)
+    if data[:1] == MAGIC:
+        try:
+            decompressor = TAGS[data[1:2]]
+        except KeyError:
+            raise ValueError("Unknown compression tag %r" % data[1:2])
+        data = decompressor(data[2:])
+    return data.decode('utf-8')
@@ -0,0 +1,171 @@
+"""
+Streaming dumps of pastes, blog posts and comments, and wiki articles and
+edits, as JSON Lines or CSV.
+
+Rows are read with ``QuerySet.iterator()`` as plain values and encoded one
+at a time, optionally through an incremental gzip compressor, so memory use
+does not depend on the size of the table. Used by the ``/export/`` views
+and ``manage.py export_data``.
+"""
+
+import csv
+import datetime
+import io
+import json
+import zlib
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from blog.models import Comment, Post
+from pastebin.models import Paste
+from wiki.models import Article, Edit
+
+FORMATS = ('jsonl', 'csv')
+CONTENT_TYPES = {
+    'jsonl': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+# Encoded rows are collected into blocks of about this many bytes before
+# they are yielded, so responses are not written a line at a time.
+BLOCK_SIZE = 64 * 1024
+
+
+class Dataset(object):
+    """
+    An exportable table: ``fields`` maps output columns to ``values()``
+    lookups, and ``since`` filters on the timestamp of the last change, or
+    of creation for append-only tables.
+    """
+
+    def __init__(self, manager, fields, since):
+        self._manager = manager
+        self.fields = fields
+        self._since = since
+
+    def rows(self, since=None, chunk_size=2000):
+        queryset = self._manager.all()
+        if since is not None:
+            queryset = queryset.filter(self._since(since))
+        lookups = list(self.fields.values())
+        rows = queryset.order_by('pk').values_list(*lookups).iterator(chunk_size=chunk_size)
+        names = list(self.fields)
+        for row in rows:
+            yield dict(zip(names, row))
+
+
+def _article_since(since):
+    # articles have no modification time; their edits do
+    return Q(created_on__gte=since) | Q(pk__in=Edit.objects.filter(edited_on__gte=since).values('article'))
+
+
+DATASETS = {
+    'pastes': Dataset(Paste.objects, {
+        'id': 'id',
+        'name': 'name',
+        'created_on': 'created_on',
+        'updated_on': 'updated_on',
+        'text': 'blob__body',
+    }, lambda since: Q(updated_on__gte=since)),
+    'posts': Dataset(Post.objects, {
+        'id': 'id',
+        'title': 'title',
+        'slug': 'slug',
+        'author': 'author__username',
+        'created_on': 'created_on',
+        'updated_on': 'updated_on',
+        'text': 'text',
+    }, lambda since: Q(updated_on__gte=since)),
+    # comments can't be edited, only added
+    'comments': Dataset(Comment.objects, {
+        'id': 'id',
+        'post': 'post_id',
+        'name': 'name',
+        'email': 'email',
+        'website': 'website',
+        'created_on': 'created_on',
+        'text': 'text',
+    }, lambda since: Q(created_on__gte=since)),
+    'articles': Dataset(Article.objects, {
+        'id': 'id',
+        'title': 'title',
+        'slug': 'slug',
+        'author': 'author__username',
+        'is_published': 'is_published',
+        'created_on': 'created_on',
+        'version': 'version',
+        'text': 'text',
+    }, _article_since),
+    'edits': Dataset(Edit.objects, {
+        'id': 'id',
+        'article': 'article_id',
+        'editor': 'editor__username',
+        'edited_on': 'edited_on',
+        'summary': 'summary',
+        'revision': 'revision_id',
+    }, lambda since: Q(edited_on__gte=since)),
+}
+
+
+def parse_since(value):
+    """An aware datetime from an ISO date or datetime, or ``ValueError``"""
+    since = parse_datetime(value)
+    if since is None:
+        date = parse_date(value)
+        if date is None:
+            raise ValueError("%r is not an ISO date or datetime" % value)
+        since = datetime.datetime.combine(date, datetime.time())
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
+
+
+def _plain(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return value
+
+
+def _lines(rows, fields, format):
+    if format == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        for row in rows:
+            writer.writerow(['' if row[name] is None else _plain(row[name]) for name in fields])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+    else:
+        for row in rows:
+            yield json.dumps(dict((name, _plain(value)) for name, value in row.items())) + '\n'
+
+
+def stream(name, format='jsonl', since=None, compress=False, chunk_size=2000):
+    """
+    Yields dataset ``name`` as encoded ``bytes`` blocks, gzipped if
+    ``compress``, with only rows changed since ``since`` if given.
+    """
+    dataset = DATASETS[name]
+    lines = _lines(dataset.rows(since, chunk_size), list(dataset.fields), format)
+    compressor = zlib.compressobj(wbits=31) if compress else None  # 31: gzip container
+    block = []
+    size = 0
+    for line in lines:
+        data = line.encode('utf-8')
+        block.append(data)
+        size += len(data)
+        if size >= BLOCK_SIZE:
+            data = b''.join(block)
+            block, size = [], 0
+            data = compressor.compress(data) if compressor else data
+            if data:
+                yield data
+    data = b''.join(block)
+    if compressor:
+        data = compressor.compress(data) + compressor.flush()
+    if data:
+        yield data
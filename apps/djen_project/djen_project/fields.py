@@ -0,0 +1,89 @@
+from django.db import connections, models
+
+from .compression import compress, decompress
+
+
+class CompressedTextField(models.TextField):
+    """
+    A ``TextField`` stored compressed in a binary column.
+
+    Values of at least ``min_length`` bytes are compressed with ``codec``
+    (``'zlib'`` or ``'lzma'``); shorter ones are stored as plain UTF-8.
+    Rows written as plain text before the column was compressed still read
+    back unchanged, see ``djen_project.compression``.
+    """
+    description = "Compressed text"
+
+    def __init__(self, *args, codec='zlib', min_length=256, **kwargs):
+        self.codec = codec
+        self.min_length = min_length
+        super(CompressedTextField, self).__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super(CompressedTextField, self).deconstruct()
+        if self.codec != 'zlib':
+            kwargs['codec'] = self.codec
+        if self.min_length != 256:
+            kwargs['min_length'] = self.min_length
+        return name, path, args, kwargs
+
+    def get_internal_type(self):
+        return 'BinaryField'
+
+    def from_db_value(self, value, expression, connection):
+        return decompress(value)
+
+    def to_python(self, value):
+        if isinstance(value, (bytes, memoryview)):
+            return decompress(value)
+        return super(CompressedTextField, self).to_python(value)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        value = super(CompressedTextField, self).get_db_prep_value(value, connection, prepared)
+        if value is None:
+            return None
+        return connection.Database.Binary(compress(value, self.codec, self.min_length))
+
+
+def _rewrite_rows(model, field_names, write, batch_size):
+    last_pk = 0
+    while True:
+        batch = list(model._default_manager.filter(pk__gt=last_pk).order_by('pk')
+                     .values_list('pk', *field_names)[:batch_size])
+        if not batch:
+            break
+        for row in batch:
+            write(row[0], dict(zip(field_names, row[1:])))
+        last_pk = batch[-1][0]
+
+
+def recompress_rows(model, field_names, batch_size=500):
+    """
+    Rewrite ``field_names`` of every ``model`` row in primary key batches,
+    for data migrations that switch existing columns to
+    ``CompressedTextField``.
+    """
+    def write(pk, values):
+        model._default_manager.filter(pk=pk).update(**values)
+    _rewrite_rows(model, field_names, write, batch_size)
+
+
+def decompress_rows(model, field_names, batch_size=500):
+    """
+    The reverse of ``recompress_rows``: store ``field_names`` as plain text
+    again, before a migration turns the column back into a ``TextField``.
+    """
+    opts = model._meta
+    connection = connections[model._default_manager.db]
+    qn = connection.ops.quote_name
+    columns = [opts.get_field(name).column for name in field_names]
+    sql = 'UPDATE %s SET %s WHERE %s = %%s' % (
+        qn(opts.db_table),
+        ', '.join('%s = %%s' % qn(column) for column in columns),
+        qn(opts.pk.column),
+    )
+
+    def write(pk, values):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [values[name] for name in field_names] + [pk])
+    _rewrite_rows(model, field_names, write, batch_size)
@@ -0,0 +1,98 @@
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from blog.models import Post
+
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+}
+
+class Command(BaseCommand):
+    help = """
+            measures requests/sec for logged-in readers
+            and commenters with each session engine
+
+            Runs against a throwaway test database, with
+            the cache chosen by DJANGO_CACHE, and reports
+            how many session table queries each request
+            made alongside the request rate.
+           """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Requests per client thread for each engine (default: 200)')
+        parser.add_argument('--threads', type=int, default=4,
+                            help='Concurrent client threads (default: 4)')
+        parser.add_argument('--engines', nargs='+', choices=sorted(SESSION_ENGINES),
+                            default=['db', 'cached_db', 'cache'],
+                            help='Session engines to compare (default: all)')
+
+    def client_thread(self, index, requests, urls, counts):
+        session_queries = [0]
+
+        def count_session_queries(execute, sql, params, many, context):
+            if 'django_session' in sql:
+                session_queries[0] += 1
+            return execute(sql, params, many, context)
+
+        client = Client()
+        client.force_login(self.users[index])
+        try:
+            with connection.execute_wrapper(count_session_queries):
+                for i in range(requests):
+                    if i % 5 == 4:
+                        # commenters change their details now and then
+                        client.post(urls['post'], {'name': 'reader %s' % (i % 3), 'email': 'reader@example.com',
+                                                   'text': 'comment %s' % i})
+                    else:
+                        client.get(urls['post' if i % 2 else 'wiki'])
+            counts[index] = session_queries[0]
+        finally:
+            connections.close_all()
+
+    def run_engine(self, engine, requests, threads, urls):
+        counts = [0] * threads
+        with override_settings(SESSION_ENGINE=SESSION_ENGINES[engine]):
+            cache.clear()
+            workers = [threading.Thread(target=self.client_thread, args=(index, requests, urls, counts))
+                       for index in range(threads)]
+            started = time.monotonic()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            elapsed = time.monotonic() - started
+        total = requests * threads
+        self.stdout.write("%-10s %8.1f requests/sec  %5.2f session queries/request" % (
+            engine, total / elapsed, sum(counts) / total))
+
+    def handle(self, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.users = [User.objects.create_user('reader%s' % i, password='secret')
+                          for i in range(options['threads'])]
+            post = Post.objects.create(title="Benchmark", text="Session benchmark post", author=self.users[0])
+            urls = {
+                'post': reverse('blog_post_detail', args=[post.slug]),
+                'wiki': reverse('wiki_article_index'),
+            }
+            self.stdout.write("cache: %s, %d threads x %d requests" % (
+                settings.CACHES['default']['BACKEND'].rsplit('.', 1)[-1], options['threads'], options['requests']))
+            for engine in options['engines']:
+                self.run_engine(engine, options['requests'], options['threads'], urls)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
@@ -0,0 +1,104 @@
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections
+
+from blog.models import Comment, Post
+from pastebin.models import Paste
+
+# What SQLite does without any pragmas: rollback journal, full fsyncs
+SQLITE_DEFAULTS = {'journal_mode': 'DELETE', 'synchronous': 'FULL'}
+
+class Command(BaseCommand):
+    help = """
+            measures mixed read/write throughput on SQLite
+            with its default settings and with the PRAGMAS
+            from the database settings
+
+            Reader threads list pastes and comments while
+            writer threads create them, on a throwaway
+            test database file.
+           """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=5.0,
+                            help='How long to run each configuration (default: 5)')
+        parser.add_argument('--readers', type=int, default=4,
+                            help='Reader threads (default: 4)')
+        parser.add_argument('--writers', type=int, default=2,
+                            help='Writer threads (default: 2)')
+
+    def read(self, i):
+        list(Paste.objects.only('id', 'name', 'created_on').order_by('-created_on', '-id')[:50])
+        list(Comment.objects.filter(post=self.post).order_by('created_on', 'id')[:50])
+
+    def write(self, i):
+        if i % 2:
+            Paste.objects.create(name="load %s" % i, text="load test paste %s\n" % i * 20)
+        else:
+            Comment.objects.create(post=self.post, name="loader", email="load@example.com", text="comment %s" % i)
+
+    def worker(self, operation, deadline, results, index):
+        done = errors = 0
+        try:
+            while time.monotonic() < deadline:
+                try:
+                    operation(done + errors)
+                    done += 1
+                except OperationalError:
+                    # "database is locked" once busy_timeout runs out
+                    errors += 1
+        finally:
+            connections.close_all()
+        results[index] = (done, errors)
+
+    def run(self, label, pragmas, options):
+        settings_dict = connection.settings_dict
+        settings_dict['PRAGMAS'] = pragmas
+        connections.close_all()
+        # open one connection so journal_mode is switched before the threads start
+        connection.ensure_connection()
+        connection.close()
+
+        readers, writers = options['readers'], options['writers']
+        results = [None] * (readers + writers)
+        deadline = time.monotonic() + options['seconds']
+        threads = [threading.Thread(target=self.worker, args=(self.read, deadline, results, i))
+                   for i in range(readers)]
+        threads += [threading.Thread(target=self.worker, args=(self.write, deadline, results, readers + i))
+                    for i in range(writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        reads = sum(done for done, _ in results[:readers])
+        writes = sum(done for done, _ in results[readers:])
+        errors = sum(errors for _, errors in results)
+        seconds = options['seconds']
+        self.stdout.write("%-8s %9.1f reads/sec %9.1f writes/sec %6d lock errors" % (
+            label, reads / seconds, writes / seconds, errors))
+
+    def handle(self, **options):
+        tuned = dict(connection.settings_dict.get('PRAGMAS', {}))
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            if connection.is_in_memory_db():
+                self.stderr.write("The test database is in memory; set DATABASES['default']['TEST']['NAME'] "
+                                  "to a file to measure journaling.")
+                return
+            author = User.objects.create_user('loader', password='secret')
+            self.post = Post.objects.create(title="Load test", text="Load test post", author=author)
+            for i in range(200):
+                self.write(i)
+            self.stdout.write("%d readers, %d writers, %ss each" % (
+                options['readers'], options['writers'], options['seconds']))
+            self.run('default', SQLITE_DEFAULTS, options)
+            self.run('tuned', tuned, options)
+        finally:
+            connection.settings_dict['PRAGMAS'] = tuned
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
@@ -0,0 +1,52 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from djen_project import exports
+
+class Command(BaseCommand):
+    help = """
+            dumps pastes, blog posts, comments, wiki articles
+            or wiki edits as JSON Lines or CSV
+
+            Rows are streamed from the database, so memory
+            use stays flat however big the table is. Use
+            --since for incremental dumps; files ending in
+            .gz are gzipped as they are written.
+           """
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(exports.DATASETS))
+        parser.add_argument('path', nargs='?', default='-',
+                            help="File to write, '-' for stdout (default)")
+        parser.add_argument('--format', choices=exports.FORMATS, default='jsonl',
+                            help='jsonl or csv (default: jsonl)')
+        parser.add_argument('--since',
+                            help='Only rows created or changed at or after this ISO date or datetime '
+                                 '(comments are never changed, so: created)')
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help='Rows fetched from the database at a time (default: 2000)')
+
+    def handle(self, dataset, path, **options):
+        since = None
+        if options['since']:
+            try:
+                since = exports.parse_since(options['since'])
+            except ValueError as e:
+                raise CommandError(str(e))
+        started = time.monotonic()
+        written = 0
+        blocks = exports.stream(dataset, options['format'], since, compress=path.endswith('.gz'),
+                                chunk_size=options['chunk_size'])
+        output = sys.stdout.buffer if path == '-' else open(path, 'wb')
+        try:
+            for block in blocks:
+                output.write(block)
+                written += len(block)
+        finally:
+            if path == '-':
+                output.flush()
+            else:
+                output.close()
+        self.stderr.write("%d bytes in %.2fs" % (written, time.monotonic() - started))
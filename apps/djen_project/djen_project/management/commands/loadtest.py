@@ -0,0 +1,166 @@
+import datetime
+import hashlib
+import json
+import random
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.models import ArchiveBucket, Comment, Post
+from cd_library.models import CD, CDFacet, GENRE_CHOICES
+from djen_common import loadtest
+from pastebin.models import Paste, PasteBlob
+from wiki.models import Article, Edit, Revision
+
+# Seeded content is dated back from here, so reruns see the same archives
+EPOCH = datetime.datetime(2018, 1, 1, 12, 0)
+BATCH_SIZE = 500
+
+class Command(BaseCommand):
+    help = """
+            seeds a throwaway test database and measures the
+            hot views of every app under concurrent load
+
+            Pastes, posts with comments, articles with edits
+            and CDs are bulk inserted, then client threads
+            request the paste list and pages, blog posts and
+            archives, the wiki index and article histories,
+            and the CD browser. Latency percentiles, query
+            counts and requests/sec are printed as JSON;
+            --baseline compares them with an earlier run.
+            The same --seed and sizes give the same run.
+           """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pastes', type=int, default=1000)
+        parser.add_argument('--posts', type=int, default=200)
+        parser.add_argument('--comments-per-post', type=int, default=20)
+        parser.add_argument('--articles', type=int, default=200)
+        parser.add_argument('--edits-per-article', type=int, default=10)
+        parser.add_argument('--cds', type=int, default=5000)
+        parser.add_argument('--threads', type=int, default=4,
+                            help='Concurrent client threads (default: 4)')
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Requests per client thread (default: 200)')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Also write the JSON report to this file')
+        parser.add_argument('--baseline', help='JSON report of an earlier run to compare with')
+
+    def seed(self, rng, options):
+        authors = [User(username='author%d' % i, password='!') for i in range(10)]
+        User.objects.bulk_create(authors)
+        author_ids = list(User.objects.values_list('pk', flat=True))
+
+        texts = ["print(%d)\n" % i * rng.randint(1, 200) for i in range(options['pastes'])]
+        PasteBlob.objects.bulk_create(
+            (PasteBlob(digest=hashlib.sha256(text.encode('utf-8')).hexdigest(), body=text, size=len(text),
+                       refcount=1) for text in texts), BATCH_SIZE)
+        blob_ids = PasteBlob.objects.order_by('pk').values_list('pk', flat=True)
+        Paste.objects.bulk_create(
+            (Paste(blob_id=blob_id, name='paste %d' % i) for i, blob_id in enumerate(blob_ids)), BATCH_SIZE)
+
+        Post.objects.bulk_create(
+            (Post(title='Post %d' % i, slug='post-%d' % i, text='Post %d\n' % i * 50,
+                  author_id=rng.choice(author_ids), comment_count=options['comments_per_post'])
+             for i in range(options['posts'])), BATCH_SIZE)
+        buckets = {}
+        with transaction.atomic():
+            for pk in Post.objects.order_by('pk').values_list('pk', flat=True):
+                created_on = timezone.make_aware(EPOCH - datetime.timedelta(hours=rng.randrange(2 * 365 * 24)))
+                Post.objects.filter(pk=pk).update(created_on=created_on)
+                for key in ArchiveBucket.objects.keys_for(created_on):
+                    buckets[key] = buckets.get(key, 0) + 1
+        ArchiveBucket.objects.bulk_create(
+            ArchiveBucket(period=period, year=year, number=number, post_count=count)
+            for (period, year, number), count in buckets.items())
+        Comment.objects.bulk_create(
+            (Comment(post_id=post_id, name='reader %d' % i, email='reader@example.com', text='Comment %d' % i)
+             for post_id in Post.objects.values_list('pk', flat=True)
+             for i in range(options['comments_per_post'])), BATCH_SIZE)
+
+        articles = []
+        for i in range(options['articles']):
+            article = Article(title='Article %d' % i, slug='article-%d' % i, is_published=True,
+                              author_id=rng.choice(author_ids), text='Article *%d*\n\n' % i * 20)
+            article.prerender()
+            articles.append(article)
+        Article.objects.bulk_create(articles, BATCH_SIZE)
+        edits = options['edits_per_article']
+        article_ids = list(Article.objects.order_by('pk').values_list('pk', flat=True))
+        Revision.objects.bulk_create(
+            (Revision(article_id=pk, number=number, is_snapshot=True, content='Article revision %d' % number)
+             for pk in article_ids for number in range(1, edits + 2)), BATCH_SIZE)
+        revisions = Revision.objects.filter(number__gt=1).values_list('article', 'number', 'pk')
+        Edit.objects.bulk_create(
+            (Edit(article_id=article_id, revision_id=pk, editor_id=rng.choice(author_ids),
+                  summary='Edit %d' % number)
+             for article_id, number, pk in revisions.iterator()), BATCH_SIZE)
+
+        genres = [code for code, _ in GENRE_CHOICES]
+        CD.objects.bulk_create(
+            (CD(title='Album %d' % i, artist='Artist %d' % rng.randrange(max(options['cds'] // 10, 1)),
+                genre=rng.choice(genres), date=EPOCH.date() - datetime.timedelta(days=rng.randrange(40 * 365)))
+             for i in range(options['cds'])), BATCH_SIZE)
+        CDFacet.objects.rebuild()
+
+    def targets(self):
+        paste_ids = list(Paste.objects.values_list('pk', flat=True))
+        posts = [(slug, timezone.localtime(created_on))
+                 for slug, created_on in Post.objects.values_list('slug', 'created_on')]
+        article_slugs = list(Article.objects.values_list('slug', flat=True))
+        genres = [code for code, _ in GENRE_CHOICES]
+        targets = [
+            loadtest.Target('paste_list', lambda rng: reverse('pastebin_paste_list')),
+            loadtest.Target('article_list', lambda rng: reverse('wiki_article_index')),
+            loadtest.Target('cd_list', lambda rng: reverse('cd_library_cd_list') + (
+                '?genre=%s' % rng.choice(genres) if rng.random() < 0.5 else '')),
+        ]
+        if paste_ids:
+            targets.append(loadtest.Target('paste_detail', lambda rng: reverse(
+                'pastebin_paste_detail', args=[rng.choice(paste_ids)])))
+        if posts:
+            targets.extend([
+                loadtest.Target('post_detail', lambda rng: reverse(
+                    'blog_post_detail', args=[rng.choice(posts)[0]])),
+                loadtest.Target('archive_month', lambda rng: reverse(
+                    'blog_archive_month', args=rng.choice(posts)[1].strftime('%Y %m').split())),
+                loadtest.Target('archive_week', lambda rng: reverse(
+                    'blog_archive_week', args=rng.choice(posts)[1].strftime('%Y %W').split())),
+            ])
+        if article_slugs:
+            targets.append(loadtest.Target('article_history', lambda rng: reverse(
+                'wiki_article_history', args=[rng.choice(article_slugs)])))
+        return targets
+
+    def handle(self, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            rng = random.Random(options['seed'])
+            self.seed(rng, options)
+            # the profiling middleware would be measured along with the views
+            with override_settings(PROFILING_SAMPLE_RATE=0.0):
+                report = loadtest.run(self.targets(), options['threads'], options['requests'], options['seed'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        report['config'] = dict(
+            (name, options[name]) for name in ('pastes', 'posts', 'comments_per_post', 'articles',
+                                               'edits_per_article', 'cds', 'threads', 'requests', 'seed'))
+        report['config']['cache'] = settings.CACHES['default']['BACKEND'].rsplit('.', 1)[-1]
+        output = json.dumps(report, indent=2, sort_keys=True)
+        self.stdout.write(output)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            for line in loadtest.compare(report, baseline):
+                self.stderr.write(line)
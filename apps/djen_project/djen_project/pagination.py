@@ -0,0 +1,135 @@
+"""
+Keyset (cursor) pagination.
+
+Offset pagination makes the database walk and throw away every row before
+the requested page, and needs a ``COUNT(*)`` over the whole table. Keyset
+pagination instead remembers the ordering key of the last row shown and asks
+for rows strictly after it, so every page is a single index range scan no
+matter how deep into the listing it is.
+"""
+
+import base64
+import json
+
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from django.http import Http404
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+class CursorPage(object):
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return '<CursorPage of %s objects>' % len(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator(object):
+    """
+    Paginates ``queryset`` on ``ordering``, which must be a unique key
+    (end it with the primary key to break ties), e.g. ``('-created_on', '-id')``.
+    """
+
+    def __init__(self, queryset, per_page, ordering=('-id',)):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.keys = [(name.lstrip('-'), name.startswith('-')) for name in self.ordering]
+
+    def _field(self, name):
+        return self.queryset.model._meta.get_field(name)
+
+    def encode_cursor(self, obj, direction):
+        values = [self._field(name).value_to_string(obj) for name, _ in self.keys]
+        payload = json.dumps([direction] + values, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+            direction, values = payload[0], payload[1:]
+            if direction not in ('n', 'p') or len(values) != len(self.keys):
+                raise ValueError(cursor)
+            values = [self._field(name).to_python(value)
+                      for (name, _), value in zip(self.keys, values)]
+        except Exception:
+            raise InvalidCursor('Invalid cursor %r' % cursor)
+        return direction, values
+
+    def _after(self, values, reverse=False):
+        """
+        Build ``(k1, k2, ...) > (v1, v2, ...)`` in ordering terms as a chain
+        of ORs, since not every backend supports row-value comparisons.
+        """
+        condition = Q()
+        equal = Q()
+        for (name, descending), value in zip(self.keys, values):
+            lookup = 'lt' if descending != reverse else 'gt'
+            condition |= equal & Q(**{'%s__%s' % (name, lookup): value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def page(self, cursor=None):
+        queryset = self.queryset
+        direction = 'n'
+        if cursor:
+            direction, values = self.decode_cursor(cursor)
+            queryset = queryset.filter(self._after(values, reverse=direction == 'p'))
+        if direction == 'p':
+            ordering = [name[1:] if name.startswith('-') else '-' + name for name in self.ordering]
+        else:
+            ordering = self.ordering
+        rows = list(queryset.order_by(*ordering)[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if direction == 'p':
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, bool(cursor)
+        next_cursor = self.encode_cursor(rows[-1], 'n') if rows and has_next else None
+        previous_cursor = self.encode_cursor(rows[0], 'p') if rows and has_previous else None
+        return CursorPage(rows, self, next_cursor, previous_cursor)
+
+
+class CursorPaginationMixin(object):
+    """
+    Drop-in replacement for ``ListView`` pagination that uses
+    ``CursorPaginator``. Templates get the usual ``page_obj`` and
+    ``is_paginated`` plus ``page_obj.next_cursor``/``previous_cursor``.
+    """
+
+    cursor_ordering = ('-id',)
+    cursor_kwarg = 'cursor'
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = CursorPaginator(queryset, page_size, self.cursor_ordering)
+        cursor = self.kwargs.get(self.cursor_kwarg) or self.request.GET.get(self.cursor_kwarg)
+        try:
+            page = paginator.page(cursor)
+        except InvalidCursor as e:
+            raise Http404(str(e))
+        return (paginator, page, page.object_list, page.has_other_pages())
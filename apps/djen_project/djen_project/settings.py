@@ -11,10 +11,15 @@ https://docs.djangoproject.com/en/2.0/ref/settings/
 """
 
 import os
+import sys
+import tempfile
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+# Code shared with the other project lives in apps/shared, see djen_common
+sys.path.append(os.path.join(os.path.dirname(BASE_DIR), 'shared'))
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/2.0/howto/deployment/checklist/
@@ -41,9 +46,12 @@ INSTALLED_APPS = [
     'pastebin',
     'blog',
     'wiki',
+    'djen_project',
+    'djen_common',
 ]
 
 MIDDLEWARE = [
+    'djen_common.profiling.QueryProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -57,7 +65,7 @@ ROOT_URLCONF = 'djen_project.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'djen_common.profiling.ProfilingTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates'),],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -79,12 +87,67 @@ WSGI_APPLICATION = 'djen_project.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'djen_common.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # applied to every connection, see djen_common.sqlite3
+        'PRAGMAS': {
+            'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+            'synchronous': 'NORMAL',
+            'cache_size': -20000,  # KiB when negative
+            'mmap_size': 128 * 1024 * 1024,
+            'busy_timeout': 5000,
+            'temp_store': 'MEMORY',
+        },
+        # a file rather than an in-memory database, so tests that edit
+        # from several threads see SQLite's real locking behaviour
+        'TEST': {
+            'NAME': os.path.join(BASE_DIR, 'test_db.sqlite3'),
+        },
     }
 }
 
 
+# Caches
+# https://docs.djangoproject.com/en/2.0/topics/cache/
+#
+# DJANGO_CACHE picks the backend: 'locmem' (the default; private to each
+# process), 'file' (shared by every process on the host) or 'network', an
+# in-process stand-in for memcached/redis that adds DJANGO_CACHE_LATENCY
+# seconds per call. With several processes, use 'file' or a real server.
+
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'djen_project',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', os.path.join(tempfile.gettempdir(), 'djen_project-cache')),
+    },
+    'network': {
+        'BACKEND': 'djen_common.cache_backends.SimulatedNetworkCache',
+        'LOCATION': 'djen_project',
+        'OPTIONS': {
+            'LATENCY': float(os.environ.get('DJANGO_CACHE_LATENCY', '0.0005')),
+        },
+    },
+}
+
+CACHES = {
+    'default': CACHE_BACKENDS[os.environ.get('DJANGO_CACHE', 'locmem')],
+    'profiling': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('PROFILING_CACHE_LOCATION', os.path.join(tempfile.gettempdir(), 'djen_project-profiling')),
+    },
+}
+
+
+# Sessions: read from the cache, written through to the database so they
+# survive a cache restart
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/1.11/ref/settings/#auth-password-validators
 
@@ -122,3 +185,35 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/2.0/howto/static-files/
 
 STATIC_URL = '/static/'
+
+
+# Request profiling, see djen_common.profiling: PROFILING_SAMPLE_RATE of
+# requests get a Server-Timing header, are logged when they cross the
+# thresholds below, and add to the per-URL timings kept in PROFILING_CACHE
+# for manage.py profiling_report. The report runs in its own process, so
+# the cache must be shared between processes: a file-based one by default.
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', '1.0' if DEBUG else '0.05'))
+PROFILING_SLOW_REQUEST_MS = 500
+PROFILING_MAX_QUERIES = 50
+PROFILING_MAX_DUPLICATES = 10
+PROFILING_CACHE = 'profiling'
+PROFILING_SAMPLES = 1000
+
+
+# Tests run with profiling off and PROFILING_CACHE in local memory, so they
+# don't add to the timings of a development server; see
+# djen_common.test_runner.
+
+TEST_RUNNER = 'djen_common.test_runner.DiscoverRunner'
+
+
+# Pastebin rendered-page cache
+
+PASTEBIN_CACHE = 'default'
+
+PASTEBIN_CACHE_TIMEOUT = 60 * 60
+
+
+# Wiki revisions: every Nth revision stores the full text, the rest deltas
+
+WIKI_REVISION_SNAPSHOT_INTERVAL = 20
@@ -0,0 +1,214 @@
+import csv
+import datetime
+import gzip
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.models import Comment, Post
+from djen_common import loadtest, profiling
+from djen_common.cache_backends import SimulatedNetworkCache
+from djen_common.sqlite3.base import DatabaseWrapper
+from pastebin.models import Paste
+from wiki.models import Article, Edit
+
+
+class SimulatedNetworkCacheTest(SimpleTestCase):
+    def test_one_round_trip_per_call(self):
+        cache = SimulatedNetworkCache('network-test', {'OPTIONS': {'LATENCY': 0.01}})
+        with mock.patch('time.sleep') as sleep:
+            cache.set_many({'a': 1, 'b': 2})
+            self.assertEqual(cache.get_many(['a', 'b', 'c']), {'a': 1, 'b': 2})
+            cache.incr('a')
+            cache.decr('b')
+        self.assertEqual(sleep.call_count, 4)
+        sleep.assert_called_with(0.01)
+        self.assertEqual(cache.get('a'), 2)
+
+
+class SQLitePragmaTest(TestCase):
+    def test_pragmas_applied_to_connection(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+
+    def test_invalid_pragma(self):
+        settings_dict = dict(connection.settings_dict, PRAGMAS={'journal_mode': 'WAL; DROP TABLE auth_user'})
+        wrapper = DatabaseWrapper(settings_dict)
+        with self.assertRaises(ImproperlyConfigured):
+            wrapper.ensure_connection()
+
+
+class ExportTest(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user('operator', password='secret', is_staff=True)
+        self.client.force_login(self.staff)
+
+    def export(self, dataset, **params):
+        response = self.client.get(reverse('export', args=[dataset]), params)
+        self.assertEqual(response.status_code, 200)
+        body = b''.join(response.streaming_content)
+        if params.get('gzip'):
+            body = gzip.decompress(body)
+        return body.decode('utf-8')
+
+    def test_jsonl_gzip_and_since(self):
+        old = Paste.objects.create(name="old", text="print('old')")
+        Paste.objects.filter(pk=old.pk).update(updated_on=timezone.now() - datetime.timedelta(days=3))
+        Paste.objects.create(name="new", text="print('new')\n" * 1000)
+        rows = [json.loads(line) for line in self.export('pastes', gzip='1').splitlines()]
+        self.assertEqual([row['name'] for row in rows], ["old", "new"])
+        self.assertEqual(rows[1]['text'], "print('new')\n" * 1000)
+
+        since = (timezone.now() - datetime.timedelta(days=1)).date().isoformat()
+        rows = [json.loads(line) for line in self.export('pastes', since=since).splitlines()]
+        self.assertEqual([row['name'] for row in rows], ["new"])
+
+    def test_csv_and_edited_articles(self):
+        article = Article.objects.create(title="Export", text="Some text", author=self.staff)
+        Article.objects.filter(pk=article.pk).update(created_on=timezone.now() - datetime.timedelta(days=3))
+        since = (timezone.now() - datetime.timedelta(days=1)).isoformat()
+        self.assertEqual(len(list(csv.DictReader(io.StringIO(self.export('articles', format='csv', since=since))))), 0)
+        Edit.objects.create(article=article, editor=self.staff, summary="Touch up")
+        rows = list(csv.DictReader(io.StringIO(self.export('articles', format='csv', since=since))))
+        self.assertEqual([(row['slug'], row['author'], row['text']) for row in rows],
+                         [('export', 'operator', "Some text")])
+
+    def test_edited_posts(self):
+        post = Post.objects.create(title="Edited", text="First draft", author=self.staff)
+        Post.objects.filter(pk=post.pk).update(created_on=timezone.now() - datetime.timedelta(days=3),
+                                               updated_on=timezone.now() - datetime.timedelta(days=3))
+        since = (timezone.now() - datetime.timedelta(days=1)).isoformat()
+        self.assertEqual(self.export('posts', since=since), '')
+        post.text = "Second draft"
+        post.save()
+        rows = [json.loads(line) for line in self.export('posts', since=since).splitlines()]
+        self.assertEqual([row['text'] for row in rows], ["Second draft"])
+
+    def test_staff_only(self):
+        self.client.logout()
+        self.client.force_login(User.objects.create_user('reader', password='secret'))
+        self.assertEqual(self.client.get(reverse('export', args=['posts'])).status_code, 302)
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(reverse('export', args=['users'])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('export', args=['posts']), {'since': 'soon'}).status_code, 400)
+
+    def test_command(self):
+        post = Post.objects.create(title="Dump", text="Post text", author=self.staff)
+        Comment.objects.create(post=post, name="Reader", email="reader@example.com", text="Nice")
+        out = io.BytesIO()
+        with mock.patch('sys.stdout', mock.Mock(buffer=out)):
+            call_command('export_data', 'comments', chunk_size=1, stderr=io.StringIO())
+        self.assertEqual(json.loads(out.getvalue().decode('utf-8'))['post'], post.pk)
+
+
+# reset() must not wipe the timings of a development server
+@override_settings(PROFILING_SAMPLE_RATE=1.0, CACHES=dict(settings.CACHES, profiling={
+    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    'LOCATION': os.path.join(tempfile.gettempdir(), 'djen_project-profiling-test'),
+}))
+class ProfilingTest(TestCase):
+    def setUp(self):
+        profiling.reset()
+        self.addCleanup(profiling.reset)
+        author = User.objects.create_user('author', password='secret')
+        self.post = Post.objects.create(title="Profiled", text="Profiled post", author=author)
+
+    def test_server_timing_and_report(self):
+        url = reverse('blog_post_detail', args=[self.post.slug])
+        response = self.client.get(url)
+        timing = dict(metric.split(';', 1) for metric in response['Server-Timing'].split(', '))
+        self.assertEqual(set(timing), {'db', 'dup', 'tpl', 'total'})
+        self.assertRegex(timing['db'], r'desc="\d+ queries"')
+        self.assertEqual(timing['dup'], 'desc="0 repeated"')
+
+        for i in range(profiling.FLUSH_EVERY):
+            self.client.get(url)
+        out = io.StringIO()
+        call_command('profiling_report', json=True, stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertGreaterEqual(report['blog_post_detail']['requests'], profiling.FLUSH_EVERY)
+        self.assertEqual(len(report['blog_post_detail']['total_ms']), 3)
+
+    def test_samples_are_only_recorded_when_enabled(self):
+        url = reverse('blog_post_detail', args=[self.post.slug])
+        with override_settings(PROFILING_SAMPLE_RATE=0):
+            for i in range(profiling.FLUSH_EVERY):
+                self.assertNotIn('Server-Timing', self.client.get(url))
+        self.assertEqual(profiling.aggregates(), {})
+        for i in range(profiling.FLUSH_EVERY):
+            self.client.get(url)
+        self.assertEqual(profiling.aggregates()['blog_post_detail'][0], profiling.FLUSH_EVERY)
+
+    def test_report_refuses_a_local_memory_cache(self):
+        caches = dict(settings.CACHES, profiling={'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'})
+        with override_settings(CACHES=caches):
+            with self.assertRaisesRegex(CommandError, "local-memory"):
+                call_command('profiling_report', stdout=io.StringIO())
+
+    @override_settings(PROFILING_MAX_DUPLICATES=1)
+    def test_repeated_queries_logged(self):
+        def view_with_n_plus_one():
+            for i in range(3):
+                Post.objects.filter(pk=self.post.pk).exists()
+
+        profile = profiling.RequestProfile()
+        with connection.execute_wrapper(profile):
+            view_with_n_plus_one()
+        self.assertEqual(profile.duplicates(), 2)
+
+        middleware = profiling.QueryProfilingMiddleware(lambda request: (view_with_n_plus_one(), HttpResponse())[1])
+        request = RequestFactory().get('/n-plus-one')
+        request.resolver_match = None
+        with self.assertLogs('djen_common.profiling', 'WARNING') as logs:
+            response = middleware(request)
+        self.assertIn('dup;desc="2 repeated"', response['Server-Timing'])
+        self.assertIn('3x SELECT', logs.output[0])
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual([profiling.percentile(values, p) for p in (0.5, 0.95, 0.99)], [50, 95, 99])
+
+
+class LoadTestTest(TransactionTestCase):
+    def test_run_reports_every_view(self):
+        targets = [
+            loadtest.Target('paste_list', lambda rng: reverse('pastebin_paste_list')),
+            loadtest.Target('missing', lambda rng: '/no/such/page/%d' % rng.randrange(10)),
+        ]
+        report = loadtest.run(targets, threads=2, requests=6, seed=1)
+        self.assertEqual(report['total']['requests'], 12)
+        self.assertEqual(report['views']['paste_list']['errors'], 0)
+        self.assertEqual(report['views']['missing']['errors'], 6)
+        self.assertEqual(set(report['views']['paste_list']['latency_ms']), {'mean', 'p50', 'p95', 'p99', 'max'})
+        self.assertIn('+0.0%', loadtest.compare(report, report)[1])
+
+    def test_client_thread_errors_are_raised(self):
+        def broken(rng):
+            raise ValueError("no url")
+
+        with self.assertRaisesRegex(RuntimeError, "no url") as raised:
+            loadtest.run([loadtest.Target('broken', broken)], threads=2, requests=1)
+        self.assertIsInstance(raised.exception.__cause__, ValueError)
+
+
+class TestRunnerTest(SimpleTestCase):
+    def test_tests_do_not_profile_into_the_real_cache(self):
+        self.assertEqual(settings.PROFILING_SAMPLE_RATE, 0)
+        self.assertIsInstance(caches[settings.PROFILING_CACHE], LocMemCache)
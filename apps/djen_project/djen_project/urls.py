@@ -18,10 +18,14 @@ from django.contrib import admin
 from django.urls import path, include
 from django.contrib.auth.views import login
 
+from .views import export
+
 urlpatterns = [
     path('accounts/login/', login),
     path('admin/', admin.site.urls),
     path('pastebin/', include('pastebin.urls')),
     path('blog/', include('blog.urls')),
     path('wiki/', include('wiki.urls')),
+    path('cds/', include('cd_library.urls')),
+    path('export/<str:dataset>', export, name='export'),
 ]
@@ -0,0 +1,35 @@
+from django.contrib.auth.decorators import user_passes_test
+from django.http import Http404, HttpResponseBadRequest, StreamingHttpResponse
+
+from . import exports
+
+
+@user_passes_test(lambda u: u.is_staff)
+def export(request, dataset):
+    """
+    Streams ``dataset`` as JSON Lines (``?format=jsonl``, the default) or
+    CSV, gzipped with ``?gzip=1``, limited to rows changed since ``?since=``
+    (for comments, which can't be edited: created since).
+    """
+    if dataset not in exports.DATASETS:
+        raise Http404("No dataset %r" % dataset)
+    format = request.GET.get('format', 'jsonl')
+    if format not in exports.FORMATS:
+        return HttpResponseBadRequest("format must be one of %s" % ', '.join(exports.FORMATS))
+    since = None
+    if request.GET.get('since'):
+        try:
+            since = exports.parse_since(request.GET['since'])
+        except ValueError as e:
+            return HttpResponseBadRequest(str(e))
+    compress = request.GET.get('gzip') == '1'
+    filename = '%s.%s' % (dataset, format)
+    if compress:
+        response = StreamingHttpResponse(exports.stream(dataset, format, since, compress=True),
+                                         content_type='application/gzip')
+        filename += '.gz'
+    else:
+        response = StreamingHttpResponse(exports.stream(dataset, format, since),
+                                         content_type='%s; charset=utf-8' % exports.CONTENT_TYPES[format])
+    response['Content-Disposition'] = 'attachment; filename="%s"' % filename
+    return response
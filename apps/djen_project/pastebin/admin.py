@@ -1,5 +1,10 @@
 from django.contrib import admin
 from .models import Paste
+from .forms import PasteForm
 
-admin.site.register(Paste)
+
+class PasteAdmin(admin.ModelAdmin):
+    form = PasteForm
+
+admin.site.register(Paste, PasteAdmin)
 
@@ -0,0 +1,95 @@
+"""
+Rendered-page cache for paste details.
+
+Each paste has a version pointer (its ``updated_on``) and a rendered HTML
+fragment stored under that version, so a conditional GET can be answered
+from the cache alone and a stale fragment can never be served once the
+pointer moves on. Any cache backend works; hits and misses are counted in
+the cache itself so every process contributes to the same numbers.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.safestring import mark_safe
+
+KEY_PREFIX = 'pastebin:paste'
+STATS_KEYS = ('hits', 'misses')
+
+# Version pointer left behind by a deleted paste
+DELETED = False
+
+
+def get_cache():
+    return caches[getattr(settings, 'PASTEBIN_CACHE', 'default')]
+
+
+def get_timeout():
+    return getattr(settings, 'PASTEBIN_CACHE_TIMEOUT', 60 * 60)
+
+
+def _version_key(pk):
+    return '%s:%s:version' % (KEY_PREFIX, pk)
+
+
+def _fragment_key(pk, updated_on):
+    return '%s:%s:%s' % (KEY_PREFIX, pk, version_tag(updated_on))
+
+
+def _stats_key(name):
+    return '%s:stats:%s' % (KEY_PREFIX, name)
+
+
+def _count(name):
+    cache = get_cache()
+    key = _stats_key(name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def version_tag(updated_on):
+    return '%d' % (updated_on.timestamp() * 1000000)
+
+
+def get_version(pk):
+    return get_cache().get(_version_key(pk))
+
+
+def add_version(pk, updated_on):
+    """Caches a version read from the database, unless a writer set one first"""
+    get_cache().add(_version_key(pk), updated_on, get_timeout())
+
+
+def set_version(pk, updated_on):
+    """
+    Moves the pointer of ``pk`` to ``updated_on`` (``DELETED`` once the
+    paste is gone) and drops the old fragment. Writers overwrite the pointer
+    rather than deleting it, so a reader that loaded the old row can't put
+    it back with ``add_version``.
+    """
+    cache = get_cache()
+    old = cache.get(_version_key(pk))
+    cache.set(_version_key(pk), updated_on, get_timeout())
+    if old and old != updated_on:
+        cache.delete(_fragment_key(pk, old))
+
+
+def get_fragment(pk, updated_on):
+    html = get_cache().get(_fragment_key(pk, updated_on))
+    _count('misses' if html is None else 'hits')
+    return None if html is None else mark_safe(html)
+
+
+def set_fragment(pk, updated_on, html):
+    get_cache().set(_fragment_key(pk, updated_on), str(html), get_timeout())
+
+
+def stats():
+    values = get_cache().get_many([_stats_key(name) for name in STATS_KEYS])
+    return dict((name, values.get(_stats_key(name), 0)) for name in STATS_KEYS)
+
+
+def reset_stats():
+    get_cache().delete_many([_stats_key(name) for name in STATS_KEYS])
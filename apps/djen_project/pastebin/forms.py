@@ -0,0 +1,21 @@
+from django import forms
+
+from .models import Paste
+
+class PasteForm(forms.ModelForm):
+    text = forms.CharField(widget=forms.Textarea)
+
+    field_order = ['text', 'name']
+
+    class Meta:
+        model = Paste
+        fields = ['name']
+
+    def __init__(self, *args, **kwargs):
+        super(PasteForm, self).__init__(*args, **kwargs)
+        if self.instance.pk is not None:
+            self.initial.setdefault('text', self.instance.text)
+
+    def save(self, commit=True):
+        self.instance.text = self.cleaned_data['text']
+        return super(PasteForm, self).save(commit)
@@ -1,20 +1,68 @@
 import datetime
+import time
 
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
 
-from pastebin.models import Paste
+from pastebin.models import Paste, PasteBlob
 
 class Command(BaseCommand):
     help = """
             deletes pastes not updated in last 24 hrs
 
             Use this subcommand in a cron job
-            to clear older pastes
+            to clear older pastes. Pastes are deleted
+            in small primary key batches so the table
+            is never locked for long, then paste bodies
+            no longer referenced by any paste are freed.
            """
 
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=float, default=24,
+                            help='Delete pastes not updated for this many hours (default: 24)')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of pastes deleted per transaction (default: 1000)')
+        parser.add_argument('--sleep', type=float, default=0.0,
+                            help='Seconds to pause between batches to let other writers in')
+        parser.add_argument('--max-runtime', type=float, default=None,
+                            help='Stop after this many seconds, leaving the rest for the next run')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report how many pastes would be deleted')
+
     def handle(self, **options):
-        now = datetime.datetime.now()
-        yesterday = now - datetime.timedelta(1)
-        old_pastes = Paste.objects.filter(updated_on__lte=yesterday)
-        old_pastes.delete()
+        cutoff = timezone.now() - datetime.timedelta(hours=options['hours'])
+        old_pastes = Paste.objects.filter(updated_on__lte=cutoff)
+
+        if options['dry_run']:
+            self.stdout.write("%d pastes would be deleted" % old_pastes.count())
+            return
+
+        batch_size = options['batch_size']
+        max_runtime = options['max_runtime']
+        started = time.monotonic()
+        deleted = 0
+        while True:
+            pks = list(old_pastes.order_by('updated_on').values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+            with transaction.atomic():
+                # the post_delete receiver releases each paste's blob
+                count, _ = old_pastes.filter(pk__in=pks).select_for_update().delete()
+            deleted += count
+            elapsed = time.monotonic() - started
+            if options['verbosity'] > 1:
+                self.stdout.write("deleted %d pastes (%d total, %.0f/s)" % (
+                    count, deleted, deleted / elapsed if elapsed else 0))
+            if len(pks) < batch_size:
+                break
+            if max_runtime is not None and elapsed >= max_runtime:
+                self.stdout.write("runtime budget of %ss used up, stopping early" % max_runtime)
+                break
+            if options['sleep']:
+                time.sleep(options['sleep'])
 
+        elapsed = time.monotonic() - started
+        self.stdout.write("deleted %d pastes in %.2fs (%.0f/s)" % (
+            deleted, elapsed, deleted / elapsed if elapsed else 0))
+        self.stdout.write("freed %d unreferenced paste bodies" % PasteBlob.objects.collect_garbage())
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from pastebin import cache
+
+class Command(BaseCommand):
+    help = """
+            reports hit/miss counters of the
+            rendered paste detail cache
+           """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true',
+                            help='Reset the counters after reporting them')
+
+    def handle(self, **options):
+        stats = cache.stats()
+        lookups = stats['hits'] + stats['misses']
+        self.stdout.write("hits: %d" % stats['hits'])
+        self.stdout.write("misses: %d" % stats['misses'])
+        self.stdout.write("hit ratio: %.1f%%" % (100.0 * stats['hits'] / lookups if lookups else 0))
+        if options['reset']:
+            cache.reset_stats()
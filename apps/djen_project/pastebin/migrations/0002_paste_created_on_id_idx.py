@@ -0,0 +1,17 @@
+# Generated by Django 2.0.13 on 2026-10-18 11:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pastebin', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='paste',
+            index=models.Index(fields=['created_on', 'id'], name='paste_created_on_id_idx'),
+        ),
+    ]
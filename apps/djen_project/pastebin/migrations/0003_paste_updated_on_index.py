@@ -0,0 +1,18 @@
+# Generated by Django 2.0.13 on 2026-10-18 11:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pastebin', '0002_paste_created_on_id_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='paste',
+            name='updated_on',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
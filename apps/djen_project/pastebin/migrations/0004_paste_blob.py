@@ -0,0 +1,72 @@
+import hashlib
+
+from django.db import migrations, models
+from django.db.models import F
+import django.db.models.deletion
+
+from djen_project.compression import compress, decompress
+
+BATCH_SIZE = 500
+
+
+def move_text_to_blobs(apps, schema_editor):
+    Paste = apps.get_model('pastebin', 'Paste')
+    PasteBlob = apps.get_model('pastebin', 'PasteBlob')
+    last_pk = 0
+    while True:
+        batch = list(Paste.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', 'text')[:BATCH_SIZE])
+        if not batch:
+            break
+        for pk, text in batch:
+            digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+            blob, created = PasteBlob.objects.get_or_create(
+                digest=digest, defaults={'body': compress(text), 'size': len(text)})
+            PasteBlob.objects.filter(pk=blob.pk).update(refcount=F('refcount') + 1)
+            Paste.objects.filter(pk=pk).update(blob=blob)
+        last_pk = batch[-1][0]
+
+
+def move_blobs_to_text(apps, schema_editor):
+    Paste = apps.get_model('pastebin', 'Paste')
+    for paste in Paste.objects.select_related('blob').iterator():
+        Paste.objects.filter(pk=paste.pk).update(text=decompress(paste.blob.body))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pastebin', '0003_paste_updated_on_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PasteBlob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=64, unique=True)),
+                ('body', models.BinaryField()),
+                ('size', models.PositiveIntegerField()),
+                ('refcount', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='paste',
+            name='blob',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='pastes', to='pastebin.PasteBlob'),
+        ),
+        migrations.AlterField(
+            model_name='paste',
+            name='text',
+            field=models.TextField(default=''),
+        ),
+        migrations.RunPython(move_text_to_blobs, move_blobs_to_text),
+        migrations.RemoveField(
+            model_name='paste',
+            name='text',
+        ),
+        migrations.AlterField(
+            model_name='paste',
+            name='blob',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='pastes', to='pastebin.PasteBlob'),
+        ),
+    ]
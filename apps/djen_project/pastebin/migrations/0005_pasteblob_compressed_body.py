@@ -0,0 +1,19 @@
+# Generated by Django 2.0.13 on 2026-10-18 11:16
+
+from django.db import migrations
+import djen_project.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pastebin', '0004_paste_blob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pasteblob',
+            name='body',
+            field=djen_project.fields.CompressedTextField(min_length=0),
+        ),
+    ]
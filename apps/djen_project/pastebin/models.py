@@ -1,15 +1,116 @@
-from django.db import models
+import hashlib
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from djen_project.fields import CompressedTextField
+from . import cache
+
+
+class PasteBlobManager(models.Manager):
+    def intern(self, text):
+        """
+        Returns the blob holding ``text``, creating it if needed, and takes
+        a reference on it.
+        """
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        with transaction.atomic():
+            if self.filter(digest=digest).update(refcount=F('refcount') + 1):
+                return self.defer('body').get(digest=digest)
+            try:
+                with transaction.atomic():
+                    return self.create(digest=digest, body=text, size=len(text), refcount=1)
+            except IntegrityError:
+                # Somebody stored the same text concurrently; take a
+                # reference on theirs instead.
+                return self.intern(text)
+
+    def release(self, pk, count=1):
+        self.filter(pk=pk).update(refcount=F('refcount') - count)
+
+    def collect_garbage(self):
+        # One DELETE ... WHERE refcount = 0, so a blob that intern() takes a
+        # new reference on meanwhile is never removed. delete() would select
+        # the pks first and delete them later, whatever their refcount.
+        # Nothing references a blob without holding a count on it, so
+        # skipping the collector's PROTECT check loses nothing.
+        return self.filter(refcount=0)._raw_delete(self.db)
+
+
+class PasteBlob(models.Model):
+    """Deduplicated, compressed paste body, shared by identical pastes"""
+
+    digest = models.CharField(max_length=64, unique=True)
+    body = CompressedTextField(min_length=0)
+    size = models.PositiveIntegerField()
+    refcount = models.PositiveIntegerField(default=0)
+
+    objects = PasteBlobManager()
+
+    def __str__(self):
+        return self.digest
+
+    @property
+    def text(self):
+        return self.body
+
 
-# Create your models here.
 class Paste(models.Model):
-    text = models.TextField()
+    blob = models.ForeignKey(PasteBlob, on_delete=models.PROTECT, related_name='pastes')
     name = models.CharField(max_length=40, null=True, blank=True)
     created_on = models.DateTimeField(auto_now_add=True)
-    updated_on = models.DateTimeField(auto_now=True)
+    updated_on = models.DateTimeField(auto_now=True, db_index=True)
+
+    _text = None
+    _text_changed = False
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_on', 'id'], name='paste_created_on_id_idx'),
+        ]
 
     def __str__(self):
         return self.name or str(self.id)
 
     @models.permalink
     def get_absolute_url(self):
-        return ('pastebin_paste_detail', [self.id])
\ No newline at end of file
+        return ('pastebin_paste_detail', [self.id])
+
+    @property
+    def text(self):
+        if self._text is None and self.blob_id is not None:
+            self._text = self.blob.text
+        return self._text
+
+    @text.setter
+    def text(self, value):
+        self._text = value
+        self._text_changed = True
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            old_blob_id = None
+            if self._text_changed:
+                old_blob_id = self.blob_id
+                self.blob = PasteBlob.objects.intern(self._text)
+            super(Paste, self).save(*args, **kwargs)
+            if old_blob_id is not None:
+                PasteBlob.objects.release(old_blob_id)
+            self._publish_version(self.updated_on)
+        self._text_changed = False
+
+    def _publish_version(self, updated_on):
+        # Only once the write is committed: until then readers keep seeing
+        # the old row and its cached page.
+        pk = self.pk
+        transaction.on_commit(lambda: cache.set_version(pk, updated_on))
+
+
+@receiver(post_delete, sender=Paste)
+def paste_deleted(sender, instance, **kwargs):
+    # Queryset and admin deletes never call Paste.delete(), so the blob
+    # reference and the cached page are dropped here for every delete.
+    PasteBlob.objects.release(instance.blob_id)
+    instance._publish_version(cache.DELETED)
@@ -1,3 +1,150 @@
-from django.test import TestCase
+import datetime
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from . import cache
+from .models import Paste, PasteBlob
+
+
+class PasteListTest(TestCase):
+    def setUp(self):
+        for i in range(120):
+            Paste.objects.create(text="paste %s" % i, name="paste-%s" % i)
+
+    def test_pages_walk_every_paste_once(self):
+        url = reverse('pastebin_paste_list')
+        seen = []
+        cursor = None
+        while True:
+            response = self.client.get(url, {'cursor': cursor} if cursor else {})
+            self.assertEqual(response.status_code, 200)
+            page = response.context['page_obj']
+            seen.extend(paste.id for paste in page.object_list)
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+        self.assertEqual(len(seen), 120)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+    def test_previous_cursor_returns_previous_page(self):
+        url = reverse('pastebin_paste_list')
+        first = self.client.get(url).context['page_obj']
+        second = self.client.get(url, {'cursor': first.next_cursor}).context['page_obj']
+        back = self.client.get(url, {'cursor': second.previous_cursor}).context['page_obj']
+        self.assertEqual([p.id for p in back.object_list], [p.id for p in first.object_list])
+        self.assertFalse(back.has_previous())
+
+    def test_page_is_constant_number_of_queries(self):
+        with self.assertNumQueries(1):
+            self.client.get(reverse('pastebin_paste_list'))
+
+    def test_bad_cursor_is_404(self):
+        response = self.client.get(reverse('pastebin_paste_list'), {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 404)
+
+
+class DeleteOldTest(TestCase):
+    def setUp(self):
+        for i in range(25):
+            Paste.objects.create(text="old %s" % i)
+        Paste.objects.update(updated_on=timezone.now() - datetime.timedelta(days=2))
+        self.fresh = Paste.objects.create(text="fresh")
+
+    def test_deletes_old_pastes_in_batches(self):
+        out = StringIO()
+        call_command('delete_old', batch_size=10, verbosity=2, stdout=out)
+        self.assertEqual(list(Paste.objects.all()), [self.fresh])
+        self.assertIn("deleted 25 pastes", out.getvalue())
+        self.assertEqual(out.getvalue().count("total"), 3)
+        self.assertIn("freed 25 unreferenced paste bodies", out.getvalue())
+        self.assertEqual(PasteBlob.objects.get().text, "fresh")
+
+    def test_dry_run_only_counts(self):
+        out = StringIO()
+        call_command('delete_old', dry_run=True, stdout=out)
+        self.assertIn("25 pastes would be deleted", out.getvalue())
+        self.assertEqual(Paste.objects.count(), 26)
+
+
+class PasteBlobTest(TestCase):
+    def test_identical_pastes_share_one_body(self):
+        first = Paste.objects.create(text="Traceback (most recent call last)")
+        second = Paste.objects.create(text="Traceback (most recent call last)")
+        self.assertEqual(first.blob_id, second.blob_id)
+        self.assertEqual(PasteBlob.objects.get().refcount, 2)
+        self.assertEqual(Paste.objects.get(pk=second.pk).text, "Traceback (most recent call last)")
+
+    def test_editing_and_deleting_drop_references(self):
+        first = Paste.objects.create(text="same")
+        second = Paste.objects.create(text="same")
+        second.text = "different"
+        second.save()
+        self.assertEqual(PasteBlob.objects.get(pk=first.blob_id).refcount, 1)
+        first.delete()
+        self.assertEqual(PasteBlob.objects.get(pk=first.blob_id).refcount, 0)
+        self.assertEqual(PasteBlob.objects.collect_garbage(), 1)
+        self.assertEqual(PasteBlob.objects.get().text, "different")
+
+    def test_queryset_delete_drops_references(self):
+        Paste.objects.create(text="shared")
+        Paste.objects.create(text="shared")
+        Paste.objects.all().delete()
+        self.assertEqual(PasteBlob.objects.get().refcount, 0)
+
+    def test_garbage_is_collected_in_one_statement(self):
+        Paste.objects.create(text="kept")
+        Paste.objects.create(text="dropped").delete()
+        with self.assertNumQueries(1):
+            self.assertEqual(PasteBlob.objects.collect_garbage(), 1)
+        self.assertEqual(PasteBlob.objects.get().text, "kept")
+
+    def test_create_view_writes_through_blob(self):
+        self.client.post(reverse('create'), {'text': "print('hi')", 'name': "hello"})
+        paste = Paste.objects.get()
+        self.assertEqual(paste.text, "print('hi')")
+        response = self.client.get(reverse('pastebin_paste_edit', args=[paste.pk]))
+        self.assertContains(response, "print(&#39;hi&#39;)")
+
+
+class PasteDetailCacheTest(TransactionTestCase):
+    def setUp(self):
+        cache.get_cache().clear()
+        self.paste = Paste.objects.create(text="cached body", name="cached")
+        self.url = reverse('pastebin_paste_detail', args=[self.paste.pk])
+
+    def test_second_view_is_served_from_cache(self):
+        self.assertContains(self.client.get(self.url), "cached body")
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertContains(response, "cached body")
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 1})
+
+    def test_conditional_get_returns_304(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_update_and_delete_invalidate(self):
+        self.client.get(self.url)
+        self.client.post(reverse('pastebin_paste_edit', args=[self.paste.pk]),
+                         {'text': "edited body", 'name': "cached"})
+        self.assertContains(self.client.get(self.url), "edited body")
+        self.client.post(reverse('pastebin_paste_delete', args=[self.paste.pk]))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_stale_reader_cannot_restore_old_version(self):
+        pk, old_updated_on = self.paste.pk, self.paste.updated_on
+        self.client.get(self.url)
+        self.paste.text = "newer body"
+        self.paste.save()
+        # a reader that loaded the row just before the save
+        cache.add_version(pk, old_updated_on)
+        self.assertContains(self.client.get(self.url), "newer body")
+        self.paste.delete()
+        cache.add_version(pk, old_updated_on)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
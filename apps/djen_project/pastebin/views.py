@@ -1,25 +1,65 @@
+from django.http import Http404
+from django.shortcuts import render
+from django.template.loader import render_to_string
 from django.urls import reverse_lazy
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from django.views.generic import DeleteView
 from django.views.generic.edit import CreateView, UpdateView
 from django.views.generic.detail import DetailView
 from django.views.generic.list import ListView
+
+from djen_project.pagination import CursorPaginationMixin
+from . import cache
+from .forms import PasteForm
 from .models import Paste
 
 # Create your views here
 
+def paste_updated_on(request, pk):
+	updated_on = cache.get_version(pk)
+	if updated_on is None:
+		updated_on = Paste.objects.filter(pk=pk).values_list('updated_on', flat=True).first()
+		if updated_on is not None:
+			cache.add_version(pk, updated_on)
+	if updated_on is cache.DELETED:
+		return None
+	return updated_on
+
+def paste_etag(request, pk):
+	updated_on = paste_updated_on(request, pk)
+	if updated_on is not None:
+		return '"paste-%s-%s"' % (pk, cache.version_tag(updated_on))
+
 class PasteCreate(CreateView):
 	model = Paste
-	fields = ['text','name']
+	form_class = PasteForm
 
-class PasteList(ListView):
+class PasteList(CursorPaginationMixin, ListView):
 	template_name = "pastebin/paste_list.html"
+	paginate_by = 50
+	cursor_ordering = ('-created_on', '-id')
 	def get_queryset(self):
-		return Paste.objects.all()
+		return Paste.objects.only('id', 'name', 'created_on')
 
 
+@method_decorator(condition(etag_func=paste_etag, last_modified_func=paste_updated_on), name='get')
 class PasteDetail(DetailView):
-	model = Paste
+	queryset = Paste.objects.select_related('blob')
 	template_name = "pastebin/paste_detail.html"
+	body_template_name = "pastebin/paste_detail_body.html"
+
+	def get(self, request, *args, **kwargs):
+		pk = kwargs['pk']
+		updated_on = paste_updated_on(request, pk)
+		if updated_on is None:
+			raise Http404("No paste found matching the query")
+		body = cache.get_fragment(pk, updated_on)
+		if body is None:
+			self.object = self.get_object()
+			body = render_to_string(self.body_template_name, {'object': self.object})
+			cache.set_fragment(pk, self.object.updated_on, body)
+		return render(request, self.template_name, {'paste_body': body})
 
 class PasteDelete(DeleteView):
 	model = Paste
@@ -27,4 +67,4 @@ class PasteDelete(DeleteView):
 
 class PasteUpdate(UpdateView):
 	model = Paste
-	fields = ['text', 'name']
\ No newline at end of file
+	form_class = PasteForm
\ No newline at end of file
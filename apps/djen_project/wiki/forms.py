@@ -3,10 +3,20 @@ from django import forms
 from .models import Article, Edit
 
 class ArticleForm(forms.ModelForm):
+    # the version the edit started from, checked when saving
+    version = forms.IntegerField(widget=forms.HiddenInput, required=False)
+
     class Meta:
         model = Article
         exclude = ['author', 'slug']
 
+    def __init__(self, *args, **kwargs):
+        super(ArticleForm, self).__init__(*args, **kwargs)
+        if self.instance.pk:
+            # without it an edit would skip the conflict check
+            self.fields['version'].required = True
+            self.fields['version'].initial = self.instance.version
+
 
 class EditForm(forms.ModelForm):
     class Meta:
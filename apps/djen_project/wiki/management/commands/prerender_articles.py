@@ -0,0 +1,65 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from wiki import rendering
+from wiki.models import Article
+
+class Command(BaseCommand):
+    help = """
+            renders the ReST of every article whose
+            stored HTML is missing or out of date
+
+            Rendering is spread over a pool of worker
+            processes; articles are read in batches.
+           """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200,
+                            help='Number of articles read and written per transaction (default: 200)')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Number of rendering processes (default: one per CPU, 1 renders in-process)')
+        parser.add_argument('--force', action='store_true',
+                            help='Re-render articles even if their HTML is up to date')
+
+    def handle(self, **options):
+        started = time.monotonic()
+        pool = None
+        if options['workers'] != 1:
+            pool = ProcessPoolExecutor(max_workers=options['workers'])
+        render = pool.map if pool else map
+        articles = Article.objects.order_by('pk')
+        rendered = checked = skipped = 0
+        last_pk = 0
+        try:
+            while True:
+                batch = list(articles.filter(pk__gt=last_pk)
+                             .values_list('pk', 'text', 'rendered_hash', 'version')[:options['batch_size']])
+                if not batch:
+                    break
+                versions = dict((pk, version) for pk, _, _, version in batch)
+                stale = [(pk, text) for pk, text, rendered_hash, _ in batch
+                         if options['force'] or rendering.content_hash(text) != rendered_hash]
+                results = list(render(rendering.render_with_hash, stale))
+                with transaction.atomic():
+                    for pk, content_hash, html in results:
+                        # An article saved since it was read has rendered its
+                        # new text itself; don't put the old HTML back.
+                        if Article.objects.filter(pk=pk, version=versions[pk]).update(
+                                rendered_html=html, rendered_hash=content_hash):
+                            rendered += 1
+                        else:
+                            skipped += 1
+                checked += len(batch)
+                last_pk = batch[-1][0]
+                if options['verbosity'] > 1:
+                    self.stdout.write("rendered %d of %d articles" % (rendered, checked))
+        finally:
+            if pool:
+                pool.shutdown()
+        elapsed = time.monotonic() - started
+        self.stdout.write("rendered %d of %d articles in %.2fs" % (rendered, checked, elapsed))
+        if skipped:
+            self.stdout.write("skipped %d articles edited while rendering" % skipped)
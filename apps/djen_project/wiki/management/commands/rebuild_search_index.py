@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from wiki import search
+from wiki.models import Article
+
+class Command(BaseCommand):
+    help = """
+            rebuilds the wiki full-text search index
+
+            Articles are streamed in primary key batches,
+            so memory use does not grow with the wiki.
+           """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Number of articles indexed per transaction (default: 500)')
+
+    def handle(self, **options):
+        started = time.monotonic()
+        search.clear_index()
+        articles = Article.objects.only('id', 'title', 'text').order_by('pk')
+        indexed = 0
+        last_pk = 0
+        while True:
+            batch = list(articles.filter(pk__gt=last_pk)[:options['batch_size']])
+            if not batch:
+                break
+            with transaction.atomic():
+                search.index_articles(batch)
+            indexed += len(batch)
+            last_pk = batch[-1].pk
+            if options['verbosity'] > 1:
+                self.stdout.write("indexed %d articles" % indexed)
+        elapsed = time.monotonic() - started
+        self.stdout.write("indexed %d articles in %.2fs using %s" % (
+            indexed, elapsed, "FTS5" if search.fts_available() else "the posting table"))
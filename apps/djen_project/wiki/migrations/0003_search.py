@@ -0,0 +1,89 @@
+# Generated by Django 2.0.13 on 2026-10-18 11:20
+
+import re
+from collections import Counter
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 500
+
+# Frozen copies of what wiki.search does, so later changes there don't
+# change this migration.
+
+FTS_TABLE = 'wiki_article_fts'
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+TITLE_WEIGHT = 5
+TERM_LENGTH = 64
+
+
+def postings_for(title, text):
+    counts = Counter(token.lower() for token in TOKEN_RE.findall(text) if len(token) > 1)
+    for token in TOKEN_RE.findall(title):
+        if len(token) > 1:
+            counts[token.lower()] += TITLE_WEIGHT
+    return counts
+
+
+def create_fts_table(schema_editor):
+    """Creates the contentless FTS5 table if the SQLite build supports it"""
+    if schema_editor.connection.vendor != 'sqlite':
+        return False
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if not cursor.fetchone()[0]:
+            return False
+    schema_editor.execute("CREATE VIRTUAL TABLE %s USING fts5(title, text, content='')" % FTS_TABLE)
+    # djen_common.search caches which tables exist per connection
+    schema_editor.connection.fts_tables = {}
+    return True
+
+
+def create_search_index(apps, schema_editor):
+    Article = apps.get_model('wiki', 'Article')
+    SearchPosting = apps.get_model('wiki', 'SearchPosting')
+    use_fts = create_fts_table(schema_editor)
+    last_pk = 0
+    while True:
+        batch = list(Article.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', 'title', 'text')[:BATCH_SIZE])
+        if not batch:
+            break
+        if use_fts:
+            with schema_editor.connection.cursor() as cursor:
+                cursor.executemany("INSERT INTO %s (rowid, title, text) VALUES (%%s, %%s, %%s)" % FTS_TABLE, batch)
+        else:
+            SearchPosting.objects.bulk_create(
+                SearchPosting(term=term[:TERM_LENGTH], article_id=pk, frequency=frequency)
+                for pk, title, text in batch
+                for term, frequency in postings_for(title, text).items()
+            )
+        last_pk = batch[-1][0]
+
+
+def drop_search_index(apps, schema_editor):
+    schema_editor.execute("DROP TABLE IF EXISTS %s" % FTS_TABLE)
+    schema_editor.connection.fts_tables = {}
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wiki', '0002_compress_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchPosting',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('frequency', models.PositiveIntegerField()),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='wiki.Article')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='searchposting',
+            unique_together={('term', 'article')},
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 2.0.13 on 2026-10-18 11:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+import djen_project.fields
+
+BATCH_SIZE = 500
+
+
+def snapshot_articles(apps, schema_editor):
+    Article = apps.get_model('wiki', 'Article')
+    Revision = apps.get_model('wiki', 'Revision')
+    last_pk = 0
+    while True:
+        batch = list(Article.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', 'text')[:BATCH_SIZE])
+        if not batch:
+            break
+        Revision.objects.bulk_create(
+            Revision(article_id=pk, number=1, is_snapshot=True, content=text) for pk, text in batch)
+        last_pk = batch[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wiki', '0003_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Revision',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField()),
+                ('is_snapshot', models.BooleanField(default=False)),
+                ('content', djen_project.fields.CompressedTextField()),
+                ('created_on', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-number'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='edit',
+            index=models.Index(fields=['article', '-edited_on'], name='edit_article_edited_on_idx'),
+        ),
+        migrations.AddField(
+            model_name='revision',
+            name='article',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='wiki.Article'),
+        ),
+        migrations.AddField(
+            model_name='edit',
+            name='revision',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='wiki.Revision'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='revision',
+            unique_together={('article', 'number')},
+        ),
+        migrations.RunPython(snapshot_articles, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 2.0.13 on 2026-10-18 11:23
+
+from django.db import migrations, models
+import djen_project.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wiki', '0004_revisions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='rendered_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='rendered_html',
+            field=djen_project.fields.CompressedTextField(blank=True, editable=False),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 2.0.13 on 2026-10-18 11:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wiki', '0005_rendered_html'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['is_published', 'created_on', 'id'], name='article_published_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 2.0.13 on 2026-10-18 14:10
+
+from django.db import migrations
+
+BATCH_SIZE = 500
+# wiki.search.FTS_TABLE when this migration was written
+FTS_TABLE = 'wiki_article_fts'
+
+
+def make_contentless(apps, schema_editor):
+    Article = apps.get_model('wiki', 'Article')
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        row = cursor.fetchone()
+    # no FTS5 here, or 0003 already created the contentless table
+    if row is None or "content=''" in row[0]:
+        return
+    schema_editor.execute("DROP TABLE %s" % FTS_TABLE)
+    schema_editor.execute("CREATE VIRTUAL TABLE %s USING fts5(title, text, content='')" % FTS_TABLE)
+    # djen_common.search caches which tables exist per connection
+    schema_editor.connection.fts_tables = {}
+    last_pk = 0
+    while True:
+        batch = list(Article.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', 'title', 'text')[:BATCH_SIZE])
+        if not batch:
+            break
+        with schema_editor.connection.cursor() as cursor:
+            cursor.executemany("INSERT INTO %s (rowid, title, text) VALUES (%%s, %%s, %%s)" % FTS_TABLE, batch)
+        last_pk = batch[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wiki', '0007_article_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(make_contentless, migrations.RunPython.noop),
+    ]
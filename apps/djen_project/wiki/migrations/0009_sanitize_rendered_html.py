@@ -0,0 +1,21 @@
+# Generated by Django 2.0.13 on 2026-10-18 14:30
+
+from django.db import migrations
+
+
+def forget_rendered_html(apps, schema_editor):
+    # HTML rendered before sanitizing may carry javascript: links; articles
+    # without a hash are re-rendered when viewed or by prerender_articles.
+    Article = apps.get_model('wiki', 'Article')
+    Article.objects.update(rendered_html='', rendered_hash='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wiki', '0008_contentless_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(forget_rendered_html, migrations.RunPython.noop),
+    ]
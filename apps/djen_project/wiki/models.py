@@ -1,13 +1,26 @@
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models import F
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
 from django.contrib.auth.models import User
 from django.template.defaultfilters import slugify
 
+from django.conf import settings
+
+from djen_project.fields import CompressedTextField
+from . import rendering, search
+from .revisions import make_delta, apply_delta
+
 
 # Create your models here.
 
+class EditConflict(Exception):
+    """Raised when an article changed after the version an edit started from"""
+
+
 class PublishedArticlesManager(models.Manager):
-    def get_query_set(self):
-        return super(PublishedArticlesManager, self).get_query_set().filter(is_published=True)
+    def get_queryset(self):
+        return super(PublishedArticlesManager, self).get_queryset().filter(is_published=True)
 
 
 class Article(models.Model):
@@ -15,20 +28,65 @@ class Article(models.Model):
 
     title = models.CharField(max_length=100)
     slug = models.SlugField(max_length=50, unique=True)
-    text = models.TextField(help_text="Formatted using ReST")
+    text = CompressedTextField(help_text="Formatted using ReST")
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     is_published = models.BooleanField(default=False, verbose_name="Publish?")
     created_on = models.DateTimeField(auto_now_add=True)
+    rendered_html = CompressedTextField(blank=True, editable=False)
+    rendered_hash = models.CharField(max_length=64, blank=True, editable=False)
+    version = models.PositiveIntegerField(default=1, editable=False)
     objects = models.Manager()
     published = PublishedArticlesManager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_published', 'created_on', 'id'], name='article_published_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
-    def save(self, *args, **kwargs):
+    def prerender(self):
+        """Re-renders ``rendered_html`` if ``text`` changed since last time"""
+        content_hash = rendering.content_hash(self.text)
+        if content_hash != self.rendered_hash:
+            self.rendered_html = rendering.render(self.text)
+            self.rendered_hash = content_hash
+            return True
+        return False
+
+    def _bump_version(self, expected_version=None):
+        """
+        Increments ``version`` in the database with a compare-and-swap on
+        ``expected_version`` if given. Runs first in the save transaction so
+        concurrent editors serialize on the row.
+        """
+        articles = Article.objects.filter(pk=self.pk)
+        if connection.features.has_select_for_update:
+            articles.select_for_update().values_list('pk').get()
+        if expected_version is not None:
+            if not articles.filter(version=expected_version).update(version=F('version') + 1):
+                raise EditConflict("%s changed after version %s" % (self, expected_version))
+            self.version = expected_version + 1
+        else:
+            articles.update(version=F('version') + 1)
+            self.version = articles.values_list('version', flat=True).get()
+
+    def save(self, *args, expected_version=None, **kwargs):
+        """
+        Saves the article. With ``expected_version``, raises ``EditConflict``
+        instead if someone else saved it since that version was read.
+        """
         if not self.slug:
             self.slug = slugify(self.title)
-        super(Article, self).save(*args, **kwargs)
+        self.prerender()
+        with transaction.atomic():
+            if not self._state.adding:
+                self._bump_version(expected_version)
+                search.unindex_articles([self.pk])
+            super(Article, self).save(*args, **kwargs)
+            search.index_article(self)
+            self.last_revision = Revision.objects.record(self)
 
     @models.permalink
     def get_absolute_url(self):
@@ -42,9 +100,13 @@ class Edit(models.Model):
     editor = models.ForeignKey(User, on_delete=models.CASCADE)
     edited_on = models.DateTimeField(auto_now_add=True)
     summary = models.CharField(max_length=100)
+    revision = models.OneToOneField('Revision', null=True, blank=True, on_delete=models.SET_NULL)
 
     class Meta:
         ordering = ['-edited_on']
+        indexes = [
+            models.Index(fields=['article', '-edited_on'], name='edit_article_edited_on_idx'),
+        ]
 
     def __str__(self):
         return "%s - %s - %s" % (self.summary, self.editor, self.edited_on)
@@ -52,3 +114,92 @@ class Edit(models.Model):
     @models.permalink
     def get_absolute_url(self):
         return ('wiki_edit_detail', self.id)
+
+
+class RevisionManager(models.Manager):
+    def snapshot_interval(self):
+        return getattr(settings, 'WIKI_REVISION_SNAPSHOT_INTERVAL', 20)
+
+    def text_of(self, article, number):
+        """
+        Rebuilds revision ``number`` of ``article`` from the closest snapshot
+        at or before it; at most ``snapshot_interval() - 1`` deltas apply.
+        """
+        revisions = self.filter(article=article, number__lte=number)
+        snapshot = revisions.filter(is_snapshot=True).order_by('-number').values_list('number', 'content')[:1].get()
+        text = snapshot[1]
+        deltas = revisions.filter(number__gt=snapshot[0]).order_by('number').values_list('content', flat=True)
+        for delta in deltas:
+            text = apply_delta(text, delta)
+        return text
+
+    def record(self, article):
+        """
+        Stores ``article.text`` as a new revision, unless it is unchanged
+        since the last one. Returns the new revision or ``None``.
+        """
+        last = self.filter(article=article).order_by('-number').values_list('number', flat=True).first()
+        if last is None:
+            return self.create(article=article, number=1, is_snapshot=True, content=article.text)
+        previous = self.text_of(article, last)
+        if previous == article.text:
+            return None
+        number = last + 1
+        if (number - 1) % self.snapshot_interval() == 0:
+            return self.create(article=article, number=number, is_snapshot=True, content=article.text)
+        return self.create(article=article, number=number, content=make_delta(previous, article.text))
+
+
+class Revision(models.Model):
+    """
+    Text of an article at some point in time. Every
+    ``WIKI_REVISION_SNAPSHOT_INTERVAL``-th revision holds the full text;
+    the ones in between hold a delta against the revision before them.
+    """
+
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='revisions')
+    number = models.PositiveIntegerField()
+    is_snapshot = models.BooleanField(default=False)
+    content = CompressedTextField()
+    created_on = models.DateTimeField(auto_now_add=True)
+
+    objects = RevisionManager()
+
+    class Meta:
+        unique_together = ('article', 'number')
+        ordering = ['-number']
+
+    def __str__(self):
+        return "%s r%s" % (self.article_id, self.number)
+
+    @property
+    def text(self):
+        return Revision.objects.text_of(self.article_id, self.number)
+
+    @models.permalink
+    def get_absolute_url(self):
+        return ('wiki_article_revision', (), {'slug': self.article.slug, 'number': self.number})
+
+
+class SearchPosting(models.Model):
+    """
+    Inverted index entry: ``term`` occurs ``frequency`` times in ``article``.
+    Only used when the database has no full-text search engine.
+    """
+
+    TERM_LENGTH = 64
+
+    term = models.CharField(max_length=TERM_LENGTH)
+    article = models.ForeignKey(Article, on_delete=models.CASCADE)
+    frequency = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('term', 'article')
+
+    def __str__(self):
+        return "%s: %s (%s)" % (self.term, self.article_id, self.frequency)
+
+
+@receiver(pre_delete, sender=Article)
+def unindex_article(sender, instance, **kwargs):
+    search.unindex_articles([instance.pk])
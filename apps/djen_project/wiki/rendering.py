@@ -0,0 +1,125 @@
+"""
+Renders article text (ReST) to HTML.
+
+Uses docutils when it is installed; without it text is shown as escaped
+paragraphs. Rendering is slow compared to a row fetch, so articles keep
+their rendered HTML next to the text, see ``Article.prerender``.
+
+The stored HTML is shown unescaped, so docutils output is passed through
+``sanitize`` first: only the tags and attributes docutils produces for
+ordinary markup survive, and links may only use ``SAFE_SCHEMES``.
+"""
+
+import hashlib
+import re
+from html import escape
+from html.parser import HTMLParser
+
+from django.utils.html import linebreaks
+
+try:
+    from docutils.core import publish_parts
+except ImportError:
+    publish_parts = None
+
+# Changing renderer changes every hash, so stored HTML gets re-rendered.
+RENDERER = 'docutils-sanitized' if publish_parts is not None else 'plain'
+
+DOCUTILS_SETTINGS = {
+    'raw_enabled': False,
+    'file_insertion_enabled': False,
+    'report_level': 5,
+    'halt_level': 5,
+    '_disable_config': True,
+}
+
+
+ALLOWED_TAGS = {
+    'a', 'abbr', 'acronym', 'big', 'blockquote', 'br', 'caption', 'cite', 'code', 'col', 'colgroup', 'dd',
+    'div', 'dl', 'dt', 'em', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'img', 'kbd', 'li', 'ol', 'p', 'pre',
+    'small', 'span', 'strong', 'sub', 'sup', 'table', 'tbody', 'td', 'tfoot', 'th', 'thead', 'tr', 'tt', 'ul',
+}
+VOID_TAGS = {'br', 'col', 'hr', 'img'}
+# Dropped along with everything inside them
+SKIPPED_TAGS = {'script', 'style'}
+ALLOWED_ATTRIBUTES = {
+    'align', 'alt', 'border', 'class', 'colspan', 'height', 'href', 'id', 'name', 'rowspan', 'src', 'start',
+    'title', 'valign', 'width',
+}
+URL_ATTRIBUTES = {'href', 'src'}
+SAFE_SCHEMES = {'http', 'https', 'ftp', 'mailto'}
+
+SCHEME_RE = re.compile(r'^([^/?#]*?):')
+# Browsers ignore these inside a scheme, as in "java\tscript:"
+IGNORED_URL_CHARS_RE = re.compile(r'[\x00-\x20\x7f]+')
+
+
+def safe_url(url):
+    match = SCHEME_RE.match(IGNORED_URL_CHARS_RE.sub('', url))
+    return match is None or match.group(1).lower() in SAFE_SCHEMES
+
+
+class Sanitizer(HTMLParser):
+    def __init__(self):
+        super(Sanitizer, self).__init__(convert_charrefs=True)
+        self.output = []
+        self.open_tags = []
+        self.skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self.skipping += 1
+        if self.skipping or tag not in ALLOWED_TAGS:
+            return
+        kept = ''.join(' %s="%s"' % (name, escape(value or '')) for name, value in attrs
+                       if name in ALLOWED_ATTRIBUTES and (name not in URL_ATTRIBUTES or safe_url(value or '')))
+        self.output.append('<%s%s>' % (tag, kept))
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS:
+            self.skipping = max(self.skipping - 1, 0)
+            return
+        if self.skipping or tag not in self.open_tags:
+            return
+        # close anything left open inside it, so the markup stays balanced
+        while True:
+            open_tag = self.open_tags.pop()
+            self.output.append('</%s>' % open_tag)
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if not self.skipping:
+            self.output.append(escape(data, quote=False))
+
+    def close(self):
+        super(Sanitizer, self).close()
+        self.output.extend('</%s>' % tag for tag in reversed(self.open_tags))
+        self.open_tags = []
+        return ''.join(self.output)
+
+
+def sanitize(html):
+    """Keeps the allowlisted tags and attributes of ``html``, escaping the rest"""
+    sanitizer = Sanitizer()
+    sanitizer.feed(html)
+    return sanitizer.close()
+
+
+def content_hash(text):
+    return hashlib.sha256(('%s:%s' % (RENDERER, text)).encode('utf-8')).hexdigest()
+
+
+def render(text):
+    if publish_parts is None:
+        return linebreaks(text, autoescape=True)
+    parts = publish_parts(source=text, writer_name='html', settings_overrides=DOCUTILS_SETTINGS)
+    return sanitize(parts['fragment'])
+
+
+def render_with_hash(item):
+    """``(pk, text) -> (pk, hash, html)``, for process pools"""
+    pk, text = item
+    return pk, content_hash(text), render(text)
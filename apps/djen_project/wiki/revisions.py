@@ -0,0 +1,37 @@
+"""
+Line-based deltas between article revisions.
+
+A delta is a JSON list of instructions applied to the previous revision's
+lines: ``[start, end]`` copies ``lines[start:end]`` and a string inserts
+new text. Anything not copied is deleted.
+"""
+
+import difflib
+import json
+
+
+def _lines(text):
+    return text.splitlines(True)
+
+
+def make_delta(old, new):
+    old_lines, new_lines = _lines(old), _lines(new)
+    delta = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            delta.append([i1, i2])
+        elif tag in ('replace', 'insert'):
+            delta.append(''.join(new_lines[j1:j2]))
+    return json.dumps(delta, separators=(',', ':'))
+
+
+def apply_delta(old, delta):
+    old_lines = _lines(old)
+    parts = []
+    for instruction in json.loads(delta):
+        if isinstance(instruction, list):
+            parts.extend(old_lines[instruction[0]:instruction[1]])
+        else:
+            parts.append(instruction)
+    return ''.join(parts)
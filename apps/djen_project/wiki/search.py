@@ -0,0 +1,102 @@
+"""
+Full-text search over wiki articles.
+
+Uses an SQLite FTS5 table when the database has one (see migration
+``0003_search``) and falls back to an inverted index of ``SearchPosting``
+rows otherwise; the shared parts live in ``djen_common.search``. Either way
+the index is updated from ``Article.save`` and article deletion, and can be
+rebuilt with ``manage.py rebuild_search_index``.
+
+The FTS5 table is contentless (``content=''``): it holds only the index,
+not a second copy of every article. Removing a row from it needs the exact
+title and text that were indexed, so they are read back from the article
+table before an article is changed or deleted, and snippets are cut from
+the article text rather than by FTS5.
+"""
+
+from djen_common import search as common
+from djen_common.search import postings_for
+
+FTS_TABLE = 'wiki_article_fts'
+COLUMNS = ('title', 'text')
+
+
+class SearchResult(object):
+    def __init__(self, article, score, snippet):
+        self.article = article
+        self.score = score
+        self.snippet = snippet
+
+
+def fts_available():
+    return common.fts_available(FTS_TABLE)
+
+
+def create_fts_table(schema_editor):
+    """Creates the contentless FTS5 table if the SQLite build supports it"""
+    return common.create_fts_table(schema_editor, FTS_TABLE, COLUMNS, contentless=True)
+
+
+def drop_fts_table(schema_editor):
+    common.drop_fts_table(schema_editor, FTS_TABLE)
+
+
+def index_articles(articles):
+    """
+    Indexes ``articles``, which need ``pk``, ``title`` and ``text`` and must
+    not be in the index yet (see ``unindex_articles``).
+    """
+    from .models import SearchPosting
+
+    documents = [(article.pk, article.title, article.text) for article in articles]
+    if fts_available():
+        common.insert_fts_rows(FTS_TABLE, COLUMNS, documents)
+    else:
+        common.create_postings(SearchPosting, 'article', documents)
+
+
+def index_article(article):
+    index_articles([article])
+
+
+def unindex_articles(pks):
+    """
+    Removes articles from the index. Call it while their rows still hold the
+    indexed title and text: before they are saved or deleted.
+    """
+    from .models import Article, SearchPosting
+
+    if not pks:
+        return
+    if fts_available():
+        common.delete_contentless_rows(FTS_TABLE, COLUMNS,
+                                       Article.objects.filter(pk__in=pks).values_list('pk', 'title', 'text'))
+    else:
+        SearchPosting.objects.filter(article__in=pks).delete()
+
+
+def clear_index():
+    from .models import SearchPosting
+
+    if fts_available():
+        common.clear_fts_table(FTS_TABLE, contentless=True)
+    SearchPosting.objects.all().delete()
+
+
+def search(query, limit=20, offset=0):
+    """
+    Returns up to ``limit`` ``SearchResult``s for articles containing every
+    word of ``query``, best matches first.
+    """
+    from .models import Article, SearchPosting
+
+    terms = common.query_terms(query)
+    if not terms:
+        return []
+    if fts_available():
+        matches = common.search_fts(FTS_TABLE, terms, limit, offset)
+    else:
+        matches = common.search_postings(SearchPosting, 'article', terms, limit, offset)
+    articles = Article.objects.only('title', 'slug', 'text').in_bulk([pk for pk, _ in matches])
+    return [SearchResult(articles[pk], score, common.snippet(articles[pk].text, terms))
+            for pk, score in matches if pk in articles]
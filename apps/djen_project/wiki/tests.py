@@ -1,3 +1,319 @@
-from django.test import TestCase
+import threading
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from . import rendering, search
+from .models import Article, Edit, EditConflict, Revision, SearchPosting
+
+
+class CompressedTextTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('editor', password='secret')
+
+    def raw_text(self, article):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT text FROM wiki_article WHERE id = %s", [article.pk])
+            return cursor.fetchone()[0]
+
+    def test_large_text_is_stored_compressed(self):
+        text = "Django is a high-level Python web framework. " * 200
+        article = Article.objects.create(title="Django", text=text, author=self.user)
+        self.assertLess(len(self.raw_text(article)), len(text) // 10)
+        self.assertEqual(Article.objects.get(pk=article.pk).text, text)
+
+    def test_short_and_legacy_text_reads_back(self):
+        article = Article.objects.create(title="Short", text="tiny", author=self.user)
+        self.assertEqual(bytes(self.raw_text(article)), b"tiny")
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE wiki_article SET text = %s WHERE id = %s", ["legacy text", article.pk])
+        self.assertEqual(Article.objects.get(pk=article.pk).text, "legacy text")
+
+
+class ArticleListTest(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('author', password='secret')
+        Article.objects.bulk_create(
+            Article(title="article %s" % i, slug="article-%s" % i, text="text", author=user,
+                    is_published=i % 2 == 0)
+            for i in range(120))
+
+    def test_published_manager_filters(self):
+        self.assertEqual(Article.published.count(), 60)
+        self.assertTrue(all(article.is_published for article in Article.published.all()))
+
+    def test_listing_pages_published_articles(self):
+        url = reverse('wiki_article_index')
+        with self.assertNumQueries(1):
+            first = self.client.get(url).context['page_obj']
+        second = self.client.get(url, {'cursor': first.next_cursor}).context['page_obj']
+        seen = [article.title for article in first] + [article.title for article in second]
+        self.assertEqual(seen, ["article %s" % i for i in range(118, -1, -2)])
+        self.assertFalse(second.has_next())
+
+
+class SearchTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('editor', password='secret')
+        Article.objects.create(title="Python", author=self.user,
+                               text="Python is a programming language. Django is written in Python.")
+        Article.objects.create(title="Django", author=self.user,
+                               text="Django is a web framework for perfectionists with deadlines.")
+        Article.objects.create(title="Cooking", author=self.user, text="How to boil <an> egg.")
+
+    def check_search(self):
+        results = search.search("django")
+        self.assertEqual([r.article.title for r in results], ["Django", "Python"])
+        self.assertIn("<b>Django</b>", results[0].snippet)
+        self.assertEqual([r.article.title for r in search.search("python django")], ["Python"])
+        self.assertEqual(search.search("nothing matches this"), [])
+        self.assertIn("&lt;an&gt;", search.search("egg")[0].snippet)
+
+        article = Article.objects.get(title="Cooking")
+        article.text = "Django recipes"
+        article.save()
+        self.assertEqual(len(search.search("django")), 3)
+        article.delete()
+        self.assertEqual(len(search.search("django")), 2)
+
+    def test_fts_search(self):
+        self.assertTrue(search.fts_available())
+        self.check_search()
+
+    def test_fts_table_is_contentless_and_probed_once(self):
+        search.fts_available()
+        with self.assertNumQueries(0):
+            self.assertTrue(search.fts_available())
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT sql FROM sqlite_master WHERE name = %s", [search.FTS_TABLE])
+            self.assertIn("content=''", cursor.fetchone()[0])
+            call_command('rebuild_search_index', stdout=StringIO())
+            cursor.execute("INSERT INTO {table} ({table}, rank) VALUES ('integrity-check', 0)".format(
+                table=search.FTS_TABLE))
+        self.assertEqual(len(search.search("django")), 2)
+
+    def test_posting_list_search(self):
+        with mock.patch.object(search, 'fts_available', return_value=False):
+            call_command('rebuild_search_index', stdout=StringIO())
+            self.assertEqual(SearchPosting.objects.filter(term='django').count(), 2)
+            self.check_search()
+
+    def test_search_view(self):
+        response = self.client.get(reverse('wiki_article_search'), {'q': "framework"})
+        self.assertContains(response, "<b>framework</b>")
+        self.assertEqual(len(response.context['results']), 1)
+
+
+class RevisionTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('editor', password='secret')
+        self.article = Article.objects.create(title="History", text="line 1\n", author=self.user)
+
+    def test_every_revision_can_be_rebuilt(self):
+        texts = ["line 1\n"]
+        for i in range(2, 46):
+            self.article.text = self.article.text + "line %s\n" % i
+            if i % 3 == 0:
+                self.article.text = self.article.text.replace("line %s\n" % (i - 2), "")
+            self.article.save()
+            texts.append(self.article.text)
+        revisions = Revision.objects.filter(article=self.article)
+        self.assertEqual(revisions.count(), 45)
+        self.assertEqual(list(revisions.filter(is_snapshot=True).values_list('number', flat=True).order_by('number')), [1, 21, 41])
+        for number, text in enumerate(texts, 1):
+            self.assertEqual(Revision.objects.text_of(self.article, number), text)
+
+    def test_unchanged_text_adds_no_revision(self):
+        self.article.title = "Renamed"
+        self.article.save()
+        self.assertIsNone(self.article.last_revision)
+        self.assertEqual(self.article.revisions.count(), 1)
+
+    def test_edit_article_records_revision_and_history_pages(self):
+        self.client.force_login(self.user)
+        url = reverse('wiki_article_edit', args=[self.article.slug])
+        for i in range(60):
+            self.client.post(url, {'title': "History", 'text': "edit %s" % i, 'summary': "edit %s" % i,
+                                   'version': self.article.version + i})
+        self.assertEqual(Edit.objects.filter(article=self.article).count(), 60)
+        edit = Edit.objects.filter(article=self.article).first()
+        self.assertEqual(edit.revision.text, "edit 59")
+
+        history = reverse('wiki_article_history', args=[self.article.slug])
+        # article with author, edit count, one page of edits with editors
+        with self.assertNumQueries(3):
+            response = self.client.get(history)
+        self.assertEqual(len(response.context['object_list']), 50)
+        self.assertNotContains(response, "New article created")
+        self.assertContains(self.client.get(history, {'page': 2}), "New article created")
+
+        response = self.client.get(reverse('wiki_article_revision', args=[self.article.slug, 31]))
+        self.assertContains(response, "edit 29")
+
+
+class RenderingTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('editor', password='secret')
+
+    def test_html_is_rendered_on_save(self):
+        article = Article.objects.create(title="Rest", text="Some *emphasis* <script>", author=self.user)
+        self.assertEqual(article.rendered_html, rendering.render(article.text))
+        self.assertNotIn("<script>", article.rendered_html)
+        response = self.client.get(reverse('wiki_article_detail', args=[article.slug]))
+        self.assertContains(response, article.rendered_html, html=True)
+
+    @skipUnless(rendering.publish_parts, "docutils is not installed")
+    def test_unsafe_links_are_removed(self):
+        article = Article.objects.create(
+            title="Links", author=self.user,
+            text="`click <javascript:alert(1)>`_ `tab <java\tscript:alert(1)>`_ `data <data:text/html,x>`_ "
+                 "`safe <https://example.com/>`_")
+        self.assertNotIn("javascript:", article.rendered_html)
+        self.assertNotIn("data:", article.rendered_html)
+        self.assertIn('href="https://example.com/"', article.rendered_html)
+        response = self.client.get(reverse('wiki_article_detail', args=[article.slug]))
+        self.assertNotContains(response, "alert(1)")
+
+    def test_plain_rendering_escapes_markup(self):
+        # what articles get without docutils
+        text = '<script>alert(1)</script> <a href="javascript:alert(1)">click</a>'
+        with mock.patch.object(rendering, 'publish_parts', None):
+            html = rendering.render(text)
+        self.assertNotIn("<script>", html)
+        self.assertNotIn("<a ", html)
+        self.assertIn("&lt;script&gt;", html)
+
+    def test_sanitize_keeps_allowed_markup_only(self):
+        self.assertEqual(rendering.sanitize('<p onclick="x()">a <em>b</em><script>c()</script></p><div>'),
+                         '<p>a <em>b</em></p><div></div>')
+
+    def test_prerender_command_fills_in_missing_html(self):
+        article = Article.objects.create(title="Rest", text="Some text", author=self.user)
+        Article.objects.filter(pk=article.pk).update(rendered_html='', rendered_hash='')
+        out = StringIO()
+        call_command('prerender_articles', workers=1, stdout=out)
+        self.assertIn("rendered 1 of 1 articles", out.getvalue())
+        article.refresh_from_db()
+        self.assertEqual(article.rendered_html, rendering.render("Some text"))
+        call_command('prerender_articles', workers=1, stdout=out)
+        self.assertIn("rendered 0 of 1 articles", out.getvalue())
+
+    def test_prerender_command_keeps_html_of_articles_edited_meanwhile(self):
+        article = Article.objects.create(title="Rest", text="Old text", author=self.user)
+        Article.objects.filter(pk=article.pk).update(rendered_html='', rendered_hash='')
+        render_with_hash = rendering.render_with_hash
+
+        def edit_while_rendering(item):
+            edited = Article.objects.get(pk=article.pk)
+            edited.text = "New text"
+            edited.save()
+            return render_with_hash(item)
+
+        out = StringIO()
+        with mock.patch.object(rendering, 'render_with_hash', edit_while_rendering):
+            call_command('prerender_articles', workers=1, stdout=out)
+        self.assertIn("rendered 0 of 1 articles", out.getvalue())
+        self.assertIn("skipped 1 articles edited while rendering", out.getvalue())
+        article.refresh_from_db()
+        self.assertEqual(article.rendered_html, rendering.render("New text"))
+
+    def test_detail_renders_legacy_articles_once(self):
+        article = Article.objects.create(title="Rest", text="Some text", author=self.user)
+        Article.objects.filter(pk=article.pk).update(rendered_html='', rendered_hash='')
+        url = reverse('wiki_article_detail', args=[article.slug])
+        self.assertContains(self.client.get(url), "Some text")
+        with self.assertNumQueries(1):
+            self.assertContains(self.client.get(url), "Some text")
+
+    def test_detail_renders_out_of_date_html(self):
+        article = Article.objects.create(title="Rest", text="Some text", author=self.user)
+        Article.objects.filter(pk=article.pk).update(text="Other text")
+        url = reverse('wiki_article_detail', args=[article.slug])
+        self.assertContains(self.client.get(url), "Other text")
+        article.refresh_from_db()
+        self.assertEqual(article.rendered_hash, rendering.content_hash("Other text"))
+
+
+class EditConflictTest(TransactionTestCase):
+    EDITORS = 8
+
+    def setUp(self):
+        self.users = [User.objects.create_user('editor%s' % i, password='secret') for i in range(self.EDITORS)]
+        self.article = Article.objects.create(title="Busy", text="start\n", author=self.users[0])
+        self.url = reverse('wiki_article_edit', args=[self.article.slug])
+
+    def edit(self, client, version, i):
+        return client.post(self.url, {'title': "Busy", 'text': "start\neditor %s\n" % i,
+                                      'summary': "edit %s" % i, 'version': version})
+
+    def run_editors(self, target):
+        threads = [threading.Thread(target=target, args=(i,)) for i in range(self.EDITORS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_stale_save_raises(self):
+        stale = Article.objects.get(pk=self.article.pk)
+        self.article.text = "newer\n"
+        self.article.save(expected_version=1)
+        stale.text = "older\n"
+        with self.assertRaises(EditConflict):
+            stale.save(expected_version=1)
+        self.assertEqual(Article.objects.get(pk=self.article.pk).text, "newer\n")
+
+    def test_conflict_returns_diff(self):
+        client = Client()
+        client.force_login(self.users[0])
+        self.assertEqual(self.edit(client, 1, 0).status_code, 302)
+        response = self.edit(client, 1, 1)
+        self.assertEqual(response.status_code, 409)
+        self.assertContains(response, "-editor 0", status_code=409)
+        self.assertContains(response, "+editor 1", status_code=409)
+        self.assertEqual(response.context['form']['version'].value(), 2)
+
+    def test_edit_without_version_is_rejected(self):
+        client = Client()
+        client.force_login(self.users[0])
+        response = client.post(self.url, {'title': "Busy", 'text': "blind overwrite\n", 'summary': "no version"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].has_error('version', 'required'))
+        self.assertEqual(Article.objects.get(pk=self.article.pk).text, "start\n")
+
+    def test_parallel_editors_on_the_same_version(self):
+        statuses = []
+
+        def editor(i):
+            client = Client()
+            client.force_login(self.users[i])
+            statuses.append(self.edit(client, 1, i).status_code)
+            connections.close_all()
+
+        self.run_editors(editor)
+        self.assertEqual(sorted(statuses), [302] + [409] * (self.EDITORS - 1))
+        article = Article.objects.get(pk=self.article.pk)
+        self.assertEqual(article.version, 2)
+        self.assertEqual(Edit.objects.filter(article=article).count(), 1)
+
+    def test_parallel_editors_retrying_on_conflict(self):
+        def editor(i):
+            client = Client()
+            client.force_login(self.users[i])
+            version = 1
+            while True:
+                response = self.edit(client, version, i)
+                if response.status_code == 302:
+                    break
+                version = response.context['form']['version'].value()
+            connections.close_all()
+
+        self.run_editors(editor)
+        article = Article.objects.get(pk=self.article.pk)
+        self.assertEqual(article.version, 1 + self.EDITORS)
+        self.assertEqual(Edit.objects.filter(article=article).count(), self.EDITORS)
+        self.assertEqual(article.revisions.count(), 1 + self.EDITORS)
@@ -1,10 +1,12 @@
 from django.urls import path, include
-from .views import add_article, edit_article, article_history, ArticleList, ArticleDetail
+from .views import add_article, edit_article, article_history, article_revision, search_articles, ArticleList, ArticleDetail
 
 urlpatterns = [
     path('', ArticleList.as_view(), name='wiki_article_index'),
     path('article/<str:slug>',ArticleDetail.as_view(),name='wiki_article_detail'),
     path('history/<str:slug>', article_history, name='wiki_article_history'),
+    path('history/<str:slug>/<int:number>', article_revision, name='wiki_article_revision'),
     path('add/article', add_article, name='wiki_article_add'),
     path('edit/article/<str:slug>', edit_article, name='wiki_article_edit'),
+    path('search/', search_articles, name='wiki_article_search'),
 ]
\ No newline at end of file
@@ -1,14 +1,23 @@
+import difflib
+
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.core.paginator import Paginator
+from django.db import transaction
 from django.shortcuts import redirect, render, get_object_or_404
 from django.views.generic.list import ListView
 from django.views.generic.detail import DetailView
 from django.http import HttpResponse
 
+from djen_project.pagination import CursorPaginationMixin
 
-from .models import Article, Edit
+from . import search
+from .models import Article, Edit, EditConflict, Revision
 from .forms import ArticleForm, EditForm
 
+SEARCH_RESULTS_PER_PAGE = 20
+EDITS_PER_PAGE = 50
+
 @login_required
 def add_article(request):
     form = ArticleForm(request.POST or None)
@@ -26,28 +35,87 @@ def edit_article(request, slug):
     article = get_object_or_404(Article, slug=slug)
     form = ArticleForm(request.POST or None, instance=article)
     edit_form = EditForm(request.POST or None)
-    if form.is_valid():
-        article = form.save()
-        if edit_form.is_valid():
-            edit = edit_form.save(commit=False)
-            edit.article = article
-            edit.editor = request.user
-            edit.save()
-            msg = "Article updated successfully"
-            messages.success(request, msg, fail_silently=True)
-            return redirect(article)
+    if form.is_valid() and edit_form.is_valid():
+        try:
+            with transaction.atomic():
+                article = form.save(commit=False)
+                article.save(expected_version=form.cleaned_data['version'])
+                edit = edit_form.save(commit=False)
+                edit.article = article
+                edit.editor = request.user
+                edit.revision = article.last_revision
+                edit.save()
+        except EditConflict:
+            return edit_conflict(request, article.pk, form, edit_form)
+        msg = "Article updated successfully"
+        messages.success(request, msg, fail_silently=True)
+        return redirect(article)
     return render(request, 'wiki/article_form.html',{'form': form, 'edit_form': edit_form, 'article': article})
 
+def edit_conflict(request, pk, form, edit_form):
+    """
+    Someone saved the article while this edit was open: show how their text
+    differs from the submitted one, with the form rebased on their version
+    so submitting again overwrites it deliberately.
+    """
+    current = Article.objects.get(pk=pk)
+    data = request.POST.copy()
+    data['version'] = current.version
+    diff = difflib.unified_diff(current.text.splitlines(), form.cleaned_data['text'].splitlines(),
+                                'current version', 'your version', lineterm='')
+    return render(request, 'wiki/article_form.html', {
+        'form': ArticleForm(data, instance=current),
+        'edit_form': edit_form,
+        'article': current,
+        'conflict_diff': '\n'.join(diff),
+    }, status=409)
+
 def article_history(request, slug):
-    article = get_object_or_404(Article, slug=slug)
-    queryset = Edit.objects.filter(article__slug=slug)
-    return  render(request, 'wiki/edit_list.html',{'article': article, 'queryset': queryset})
+    article = get_object_or_404(Article.objects.select_related('author').only('title', 'slug', 'created_on', 'author__username'), slug=slug)
+    queryset = (Edit.objects.filter(article=article)
+                .select_related('editor', 'revision')
+                .only('edited_on', 'summary', 'editor__username', 'revision__number'))
+    page = Paginator(queryset, EDITS_PER_PAGE).get_page(request.GET.get('page'))
+    return  render(request, 'wiki/edit_list.html',{'article': article, 'page_obj': page, 'object_list': page.object_list})
+
+def article_revision(request, slug, number):
+    revision = get_object_or_404(Revision.objects.select_related('article').defer('content', 'article__text'),
+                                 article__slug=slug, number=number)
+    return render(request, 'wiki/revision_detail.html', {'article': revision.article, 'revision': revision})
 
-class ArticleList(ListView):
+def search_articles(request):
+    query = request.GET.get('q', '')
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+    # fetch one extra result to know whether there is a next page
+    results = search.search(query, limit=SEARCH_RESULTS_PER_PAGE + 1,
+                            offset=(page - 1) * SEARCH_RESULTS_PER_PAGE)
+    return render(request, 'wiki/search_results.html', {
+        'query': query,
+        'results': results[:SEARCH_RESULTS_PER_PAGE],
+        'page': page,
+        'has_next': len(results) > SEARCH_RESULTS_PER_PAGE,
+    })
+
+class ArticleList(CursorPaginationMixin, ListView):
     template_name = "wiki/article_list.html"
+    paginate_by = 50
+    cursor_ordering = ('-created_on', '-id')
     def get_queryset(self):
-        return Article.objects.all()
+        return Article.published.only('id', 'slug', 'title', 'created_on')
 
 class ArticleDetail(DetailView):
 	model = Article
-	template_name = "wiki/article_detail.html"
\ No newline at end of file
+	template_name = "wiki/article_detail.html"
+
+	def get_object(self, queryset=None):
+		article = super(ArticleDetail, self).get_object(queryset)
+		# The stored HTML is missing (saved before pre-rendering existed) or
+		# out of date (text updated in bulk, or the renderer changed).
+		if article.prerender():
+			# an edit saved meanwhile has rendered its own text
+			Article.objects.filter(pk=article.pk, version=article.version).update(
+				rendered_html=article.rendered_html, rendered_hash=article.rendered_hash)
+		return article
\ No newline at end of file
@@ -0,0 +1,40 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from . import hashing
+
+
+class EmailBackend(ModelBackend):
+    """
+    Authenticates with ``email`` and ``password`` in one indexed lookup on
+    the (lowercased, unique) email column. Hashing goes through
+    ``core.hashing``, so it may raise ``HashingBusy``.
+    """
+
+    def authenticate(self, request, email=None, password=None, **kwargs):
+        if email is None or password is None:
+            return None
+        UserModel = get_user_model()
+        try:
+            user = UserModel._default_manager.get(email=UserModel.normalize_email_address(email))
+        except UserModel.DoesNotExist:
+            # Hash anyway so unknown addresses take as long as wrong passwords
+            hashing.make_password(password)
+            return None
+        is_correct, must_update = hashing.check_password(password, user.password)
+        if not (is_correct and self.user_can_authenticate(user)):
+            return None
+        if must_update:
+            user.password = hashing.make_password(password)
+            user.save(update_fields=['password'])
+        return user
+
+
+class UsernameBackend(ModelBackend):
+    """
+    ``ModelBackend`` for username logins (the admin). Its signature doesn't
+    take ``email``, so email logins don't pay for a second lookup and hash.
+    """
+
+    def authenticate(self, request, username=None, password=None):
+        return super(UsernameBackend, self).authenticate(request, username=username, password=password)
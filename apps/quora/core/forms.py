@@ -9,6 +9,9 @@ class RegisterForm(forms.ModelForm):
         model = User
         fields = [ 'username',  'email', 'first_name', 'last_name', 'password']
 
+    def clean_email(self):
+        return User.normalize_email_address(self.cleaned_data['email'])
+
 
 class LoginForm(forms.ModelForm):
     password = forms.CharField(widget=forms.PasswordInput())
@@ -0,0 +1,96 @@
+"""
+Password hashing off the request thread.
+
+PBKDF2 runs in a bounded thread pool (``hashlib`` releases the GIL while
+hashing, so threads use every core). At most ``PASSWORD_HASHING_WORKERS``
+hashes run at once and ``PASSWORD_HASHING_QUEUE_DEPTH`` more may wait;
+beyond that ``HashingBusy`` is raised straight away, which views turn into a
+503, instead of tying up every worker process behind a signup burst.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class HashingBusy(Exception):
+    pass
+
+
+class TunablePBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """
+    ``PBKDF2PasswordHasher`` whose cost comes from the
+    ``PASSWORD_HASHING_ITERATIONS`` setting. Passwords hashed with another
+    count are rehashed on the next successful login.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_HASHING_ITERATIONS', hashers.PBKDF2PasswordHasher.iterations)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_workers():
+    return getattr(settings, 'PASSWORD_HASHING_WORKERS', None) or os.cpu_count() or 1
+
+
+def get_queue_depth():
+    return getattr(settings, 'PASSWORD_HASHING_QUEUE_DEPTH', 16)
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = get_workers()
+            _pool = (ThreadPoolExecutor(max_workers=workers, thread_name_prefix='hashing'),
+                     threading.BoundedSemaphore(workers + get_queue_depth()))
+        return _pool
+
+
+def shutdown():
+    """Stops the pool; the next hash starts one sized from current settings"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool[0].shutdown()
+            _pool = None
+
+
+def run(func, *args):
+    """Runs ``func(*args)`` in the pool and waits for the result"""
+    executor, slots = _get_pool()
+    if not slots.acquire(blocking=False):
+        raise HashingBusy("password hashing queue is full")
+    try:
+        future = executor.submit(func, *args)
+    except BaseException:
+        slots.release()
+        raise
+    future.add_done_callback(lambda future: slots.release())
+    return future.result()
+
+
+def make_password(password):
+    return run(hashers.make_password, password)
+
+
+def check_password(password, encoded):
+    """
+    Returns ``(is_correct, must_update)``, where ``must_update`` means the
+    password should be rehashed with the current settings.
+    """
+    if password is None or not hashers.is_password_usable(encoded):
+        return False, False
+    is_correct = run(hashers.check_password, password, encoded)
+    if not is_correct:
+        return False, False
+    preferred = hashers.get_hasher()
+    hasher = hashers.identify_hasher(encoded)
+    return True, hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
@@ -0,0 +1,61 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from core import hashing
+
+class Command(BaseCommand):
+    help = """
+            measures password hashes per second, on one
+            thread and through the hashing pool, to help
+            pick PASSWORD_HASHING_ITERATIONS and
+            PASSWORD_HASHING_WORKERS for this machine
+           """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=3.0,
+                            help='How long to run each measurement (default: 3)')
+        parser.add_argument('--iterations', type=int, default=None,
+                            help='PBKDF2 iterations to measure (default: PASSWORD_HASHING_ITERATIONS)')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Pool size to measure (default: PASSWORD_HASHING_WORKERS)')
+
+    def measure(self, seconds, concurrency):
+        """Hashes from ``concurrency`` threads for ``seconds``; returns hashes/sec"""
+        deadline = time.monotonic() + seconds
+
+        def client():
+            count = 0
+            while time.monotonic() < deadline:
+                hashing.make_password('benchmark password')
+                count += 1
+            return count
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=concurrency) as clients:
+            total = sum(clients.map(lambda _: client(), range(concurrency)))
+        return total / (time.monotonic() - started)
+
+    def handle(self, **options):
+        iterations = options['iterations'] or getattr(settings, 'PASSWORD_HASHING_ITERATIONS', None)
+        workers = options['workers'] or hashing.get_workers()
+        overrides = {'PASSWORD_HASHING_WORKERS': workers, 'PASSWORD_HASHING_QUEUE_DEPTH': workers}
+        if iterations:
+            overrides['PASSWORD_HASHING_ITERATIONS'] = iterations
+        hashing.shutdown()
+        try:
+            with override_settings(**overrides):
+                self.stdout.write("iterations: %s, pool workers: %d, cpus: %d" % (
+                    hashing.TunablePBKDF2PasswordHasher().iterations, workers, os.cpu_count() or 1))
+                single = self.measure(options['seconds'], 1)
+                self.stdout.write("1 thread: %.1f hashes/sec (%.1f ms per hash)" % (single, 1000.0 / single))
+                hashing.shutdown()
+                pooled = self.measure(options['seconds'], workers)
+                cores = min(workers, os.cpu_count() or 1)
+                self.stdout.write("%d workers: %.1f hashes/sec, %.1f per core" % (workers, pooled, pooled / cores))
+        finally:
+            hashing.shutdown()
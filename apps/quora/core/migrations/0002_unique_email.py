@@ -0,0 +1,69 @@
+# Generated by Django 2.0.13 on 2026-10-18 11:29
+
+from django.db import IntegrityError, migrations, models
+
+BATCH_SIZE = 500
+
+
+def _normalize(email):
+    return (email or '').strip().lower() or None
+
+
+def _users(User):
+    last_pk = 0
+    while True:
+        users = list(User.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', 'email')[:BATCH_SIZE])
+        if not users:
+            break
+        yield from users
+        last_pk = users[-1][0]
+
+
+def normalize_emails(apps, schema_editor):
+    """
+    Lowercases emails and turns blank ones into NULL. Refuses to run if
+    several accounts share an address once lowercased: which of them keeps
+    it is for an admin to decide, so the conflicting accounts are listed.
+    """
+    User = apps.get_model('core', 'User')
+    accounts = {}
+    for pk, email in _users(User):
+        normalized = _normalize(email)
+        if normalized:
+            accounts.setdefault(normalized, []).append((pk, email))
+    conflicts = [(address, users) for address, users in sorted(accounts.items()) if len(users) > 1]
+    if conflicts:
+        raise IntegrityError(
+            "Cannot make user emails unique, these accounts share an address:\n%s" % '\n'.join(
+                "%s: %s" % (address, ', '.join('pk %s (%s)' % user for user in users))
+                for address, users in conflicts))
+    for pk, email in _users(User):
+        normalized = _normalize(email)
+        if normalized != email:
+            User.objects.filter(pk=pk).update(email=normalized)
+
+
+def blank_emails(apps, schema_editor):
+    User = apps.get_model('core', 'User')
+    User.objects.filter(email__isnull=True).update(email='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='email',
+            field=models.EmailField(blank=True, max_length=254, null=True, verbose_name='email address'),
+        ),
+        migrations.RunPython(normalize_emails, blank_emails),
+        migrations.AlterField(
+            model_name='user',
+            name='email',
+            field=models.EmailField(blank=True, max_length=254, null=True, unique=True, verbose_name='email address'),
+        ),
+    ]
@@ -3,4 +3,18 @@ from django.contrib.auth.models import AbstractUser
 
 
 class User(AbstractUser):
-    pass
\ No newline at end of file
+    # stored lowercased, so the unique index is case-insensitive and email
+    # logins are a single index lookup; NULL rather than '' when missing
+    email = models.EmailField('email address', unique=True, null=True, blank=True)
+
+    def clean(self):
+        super(User, self).clean()
+        self.email = self.normalize_email_address(self.email)
+
+    def save(self, *args, **kwargs):
+        self.email = self.normalize_email_address(self.email)
+        super(User, self).save(*args, **kwargs)
+
+    @staticmethod
+    def normalize_email_address(email):
+        return (email.strip().lower() or None) if email else None
@@ -0,0 +1,62 @@
+"""
+Login rate limiting.
+
+Attempts are counted per client IP and per account in fixed windows stored
+in the cache, so every process shares the same counters. A limited request
+is turned away before any password is hashed.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+KEY_PREFIX = 'core:ratelimit'
+
+
+def get_cache():
+    return caches[getattr(settings, 'LOGIN_RATE_LIMIT_CACHE', 'default')]
+
+
+def get_limits():
+    """``{scope: (attempts, seconds)}`` for the ``ip`` and ``account`` scopes"""
+    return getattr(settings, 'LOGIN_RATE_LIMITS', {
+        'ip': (30, 60),
+        'account': (10, 300),
+    })
+
+
+def _key(scope, ident, period):
+    digest = hashlib.sha1(ident.encode('utf-8')).hexdigest()
+    return '%s:%s:%s:%d' % (KEY_PREFIX, scope, digest, time.time() // period)
+
+
+def hit(scope, ident):
+    """
+    Counts an attempt against ``ident`` in ``scope`` and returns whether it
+    is over the limit.
+    """
+    limit, period = get_limits()[scope]
+    cache = get_cache()
+    key = _key(scope, ident, period)
+    # add() is a no-op if the window already exists; incr() is atomic
+    cache.add(key, 0, period)
+    try:
+        count = cache.incr(key)
+    except ValueError:
+        # the window expired between add() and incr()
+        cache.add(key, 1, period)
+        count = 1
+    return count > limit
+
+
+def client_ip(request):
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def login_limited(request, email):
+    """Counts a login attempt; true if the client or account is over its limit"""
+    ip_limited = hit('ip', client_ip(request))
+    account_limited = hit('account', email) if email else False
+    return ip_limited or account_limited
@@ -1,5 +1,14 @@
-from django.test import TestCase
+import threading
+
+from django.core.cache import cache
+from django.db import IntegrityError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from questans.models import Questions, Answers
+from . import hashing
 from .models import User
+from .views import QUESTIONS_PER_PAGE
 
 class LogInTest(TestCase):
     def setUp(self):
@@ -18,4 +27,122 @@ class LogInTest(TestCase):
 
     def test_user(self):
         user = User.objects.get(username="demo")
-        self.assertEqual(user.username, "demo")
\ No newline at end of file
+        self.assertEqual(user.username, "demo")
+
+class DashboardTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="asker", password="secret")
+        answerer = User.objects.create_user(username="answerer", password="secret")
+        for i in range(30):
+            question = Questions.objects.create(user=self.user, title="question %s" % i)
+            for j in range(i % 3):
+                Answers.objects.create(user=answerer, question=question, answer_text="answer %s.%s" % (i, j))
+
+    def test_user_without_questions(self):
+        User.objects.create_user(username="lurker", password="secret")
+        self.client.login(username="lurker", password="secret")
+        response = self.client.get(reverse('dashboard-view'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['questions'], [])
+
+    def test_page_of_questions_with_answers(self):
+        self.client.force_login(self.user)
+        # user, count, page of questions, their answers (the session is cached)
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('dashboard-view'))
+        questions = response.context['questions']
+        self.assertEqual(len(questions), QUESTIONS_PER_PAGE)
+        self.assertEqual(questions[0].title, "question 29")
+        self.assertEqual([q.answer_count for q in questions[:3]], [2, 1, 0])
+        self.assertContains(response, "answer 29.1 by answerer")
+        response = self.client.get(reverse('dashboard-view'), {'page': 2})
+        self.assertEqual(len(response.context['questions']), 10)
+
+    @override_settings(PROFILING_SAMPLE_RATE=1.0)
+    def test_server_timing(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('dashboard-view'))
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('desc="4 queries"', response['Server-Timing'])
+        self.assertIn('dup;desc="0 repeated"', response['Server-Timing'])
+
+
+class EmailLoginTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="demo", email="Demo@Example.com", password="secret")
+
+    def login(self, email, password="secret", **extra):
+        return self.client.post(reverse('login-view'), {'email': email, 'password': password}, **extra)
+
+    def test_email_is_unique_ignoring_case(self):
+        self.assertEqual(User.objects.get(pk=self.user.pk).email, "demo@example.com")
+        with self.assertRaises(IntegrityError):
+            User.objects.create_user(username="other", email="DEMO@example.com", password="secret")
+
+    def test_login_is_one_lookup(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.login("DEMO@example.com")
+        lookups = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('SELECT') and 'core_user' in q['sql']]
+        self.assertEqual(len(lookups), 1)
+        self.assertRedirects(response, reverse('dashboard-view'))
+
+    def test_wrong_password(self):
+        response = self.login("demo@example.com", password="wrong")
+        self.assertContains(response, "Unable to login")
+
+    @override_settings(LOGIN_RATE_LIMITS={'ip': (100, 60), 'account': (3, 60)})
+    def test_account_is_rate_limited(self):
+        for i in range(3):
+            self.assertEqual(self.login("demo@example.com", password="wrong").status_code, 200)
+        self.assertEqual(self.login("demo@example.com").status_code, 429)
+        # other accounts from the same address are unaffected
+        User.objects.create_user(username="other", email="other@example.com", password="secret")
+        self.assertEqual(self.login("other@example.com").status_code, 302)
+
+    @override_settings(LOGIN_RATE_LIMITS={'ip': (3, 60), 'account': (100, 60)})
+    def test_ip_is_rate_limited(self):
+        for i in range(3):
+            self.login("nobody%s@example.com" % i, password="wrong")
+        self.assertEqual(self.login("demo@example.com").status_code, 429)
+        self.assertEqual(self.login("demo@example.com", REMOTE_ADDR='10.0.0.2').status_code, 302)
+
+
+class HashingTest(TestCase):
+    def tearDown(self):
+        hashing.shutdown()
+
+    def test_password_is_rehashed_when_cost_changes(self):
+        cache.clear()
+        with self.settings(PASSWORD_HASHING_ITERATIONS=1000):
+            user = User.objects.create_user(username="demo", email="demo@example.com", password="secret")
+        self.assertIn("$1000$", user.password)
+        with self.settings(PASSWORD_HASHING_ITERATIONS=2000):
+            self.client.post(reverse('login-view'), {'email': "demo@example.com", 'password': "secret"})
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$2000$"))
+        self.assertTrue(user.check_password("secret"))
+
+    @override_settings(PASSWORD_HASHING_WORKERS=1, PASSWORD_HASHING_QUEUE_DEPTH=0)
+    def test_full_queue_is_503(self):
+        hashing.shutdown()
+        started, release = threading.Event(), threading.Event()
+
+        def slow_hash():
+            started.set()
+            release.wait(5)
+
+        blocker = threading.Thread(target=hashing.run, args=(slow_hash,))
+        blocker.start()
+        try:
+            started.wait(5)
+            response = self.client.post(reverse('register-view'), {
+                'username': "new", 'email': "new@example.com", 'password': "secret"})
+            self.assertEqual(response.status_code, 503)
+            self.assertFalse(User.objects.filter(username="new").exists())
+        finally:
+            release.set()
+            blocker.join()
+        response = self.client.post(reverse('register-view'), {
+            'username': "new", 'email': "new@example.com", 'password': "secret"})
+        self.assertRedirects(response, reverse('dashboard-view'))
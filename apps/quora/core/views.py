@@ -7,11 +7,22 @@ from django.contrib.auth.decorators import login_required
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth import authenticate
 from django.contrib.auth import login, logout
-from django.contrib.auth.hashers import make_password
+from django.core.paginator import Paginator
+from django.http import HttpResponse
+from . import hashing, ratelimit
 from .models import User
 from questans.models import Questions, Answers, QuestionGroups
 from .forms import LoginForm, RegisterForm
 
+QUESTIONS_PER_PAGE = 20
+
+
+def busy_response():
+    response = HttpResponse('Too many requests are being processed, please try again shortly',
+                            status=503, content_type='text/plain')
+    response['Retry-After'] = '1'
+    return response
+
 
 class DashboardView(FormView):
 
@@ -20,11 +31,19 @@ class DashboardView(FormView):
         if request.user.is_authenticated:
             user = request.user
             user.backend = 'django.contrib.core.backends.ModelBackend'
-            ques_obj = Questions.objects.filter(user=user)
+            ques_obj = Questions.objects.filter(user=user).order_by('-id')
+            page = Paginator(ques_obj, QUESTIONS_PER_PAGE).get_page(request.GET.get('page'))
+            questions = list(page.object_list)
+            # answers to every question on the page, in one query
+            answers = {}
+            for answer in (Answers.objects.filter(question__in=questions)
+                           .select_related('user').order_by('id')):
+                answers.setdefault(answer.question_id, []).append(answer)
+            for question in questions:
+                question.answer_list = answers.get(question.id, [])
             content['userdetail'] = user
-            content['questions'] = ques_obj
-            ans_obj = Answers.objects.filter(question=ques_obj[0])
-            content['answers'] = ans_obj
+            content['questions'] = questions
+            content['page_obj'] = page
             return render(request, 'dashboard.html', content)
         else:
             return redirect(reverse('login-view'))
@@ -45,9 +64,12 @@ class RegisterView(FormView):
         form = RegisterForm(request.POST, request.FILES or None)
         if form.is_valid():
             save_it = form.save(commit=False)
-            save_it.password = make_password(form.cleaned_data['password'])
+            try:
+                save_it.password = hashing.make_password(form.cleaned_data['password'])
+            except hashing.HashingBusy:
+                return busy_response()
             save_it.save()
-            login(request, save_it)
+            login(request, save_it, backend='core.backends.EmailBackend')
             return redirect(reverse('dashboard-view'))
         content['form'] = form
         template = 'register.html'
@@ -72,18 +94,21 @@ class LoginView(FormView):
 
     def post(self, request):
         content = {}
-        email = request.POST['email']
-        password = request.POST['password']
+        email = User.normalize_email_address(request.POST.get('email', ''))
+        password = request.POST.get('password', '')
+        content['form'] = LoginForm
+        if ratelimit.login_limited(request, email):
+            content['error'] = 'Too many login attempts, please try again later'
+            return render(request, 'login.html', content, status=429)
         try:
-            users = User.objects.filter(email=email)
-            user = authenticate(request, username=users.first().username, password=password)
-            login(request, user)
-            return redirect(reverse('dashboard-view'))
-        except Exception as e:
-            content = {}
-            content['form'] = LoginForm
-            content['error'] = 'Unable to login with provided credentials' + e
-            return render_to_response('login.html', content)
+            user = authenticate(request, email=email, password=password)
+        except hashing.HashingBusy:
+            return busy_response()
+        if user is None:
+            content['error'] = 'Unable to login with provided credentials'
+            return render(request, 'login.html', content)
+        login(request, user)
+        return redirect(reverse('dashboard-view'))
 
 
 class LogoutView(FormView):
@@ -0,0 +1,107 @@
+"""
+Near-duplicate question detection.
+
+Titles are compared as sets of character shingles. Each title gets a
+MinHash signature, split into bands; a band hashes to a bucket, and every
+bucket of every question is stored as a ``TitleBucket`` row. Questions
+sharing a bucket with a new title are the only candidates looked at, so a
+lookup is a handful of index probes however many questions there are; the
+candidates are then ranked by their exact shingle similarity.
+
+With ``BANDS`` bands of ``ROWS`` rows, titles with a similarity of about
+``(1 / BANDS) ** (1 / ROWS)`` (0.46) have an even chance of becoming
+candidates, and the chance rises steeply above that.
+"""
+
+import hashlib
+import random
+import re
+
+from django.db.models import Count
+
+SHINGLE_SIZE = 3
+BANDS = 10
+ROWS = 3
+SIMILARITY_THRESHOLD = 0.5
+MAX_CANDIDATES = 50
+
+_PRIME = (1 << 61) - 1
+_random = random.Random(20180417)
+_PERMUTATIONS = [(_random.randrange(1, _PRIME), _random.randrange(_PRIME)) for _ in range(BANDS * ROWS)]
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _hash(value):
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def shingles(title):
+    text = ' '.join(_WORD_RE.findall(title.lower()))
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return set(text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1))
+
+
+def similarity(a, b):
+    """Jaccard similarity of two shingle sets"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def signature(shingle_set):
+    hashes = [_hash(shingle) for shingle in shingle_set]
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def buckets(title):
+    """The LSH buckets of ``title``, as signed 64-bit-safe integers"""
+    shingle_set = shingles(title)
+    if not shingle_set:
+        return []
+    minhash = signature(shingle_set)
+    return [_hash('%d:%s' % (band, minhash[band * ROWS:(band + 1) * ROWS])) & ((1 << 63) - 1)
+            for band in range(BANDS)]
+
+
+def index_questions(questions):
+    """(Re)computes the buckets of ``questions``, which need ``pk`` and ``title``"""
+    from .models import TitleBucket
+
+    questions = list(questions)
+    TitleBucket.objects.filter(question__in=[question.pk for question in questions]).delete()
+    TitleBucket.objects.bulk_create(
+        TitleBucket(question_id=question.pk, bucket=bucket)
+        for question in questions
+        for bucket in set(buckets(question.title))
+    )
+
+
+def index_question(question):
+    index_questions([question])
+
+
+def find_duplicates(title, exclude=None, limit=5):
+    """
+    Existing questions whose titles look like ``title``, most similar first.
+    Each has a ``similarity`` attribute between ``SIMILARITY_THRESHOLD`` and 1.
+    """
+    from .models import Questions, TitleBucket
+
+    title_buckets = buckets(title)
+    if not title_buckets:
+        return []
+    candidates = TitleBucket.objects.filter(bucket__in=title_buckets)
+    if exclude is not None:
+        candidates = candidates.exclude(question=exclude)
+    candidates = (candidates.values('question').annotate(shared=Count('id'))
+                  .order_by('-shared', '-question')[:MAX_CANDIDATES])
+    questions = Questions.objects.only('title', 'slug').in_bulk([c['question'] for c in candidates])
+    title_shingles = shingles(title)
+    matches = []
+    for question in questions.values():
+        question.similarity = similarity(title_shingles, shingles(question.title))
+        if question.similarity >= SIMILARITY_THRESHOLD:
+            matches.append(question)
+    matches.sort(key=lambda question: (-question.similarity, -question.pk))
+    return matches[:limit]
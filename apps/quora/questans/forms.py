@@ -0,0 +1,9 @@
+from django import forms
+from .models import Questions
+
+
+class QuestionForm(forms.ModelForm):
+
+    class Meta:
+        model = Questions
+        fields = ['title', 'group']
@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from questans import duplicates, search
+from questans.models import Answers, Questions, TitleBucket
+
+class Command(BaseCommand):
+    help = """
+            rebuilds the question search index and the
+            title buckets used to spot duplicate questions
+
+            Questions, then answers, are streamed in primary
+            key batches, so memory use does not grow with
+            the site.
+           """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Number of questions or answers indexed per transaction (default: 500)')
+
+    def handle(self, **options):
+        started = time.monotonic()
+        search.clear_index()
+        TitleBucket.objects.all().delete()
+        questions = Questions.objects.only('id', 'title').order_by('pk')
+        indexed = 0
+        last_pk = 0
+        while True:
+            batch = list(questions.filter(pk__gt=last_pk)[:options['batch_size']])
+            if not batch:
+                break
+            with transaction.atomic():
+                search.index_questions(batch)
+                duplicates.index_questions(batch)
+            indexed += len(batch)
+            last_pk = batch[-1].pk
+            if options['verbosity'] > 1:
+                self.stdout.write("indexed %d questions" % indexed)
+        answers = Answers.objects.only('id', 'question', 'answer_text').order_by('pk')
+        indexed_answers = 0
+        last_pk = 0
+        while True:
+            batch = list(answers.filter(pk__gt=last_pk)[:options['batch_size']])
+            if not batch:
+                break
+            with transaction.atomic():
+                search.index_answers(batch)
+            indexed_answers += len(batch)
+            last_pk = batch[-1].pk
+            if options['verbosity'] > 1:
+                self.stdout.write("indexed %d answers" % indexed_answers)
+        elapsed = time.monotonic() - started
+        self.stdout.write("indexed %d questions and %d answers in %.2fs using %s" % (
+            indexed, indexed_answers, elapsed, "FTS5" if search.fts_available() else "the posting table"))
@@ -0,0 +1,98 @@
+# Generated by Django 2.0.13 on 2026-10-18 11:28
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F
+import django.db.models.deletion
+import django.utils.timezone
+
+BATCH_SIZE = 500
+
+
+def backfill_activity(apps, schema_editor):
+    Questions = apps.get_model('questans', 'Questions')
+    Answers = apps.get_model('questans', 'Answers')
+    GroupActivity = apps.get_model('questans', 'GroupActivity')
+    last_pk = 0
+    while True:
+        questions = list(Questions.objects.filter(pk__gt=last_pk).order_by('pk')
+                         .values_list('pk', 'group', 'user', 'updated_on')[:BATCH_SIZE])
+        if not questions:
+            break
+        pks = [pk for pk, _, _, _ in questions]
+        # created_on is auto_now, i.e. when the question was last saved
+        Questions.objects.filter(pk__in=pks).update(last_activity=F('created_on'))
+        counts = Answers.objects.filter(question__in=pks).values_list('question').annotate(Count('id')).order_by()
+        for question_id, count in counts:
+            Questions.objects.filter(pk=question_id).update(answer_count=count)
+        # answers have no timestamp, so only questions can go in the feeds
+        GroupActivity.objects.bulk_create(
+            GroupActivity(group_id=group_id, question_id=pk, user_id=user_id, verb='asked', created_on=asked_on)
+            for pk, group_id, user_id, asked_on in questions if group_id)
+        last_pk = pks[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('questans', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupActivity',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('verb', models.CharField(choices=[('asked', 'asked'), ('answered', 'answered')], max_length=10)),
+                ('created_on', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='questions',
+            name='answer_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='questions',
+            name='last_activity',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='questions',
+            index=models.Index(fields=['answer_count', 'id'], name='questions_unanswered_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='questions',
+            index=models.Index(fields=['last_activity', 'id'], name='questions_trending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='questions',
+            index=models.Index(fields=['group', 'last_activity', 'id'], name='questions_group_trending_idx'),
+        ),
+        migrations.AddField(
+            model_name='groupactivity',
+            name='answer',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='questans.Answers'),
+        ),
+        migrations.AddField(
+            model_name='groupactivity',
+            name='group',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='questans.QuestionGroups'),
+        ),
+        migrations.AddField(
+            model_name='groupactivity',
+            name='question',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='questans.Questions'),
+        ),
+        migrations.AddField(
+            model_name='groupactivity',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='groupactivity',
+            index=models.Index(fields=['group', 'created_on', 'id'], name='groupactivity_feed_idx'),
+        ),
+        migrations.RunPython(backfill_activity, migrations.RunPython.noop),
+    ]
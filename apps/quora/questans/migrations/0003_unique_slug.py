@@ -0,0 +1,49 @@
+# Generated by Django 2.0.13 on 2026-10-18 11:31
+
+from django.db import migrations, models
+from django.utils.text import slugify
+
+BATCH_SIZE = 500
+SLUG_LENGTH = 50
+
+
+def deduplicate_slugs(apps, schema_editor):
+    """
+    Gives every question a unique slug before the unique index goes on. In
+    primary key order, the first question with a slug keeps it and later
+    ones get ``-2``, ``-3``... suffixes, like new questions do.
+    """
+    Questions = apps.get_model('questans', 'Questions')
+    seen = set()
+    last_pk = 0
+    while True:
+        rows = list(Questions.objects.filter(pk__gt=last_pk).order_by('pk')
+                    .values_list('pk', 'slug', 'title')[:BATCH_SIZE])
+        if not rows:
+            break
+        for pk, slug, title in rows:
+            base = slug or slugify(title)[:SLUG_LENGTH - 8].strip('-') or 'question'
+            candidate, n = base, 1
+            while candidate in seen:
+                n += 1
+                candidate = '%s-%d' % (base[:SLUG_LENGTH - 8], n)
+            seen.add(candidate)
+            if candidate != slug:
+                Questions.objects.filter(pk=pk).update(slug=candidate)
+        last_pk = rows[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questans', '0002_activity'),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicate_slugs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='questions',
+            name='slug',
+            field=models.SlugField(unique=True),
+        ),
+    ]
@@ -0,0 +1,142 @@
+# Generated by Django 2.0.13 on 2026-10-18 11:33
+
+import hashlib
+import random
+import re
+from collections import Counter
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 500
+
+# Frozen copies of what questans.search and questans.duplicates did when
+# this migration was written, so later changes there don't change it.
+
+FTS_TABLE = 'questans_question_fts'
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+TITLE_WEIGHT = 5
+TERM_LENGTH = 64
+
+SHINGLE_SIZE = 3
+BANDS = 10
+ROWS = 3
+_PRIME = (1 << 61) - 1
+_random = random.Random(20180417)
+_PERMUTATIONS = [(_random.randrange(1, _PRIME), _random.randrange(_PRIME)) for _ in range(BANDS * ROWS)]
+
+
+def tokenize(text):
+    return [token.lower() for token in TOKEN_RE.findall(text) if len(token) > 1]
+
+
+def postings_for(title, text):
+    counts = Counter(tokenize(text))
+    for token in tokenize(title):
+        counts[token] += TITLE_WEIGHT
+    return counts
+
+
+def _hash(value):
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def title_buckets(title):
+    text = ' '.join(TOKEN_RE.findall(title.lower()))
+    if len(text) <= SHINGLE_SIZE:
+        shingles = {text} if text else set()
+    else:
+        shingles = set(text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1))
+    if not shingles:
+        return set()
+    hashes = [_hash(shingle) for shingle in shingles]
+    minhash = [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+    return set(_hash('%d:%s' % (band, minhash[band * ROWS:(band + 1) * ROWS])) & ((1 << 63) - 1)
+               for band in range(BANDS))
+
+
+def create_fts_table(schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return False
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if not cursor.fetchone()[0]:
+            return False
+    schema_editor.execute("CREATE VIRTUAL TABLE %s USING fts5(title, answers)" % FTS_TABLE)
+    # djen_common.search caches which tables exist per connection
+    schema_editor.connection.fts_tables = {}
+    return True
+
+
+def create_search_index(apps, schema_editor):
+    Questions = apps.get_model('questans', 'Questions')
+    Answers = apps.get_model('questans', 'Answers')
+    SearchPosting = apps.get_model('questans', 'SearchPosting')
+    TitleBucket = apps.get_model('questans', 'TitleBucket')
+    use_fts = create_fts_table(schema_editor)
+    last_pk = 0
+    while True:
+        batch = list(Questions.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', 'title')[:BATCH_SIZE])
+        if not batch:
+            break
+        answers = {}
+        texts = Answers.objects.filter(question__in=[pk for pk, _ in batch]).order_by('id').values_list('question', 'answer_text')
+        for question_id, text in texts:
+            answers.setdefault(question_id, []).append(text)
+        documents = [(pk, title, '\n'.join(answers.get(pk, []))) for pk, title in batch]
+        if use_fts:
+            with schema_editor.connection.cursor() as cursor:
+                cursor.executemany("INSERT INTO %s (rowid, title, answers) VALUES (%%s, %%s, %%s)" % FTS_TABLE, documents)
+        else:
+            SearchPosting.objects.bulk_create(
+                SearchPosting(term=term[:TERM_LENGTH], question_id=pk, frequency=frequency)
+                for pk, title, text in documents
+                for term, frequency in postings_for(title, text).items()
+            )
+        TitleBucket.objects.bulk_create(
+            TitleBucket(question_id=pk, bucket=bucket)
+            for pk, title in batch
+            for bucket in title_buckets(title)
+        )
+        last_pk = batch[-1][0]
+
+
+def drop_search_index(apps, schema_editor):
+    schema_editor.execute("DROP TABLE IF EXISTS %s" % FTS_TABLE)
+    schema_editor.connection.fts_tables = {}
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questans', '0003_unique_slug'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchPosting',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('frequency', models.PositiveIntegerField()),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='questans.Questions')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TitleBucket',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.BigIntegerField()),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='questans.Questions')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='titlebucket',
+            index=models.Index(fields=['bucket', 'question'], name='titlebucket_bucket_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='searchposting',
+            unique_together={('term', 'question')},
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 2.0.13 on 2026-10-18 15:20
+
+import re
+
+from django.db import migrations
+
+# questans.models.RESERVED_SLUGS when this migration was written: the fixed
+# routes that shadow question pages with these slugs
+RESERVED_SLUGS = ('ask', 'similar', 'search')
+
+
+def rename_reserved_slugs(apps, schema_editor):
+    """
+    Moves questions off slugs that are routes of their own, which made them
+    unreachable, to ``<slug>-<n>`` past the highest ``n`` in use, as
+    ``QuestionsManager.unique_slug`` would have picked.
+    """
+    Questions = apps.get_model('questans', 'Questions')
+    for slug in RESERVED_SLUGS:
+        pk = Questions.objects.filter(slug=slug).values_list('pk', flat=True).first()
+        if pk is None:
+            continue
+        pattern = re.compile(r'^%s-([0-9]+)$' % re.escape(slug))
+        numbers = [int(match.group(1)) for match in map(pattern.match, Questions.objects.filter(
+            slug__startswith=slug + '-').values_list('slug', flat=True)) if match]
+        new_slug = '%s-%d' % (slug, max(numbers + [1]) + 1)
+        Questions.objects.filter(pk=pk).update(slug=new_slug)
+        print("\n  moved question %s from /%s/ to /%s/" % (pk, slug, new_slug), end='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questans', '0004_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_reserved_slugs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,130 @@
+# Generated by Django 2.0.13 on 2026-10-18 15:40
+
+import re
+from collections import Counter
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 500
+
+# Frozen copies of what questans.search does, so later changes there don't
+# change this migration.
+
+QUESTION_FTS_TABLE = 'questans_question_fts'
+ANSWER_FTS_TABLE = 'questans_answer_fts'
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+TITLE_WEIGHT = 5
+TERM_LENGTH = 64
+
+
+def postings_for(title, text):
+    counts = Counter(token.lower() for token in TOKEN_RE.findall(text) if len(token) > 1)
+    for token in TOKEN_RE.findall(title):
+        if len(token) > 1:
+            counts[token.lower()] += TITLE_WEIGHT
+    return counts
+
+
+def has_fts5(schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return False
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def batches(queryset, *fields):
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk).order_by('pk').values_list('pk', *fields)[:BATCH_SIZE])
+        if not batch:
+            break
+        yield batch
+        last_pk = batch[-1][0]
+
+
+def index_answers_separately(apps, schema_editor):
+    """
+    Rebuilds the search index with question titles and answers as documents
+    of their own, instead of one document per question holding every answer.
+    """
+    Questions = apps.get_model('questans', 'Questions')
+    Answers = apps.get_model('questans', 'Answers')
+    SearchPosting = apps.get_model('questans', 'SearchPosting')
+    SearchPosting.objects.all().delete()
+    if has_fts5(schema_editor):
+        schema_editor.execute("DROP TABLE IF EXISTS %s" % QUESTION_FTS_TABLE)
+        schema_editor.execute("CREATE VIRTUAL TABLE %s USING fts5(title)" % QUESTION_FTS_TABLE)
+        schema_editor.execute("CREATE VIRTUAL TABLE %s USING fts5(answer_text, question UNINDEXED)" % ANSWER_FTS_TABLE)
+        # djen_common.search caches which tables exist per connection
+        schema_editor.connection.fts_tables = {}
+        with schema_editor.connection.cursor() as cursor:
+            for batch in batches(Questions.objects, 'title'):
+                cursor.executemany("INSERT INTO %s (rowid, title) VALUES (%%s, %%s)" % QUESTION_FTS_TABLE, batch)
+            for batch in batches(Answers.objects, 'answer_text', 'question'):
+                cursor.executemany("INSERT INTO %s (rowid, answer_text, question) VALUES (%%s, %%s, %%s)"
+                                   % ANSWER_FTS_TABLE, batch)
+        return
+    for batch in batches(Questions.objects, 'title'):
+        SearchPosting.objects.bulk_create(
+            SearchPosting(term=term[:TERM_LENGTH], question_id=pk, frequency=frequency)
+            for pk, title in batch
+            for term, frequency in postings_for(title, '').items()
+        )
+    for batch in batches(Answers.objects, 'answer_text', 'question'):
+        SearchPosting.objects.bulk_create(
+            SearchPosting(term=term[:TERM_LENGTH], question_id=question, answer_id=pk, frequency=frequency)
+            for pk, text, question in batch
+            for term, frequency in postings_for('', text).items()
+        )
+
+
+def index_whole_questions(apps, schema_editor):
+    """Puts back the index of 0004_search: one document per question"""
+    Questions = apps.get_model('questans', 'Questions')
+    Answers = apps.get_model('questans', 'Answers')
+    SearchPosting = apps.get_model('questans', 'SearchPosting')
+    SearchPosting.objects.all().delete()
+    use_fts = has_fts5(schema_editor)
+    if use_fts:
+        schema_editor.execute("DROP TABLE IF EXISTS %s" % ANSWER_FTS_TABLE)
+        schema_editor.execute("DROP TABLE IF EXISTS %s" % QUESTION_FTS_TABLE)
+        schema_editor.execute("CREATE VIRTUAL TABLE %s USING fts5(title, answers)" % QUESTION_FTS_TABLE)
+        schema_editor.connection.fts_tables = {}
+    for batch in batches(Questions.objects, 'title'):
+        answers = {}
+        texts = Answers.objects.filter(question__in=[pk for pk, _ in batch]).order_by('id').values_list('question', 'answer_text')
+        for question_id, text in texts:
+            answers.setdefault(question_id, []).append(text)
+        documents = [(pk, title, '\n'.join(answers.get(pk, []))) for pk, title in batch]
+        if use_fts:
+            with schema_editor.connection.cursor() as cursor:
+                cursor.executemany("INSERT INTO %s (rowid, title, answers) VALUES (%%s, %%s, %%s)" % QUESTION_FTS_TABLE,
+                                   documents)
+        else:
+            SearchPosting.objects.bulk_create(
+                SearchPosting(term=term[:TERM_LENGTH], question_id=pk, frequency=frequency)
+                for pk, title, text in documents
+                for term, frequency in postings_for(title, text).items()
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questans', '0005_rename_reserved_slugs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='searchposting',
+            name='answer',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='questans.Answers'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='searchposting',
+            unique_together={('term', 'question', 'answer')},
+        ),
+        migrations.RunPython(index_answers_separately, index_whole_questions),
+    ]
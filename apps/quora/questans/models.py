@@ -1,23 +1,101 @@
-from django.db import models
+import re
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, IntegerField, Max
+from django.db.models.functions import Cast, Substr
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.conf import settings
+from django.urls import reverse
+from django.utils import timezone
 from django.utils.text import slugify
+
+from . import duplicates, search
 # Create your models here.
 
+# Fixed routes next to the question pages in questans/urls.py
+RESERVED_SLUGS = {'ask', 'similar', 'search'}
+
+
+class QuestionsManager(models.Manager):
+    def get_by_slug(self, slug):
+        return self.get(slug=slug)
+
+    def in_bulk_by_slug(self, slugs):
+        """``{slug: question}`` for the given slugs, in one query"""
+        return self.in_bulk(slugs, field_name='slug')
+
+    def unique_slug(self, title):
+        """
+        ``slugify(title)``, or ``<slug>-<n>`` past the highest ``n`` in use if
+        it is taken or reserved. Looks at ``slug`` and ``slug-*`` only, as index range
+        scans, and reads back a single number.
+        """
+        max_length = Questions._meta.get_field('slug').max_length
+        base = slugify(title)[:max_length - 8].strip('-') or 'question'
+        if base not in RESERVED_SLUGS and not self.filter(slug=base).exists():
+            return base
+        highest = (self.filter(slug__gt=base + '-', slug__lt=base + '.', slug__regex=r'^%s-[0-9]+$' % re.escape(base))
+                   .aggregate(n=Max(Cast(Substr('slug', len(base) + 2), IntegerField())))['n'])
+        return '%s-%d' % (base, max(highest or 1, 1) + 1)
+
+    def unanswered(self):
+        return self.filter(answer_count=0).order_by('-id')
+
+    def trending(self):
+        """Questions with the most recent activity first"""
+        return self.order_by('-last_activity', '-id')
+
+
 class Questions(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True)
     title = models.TextField()
     group = models.ForeignKey('QuestionGroups', on_delete=models.CASCADE, null=True, blank=True)
     created_on = models.DateTimeField(auto_now=True)
     updated_on = models.DateTimeField(auto_now_add=True)
-    slug = models.SlugField()
+    slug = models.SlugField(unique=True)
+    answer_count = models.PositiveIntegerField(default=0, editable=False)
+    last_activity = models.DateTimeField(default=timezone.now, editable=False)
+
+    objects = QuestionsManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['answer_count', 'id'], name='questions_unanswered_idx'),
+            models.Index(fields=['last_activity', 'id'], name='questions_trending_idx'),
+            models.Index(fields=['group', 'last_activity', 'id'], name='questions_group_trending_idx'),
+        ]
 
     def save(self, *args, **kwargs):
-        self.slug = slugify(self.title)
-        super(Questions, self).save(*args, **kwargs)
+        with transaction.atomic():
+            adding = self._state.adding
+            if self.slug:
+                super(Questions, self).save(*args, **kwargs)
+            else:
+                self._save_with_unique_slug(*args, **kwargs)
+            if adding and self.group_id:
+                GroupActivity.objects.create(group_id=self.group_id, question=self, user_id=self.user_id,
+                                             verb=GroupActivity.ASKED, created_on=self.last_activity)
+            search.index_question(self)
+            duplicates.index_question(self)
 
     def __unicode__(self):
         return self.title
 
+    def get_absolute_url(self):
+        return reverse('question-detail', args=[self.slug])
+
+    def _save_with_unique_slug(self, *args, **kwargs):
+        for attempt in range(5):
+            self.slug = Questions.objects.unique_slug(self.title)
+            try:
+                with transaction.atomic():
+                    return super(Questions, self).save(*args, **kwargs)
+            except IntegrityError:
+                # Somebody took the same slug concurrently; pick again.
+                self.slug = ''
+        raise IntegrityError("no free slug for %r" % self.title)
+
 
 class Answers(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -28,9 +106,109 @@ class Answers(models.Model):
     def __unicode__(self):
         return self.id
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            adding = self._state.adding
+            super(Answers, self).save(*args, **kwargs)
+            if adding:
+                now = timezone.now()
+                Questions.objects.filter(pk=self.question_id).update(
+                    answer_count=F('answer_count') + 1, last_activity=now)
+                group_id = Questions.objects.filter(pk=self.question_id).values_list('group', flat=True).get()
+                if group_id:
+                    GroupActivity.objects.create(group_id=group_id, question_id=self.question_id, answer=self,
+                                                 user=None if self.is_anonymous else self.user,
+                                                 verb=GroupActivity.ANSWERED, created_on=now)
+            search.index_answers([self])
+
 
 class QuestionGroups(models.Model):
     name = models.CharField(max_length=100)
 
     def __unicode__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+
+class GroupActivityManager(models.Manager):
+    def feed(self, group):
+        """A group's activity, newest first; slice it for a page"""
+        return self.filter(group=group).select_related('question', 'user').order_by('-created_on', '-id')
+
+
+class GroupActivity(models.Model):
+    """
+    One entry in a group's activity feed, written when a question is asked
+    in the group or answered, so reading a feed page never has to merge
+    questions and answers.
+    """
+    ASKED = 'asked'
+    ANSWERED = 'answered'
+    VERB_CHOICES = (
+        (ASKED, 'asked'),
+        (ANSWERED, 'answered'),
+    )
+
+    group = models.ForeignKey(QuestionGroups, on_delete=models.CASCADE, related_name='activity')
+    question = models.ForeignKey(Questions, on_delete=models.CASCADE)
+    answer = models.ForeignKey(Answers, on_delete=models.CASCADE, null=True, blank=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    verb = models.CharField(max_length=10, choices=VERB_CHOICES)
+    created_on = models.DateTimeField(default=timezone.now)
+
+    objects = GroupActivityManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['group', 'created_on', 'id'], name='groupactivity_feed_idx'),
+        ]
+
+    def __unicode__(self):
+        return "%s %s" % (self.user, self.verb)
+
+
+class SearchPosting(models.Model):
+    """
+    Inverted index entry: ``term`` occurs ``frequency`` times in ``answer``,
+    or in the title of ``question`` if there's no answer. Only used when the
+    database has no full-text search engine.
+    """
+
+    TERM_LENGTH = 64
+
+    term = models.CharField(max_length=TERM_LENGTH)
+    question = models.ForeignKey(Questions, on_delete=models.CASCADE)
+    answer = models.ForeignKey(Answers, on_delete=models.CASCADE, null=True, blank=True)
+    frequency = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('term', 'question', 'answer')
+
+    def __unicode__(self):
+        return "%s: %s (%s)" % (self.term, self.question_id, self.frequency)
+
+
+class TitleBucket(models.Model):
+    """An LSH bucket of a question's title, see ``questans.duplicates``"""
+
+    question = models.ForeignKey(Questions, on_delete=models.CASCADE)
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['bucket', 'question'], name='titlebucket_bucket_idx'),
+        ]
+
+    def __unicode__(self):
+        return "%s: %s" % (self.question_id, self.bucket)
+
+
+# Also catches queryset and cascading deletes, which skip Answers.delete().
+@receiver(post_delete, sender=Answers)
+def decrement_answer_count(sender, instance, **kwargs):
+    Questions.objects.filter(pk=instance.question_id).update(answer_count=F('answer_count') - 1)
+    search.unindex_answers([instance.pk])
+
+
+@receiver(post_delete, sender=Questions)
+def unindex_question(sender, instance, **kwargs):
+    search.unindex_questions([instance.pk])
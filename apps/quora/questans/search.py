@@ -0,0 +1,176 @@
+"""
+Full-text search over questions and their answers.
+
+Uses SQLite FTS5 tables when the database has them (see migration
+``0006_answer_search_index``) and falls back to an inverted index of
+``SearchPosting`` rows otherwise; the shared parts live in
+``djen_common.search``. A question's title and each of its answers are
+indexed as documents of their own, so saving or deleting an answer only
+touches that answer's entries, and a question matches a query when every
+word is in its title or in one of its answers. The index follows question
+and answer saves and deletes, and can be rebuilt with
+``manage.py reindex_questions``.
+"""
+
+from django.db import connection
+from django.db.models import Sum
+
+from djen_common import search as common
+from djen_common.search import postings_for
+
+# rowid is the question's pk
+FTS_TABLE = 'questans_question_fts'
+COLUMNS = ('title',)
+# rowid is the answer's pk; ``question`` is stored but not indexed
+ANSWER_FTS_TABLE = 'questans_answer_fts'
+ANSWER_COLUMNS = ('answer_text', 'question')
+
+
+class SearchResult(object):
+    def __init__(self, question, score, snippet):
+        self.question = question
+        self.score = score
+        self.snippet = snippet
+
+
+def fts_available():
+    return common.fts_available(ANSWER_FTS_TABLE)
+
+
+def index_questions(questions):
+    """(Re)indexes the titles of ``questions``, which need ``pk`` and ``title``"""
+    from .models import SearchPosting
+
+    questions = list(questions)
+    unindex_questions([question.pk for question in questions])
+    if fts_available():
+        common.insert_fts_rows(FTS_TABLE, COLUMNS, [(question.pk, question.title) for question in questions])
+    else:
+        common.create_postings(SearchPosting, 'question', [(question.pk, question.title, '') for question in questions])
+
+
+def index_question(question):
+    index_questions([question])
+
+
+def unindex_questions(pks):
+    """Removes the titles of questions from the index; see ``unindex_answers`` for their answers"""
+    from .models import SearchPosting
+
+    if fts_available():
+        common.delete_fts_rows(FTS_TABLE, pks)
+    else:
+        SearchPosting.objects.filter(question__in=pks, answer=None).delete()
+
+
+def index_answers(answers):
+    """(Re)indexes ``answers``, which need ``pk``, ``question_id`` and ``answer_text``"""
+    from .models import SearchPosting
+
+    answers = list(answers)
+    unindex_answers([answer.pk for answer in answers])
+    if fts_available():
+        common.insert_fts_rows(ANSWER_FTS_TABLE, ANSWER_COLUMNS,
+                               [(answer.pk, answer.answer_text, answer.question_id) for answer in answers])
+    else:
+        SearchPosting.objects.bulk_create(
+            SearchPosting(term=term[:SearchPosting.TERM_LENGTH], frequency=frequency,
+                          question_id=answer.question_id, answer_id=answer.pk)
+            for answer in answers
+            for term, frequency in postings_for('', answer.answer_text).items()
+        )
+
+
+def unindex_answers(pks):
+    from .models import SearchPosting
+
+    if fts_available():
+        common.delete_fts_rows(ANSWER_FTS_TABLE, pks)
+    else:
+        SearchPosting.objects.filter(answer__in=pks).delete()
+
+
+def clear_index():
+    from .models import SearchPosting
+
+    if fts_available():
+        common.clear_fts_table(FTS_TABLE)
+        common.clear_fts_table(ANSWER_FTS_TABLE)
+    SearchPosting.objects.all().delete()
+
+
+def _fts_query(terms):
+    return ' OR '.join('"%s"' % term.replace('"', '""') for term in terms)
+
+
+def _search_fts(terms, limit, offset):
+    """
+    ``[(pk, score)]`` of the questions with every term in their title or an
+    answer, best first: the bm25 ranks of the matching title and answers
+    are added up.
+    """
+    sql = ("SELECT question, SUM(score) FROM ("
+           "SELECT rowid AS question, bm25({questions}, %s) AS score FROM {questions} WHERE {questions} MATCH %s "
+           "UNION ALL "
+           "SELECT question, bm25({answers}, 1.0) FROM {answers} WHERE {answers} MATCH %s"
+           ") WHERE 1")
+    params = [float(common.TITLE_WEIGHT), _fts_query(terms), _fts_query(terms)]
+    if len(terms) > 1:
+        # The subquery finds the questions with any of the terms; keep
+        # those that have each of them somewhere.
+        for term in terms:
+            sql += (" AND question IN (SELECT rowid FROM {questions} WHERE {questions} MATCH %s"
+                    " UNION SELECT question FROM {answers} WHERE {answers} MATCH %s)")
+            params += [_fts_query([term])] * 2
+    sql += " GROUP BY question ORDER BY 2 LIMIT %s OFFSET %s"
+    with connection.cursor() as cursor:
+        cursor.execute(sql.format(questions=FTS_TABLE, answers=ANSWER_FTS_TABLE), params + [limit, offset])
+        # bm25() is lower for better matches
+        return [(pk, -score) for pk, score in cursor.fetchall()]
+
+
+def _best_answers(pks, terms):
+    """``{question pk: answer pk}`` of the answer of each question that matches ``terms`` best"""
+    from .models import SearchPosting
+
+    if not pks:
+        return {}
+    if fts_available():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT question, rowid FROM {table} WHERE {table} MATCH %s AND question IN ({pks}) "
+                           "ORDER BY rank".format(table=ANSWER_FTS_TABLE, pks=', '.join(['%s'] * len(pks))),
+                           [_fts_query(terms)] + list(pks))
+            matches = cursor.fetchall()
+    else:
+        matches = (SearchPosting.objects.filter(question__in=pks, answer__isnull=False, term__in=terms)
+                   .values_list('question', 'answer').annotate(score=Sum('frequency'))
+                   .order_by('-score', 'answer'))
+        matches = [(question, answer) for question, answer, _ in matches]
+    best = {}
+    for question, answer in matches:
+        best.setdefault(question, answer)
+    return best
+
+
+def search(query, limit=20, offset=0):
+    """
+    Returns up to ``limit`` ``SearchResult``s for questions whose title or
+    answers contain every word of ``query``, best matches first. Snippets
+    come from the title if it has a word of the query, otherwise from the
+    question's best matching answer: at most one answer is read per result.
+    """
+    from .models import Answers, Questions, SearchPosting
+
+    terms = common.query_terms(query)
+    if not terms:
+        return []
+    if fts_available():
+        matches = _search_fts(terms, limit, offset)
+    else:
+        matches = common.search_postings(SearchPosting, 'question', terms, limit, offset)
+    questions = Questions.objects.only('title', 'slug').in_bulk([pk for pk, _ in matches])
+    untitled = [pk for pk, question in questions.items() if not set(terms) & set(common.tokenize(question.title))]
+    texts = dict(Answers.objects.filter(pk__in=_best_answers(untitled, terms).values())
+                 .values_list('question', 'answer_text'))
+    return [SearchResult(questions[pk], score, common.snippet(texts.get(pk, questions[pk].title), terms))
+            for pk, score in matches if pk in questions]
@@ -1,3 +1,192 @@
-from django.test import TestCase
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import User
+from . import duplicates, search
+from .models import Questions, Answers, QuestionGroups, GroupActivity, SearchPosting
+
+
+class AnswerCountTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="asker", password="secret")
+        self.group = QuestionGroups.objects.create(name="python")
+        self.question = Questions.objects.create(user=self.user, title="Why?", group=self.group)
+
+    def answer(self, text="Because", **kwargs):
+        return Answers.objects.create(user=self.user, question=self.question, answer_text=text, **kwargs)
+
+    def test_counts_follow_answers(self):
+        before = self.question.last_activity
+        first = self.answer()
+        self.answer()
+        question = Questions.objects.get(pk=self.question.pk)
+        self.assertEqual(question.answer_count, 2)
+        self.assertGreater(question.last_activity, before)
+        first.delete()
+        Answers.objects.all().delete()
+        self.assertEqual(Questions.objects.get(pk=self.question.pk).answer_count, 0)
+
+    def test_unanswered_and_trending(self):
+        other = Questions.objects.create(user=self.user, title="How?")
+        self.assertEqual(list(Questions.objects.unanswered()), [other, self.question])
+        self.answer()
+        self.assertEqual(list(Questions.objects.unanswered()), [other])
+        self.assertEqual(list(Questions.objects.trending()), [self.question, other])
+
+    def test_group_feed(self):
+        self.answer(is_anonymous=True)
+        Questions.objects.create(user=self.user, title="Ungrouped")
+        feed = list(GroupActivity.objects.feed(self.group))
+        self.assertEqual([(entry.verb, entry.question) for entry in feed],
+                         [(GroupActivity.ANSWERED, self.question), (GroupActivity.ASKED, self.question)])
+        self.assertIsNone(feed[0].user)
+        self.assertEqual(feed[1].user, self.user)
+
+
+class SlugTest(TestCase):
+    def test_slugs_are_unique_and_stable(self):
+        first = Questions.objects.create(title="What is Django?")
+        second = Questions.objects.create(title="What is Django")
+        third = Questions.objects.create(title="What is Django?!")
+        self.assertEqual([first.slug, second.slug, third.slug],
+                         ["what-is-django", "what-is-django-2", "what-is-django-3"])
+        first.title = "What is Flask?"
+        first.save()
+        self.assertEqual(Questions.objects.get(pk=first.pk).slug, "what-is-django")
+        self.assertEqual(Questions.objects.create(title="???").slug, "question")
+
+    def test_slug_suffix_follows_the_highest_number(self):
+        Questions.objects.create(title="Why")
+        Questions.objects.create(title="Why", slug="why-9")
+        Questions.objects.create(title="Why", slug="why-not")
+        with self.assertNumQueries(2):
+            self.assertEqual(Questions.objects.unique_slug("Why?"), "why-10")
+
+    def test_route_names_are_not_used_as_slugs(self):
+        for title in ("Search", "Similar", "Ask"):
+            question = Questions.objects.create(title=title)
+            self.assertEqual(question.slug, title.lower() + "-2")
+            self.assertEqual(self.client.get(question.get_absolute_url()).status_code, 200)
+
+    def test_lookup_by_slug(self):
+        question = Questions.objects.create(title="Why?")
+        other = Questions.objects.create(title="How?")
+        with self.assertNumQueries(1):
+            self.assertEqual(Questions.objects.get_by_slug("why"), question)
+        self.assertEqual(Questions.objects.in_bulk_by_slug(["why", "how", "what"]),
+                         {"why": question, "how": other})
+
+
+class SearchTest(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="asker", password="secret")
+        python = Questions.objects.create(user=self.user, title="What is Python?")
+        Answers.objects.create(user=self.user, question=python, answer_text="A language. Django is written in Python.")
+        Questions.objects.create(user=self.user, title="Is Django a framework?")
+        Questions.objects.create(user=self.user, title="How to boil <an> egg?")
+
+    def check_search(self):
+        results = search.search("django")
+        self.assertEqual([r.question.title for r in results], ["Is Django a framework?", "What is Python?"])
+        self.assertIn("<b>Django</b>", results[0].snippet)
+        self.assertEqual([r.question.title for r in search.search("python django")], ["What is Python?"])
+        self.assertEqual(search.search("nothing matches this"), [])
+        self.assertIn("&lt;an&gt;", search.search("egg")[0].snippet)
+
+        egg = Questions.objects.get(title="How to boil <an> egg?")
+        answer = Answers.objects.create(user=self.user, question=egg, answer_text="Ask Django")
+        self.assertEqual(len(search.search("django")), 3)
+        answer.delete()
+        self.assertEqual(len(search.search("django")), 2)
+        Questions.objects.get(title="What is Python?").delete()
+        self.assertEqual(len(search.search("django")), 1)
+
+    def test_fts_search(self):
+        self.assertTrue(search.fts_available())
+        self.check_search()
+
+    def test_posting_list_search(self):
+        with mock.patch.object(search, 'fts_available', return_value=False):
+            call_command('reindex_questions', stdout=StringIO())
+            self.assertEqual(SearchPosting.objects.filter(term='django').count(), 2)
+            self.check_search()
+
+    def check_answer_indexing(self):
+        question = Questions.objects.get(title="Is Django a framework?")
+        for i in range(5):
+            Answers.objects.create(user=self.user, question=question, answer_text="Flask %d" % i)
+        with CaptureQueriesContext(connection) as queries:
+            answer = Answers.objects.create(user=self.user, question=question, answer_text="Pyramid")
+        # the other answers of the question are neither read nor reindexed
+        self.assertFalse([query for query in queries if 'Flask' in str(query)])
+        self.assertFalse([query for query in queries
+                          if query['sql'].startswith('SELECT') and 'answer_text' in query['sql']])
+        self.assertEqual([r.question for r in search.search("pyramid")], [question])
+        self.assertIn("<b>Pyramid</b>", search.search("pyramid")[0].snippet)
+        answer.answer_text = "Bottle"
+        answer.save()
+        self.assertEqual(search.search("pyramid"), [])
+        self.assertEqual(len(search.search("flask")), 1)
+
+    def test_fts_answers_are_indexed_one_by_one(self):
+        self.check_answer_indexing()
+
+    def test_posting_list_answers_are_indexed_one_by_one(self):
+        with mock.patch.object(search, 'fts_available', return_value=False):
+            call_command('reindex_questions', stdout=StringIO())
+            self.check_answer_indexing()
+
+    def test_snippets_read_one_answer_per_result(self):
+        question = Questions.objects.get(title="How to boil <an> egg?")
+        for i in range(5):
+            Answers.objects.create(user=self.user, question=question, answer_text="Boil the water %d times" % i)
+        salt = Answers.objects.create(user=self.user, question=question, answer_text="Add some salt to the water")
+        with CaptureQueriesContext(connection) as queries:
+            results = search.search("water salt")
+        self.assertEqual([r.question for r in results], [question])
+        self.assertIn("<b>salt</b>", results[0].snippet)
+        reads = [query['sql'] for query in queries
+                 if query['sql'].startswith('SELECT') and 'answer_text' in query['sql']]
+        self.assertEqual(len(reads), 1)
+        self.assertIn('"questans_answers"."id" IN (%d)' % salt.pk, reads[0])
+
+    def test_search_view(self):
+        response = self.client.get(reverse('question-search'), {'q': "framework"})
+        self.assertContains(response, "<b>framework</b>")
+        self.assertEqual(len(response.context['results']), 1)
+
+
+class DuplicateTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="asker", password="secret")
+        self.original = Questions.objects.create(user=self.user, title="How do I install Django on Windows?")
+        Questions.objects.create(user=self.user, title="What is the capital of France?")
+
+    def test_find_duplicates(self):
+        similar = duplicates.find_duplicates("how to install django on windows")
+        self.assertEqual(similar, [self.original])
+        self.assertGreater(similar[0].similarity, duplicates.SIMILARITY_THRESHOLD)
+        self.assertEqual(duplicates.find_duplicates("Best pizza toppings"), [])
+        self.assertEqual(duplicates.find_duplicates("How do I install Django on Windows?", exclude=self.original), [])
+
+    def test_asking_suggests_duplicates_first(self):
+        self.client.force_login(self.user)
+        url = reverse('question-add')
+        data = {'title': "How to install Django on Windows"}
+        response = self.client.post(url, data)
+        self.assertEqual(response.context['similar'], [self.original])
+        self.assertEqual(Questions.objects.count(), 2)
+        response = self.client.post(url, dict(data, confirm='1'))
+        question = Questions.objects.get(title=data['title'])
+        self.assertRedirects(response, question.get_absolute_url())
+        self.assertEqual(question.user, self.user)
+
+    def test_similar_questions_json(self):
+        response = self.client.get(reverse('question-similar'), {'title': "how do you install django on windows"})
+        self.assertEqual(response.json()['questions'][0]['url'], self.original.get_absolute_url())
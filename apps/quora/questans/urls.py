@@ -0,0 +1,9 @@
+from django.urls import path
+from .views import AddQuestionView, QuestionDetailView, SimilarQuestionsView, SearchView
+
+urlpatterns = [
+    path('ask/', AddQuestionView.as_view(), name='question-add'),
+    path('similar/', SimilarQuestionsView.as_view(), name='question-similar'),
+    path('search/', SearchView.as_view(), name='question-search'),
+    path('<slug:slug>/', QuestionDetailView.as_view(), name='question-detail'),
+]
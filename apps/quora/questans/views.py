@@ -1,10 +1,78 @@
-from django.shortcuts import render
+from django.shortcuts import render, redirect, get_object_or_404
+from django.http import JsonResponse
+from django.views.generic.edit import FormView
+from django.views.generic import View
+from django.utils.decorators import method_decorator
+from django.contrib.auth.decorators import login_required
+from . import duplicates, search
+from .models import Questions, Answers
+from .forms import QuestionForm
+
+SEARCH_RESULTS_PER_PAGE = 20
 
 # Create your views here.
 
 class AddQuestionView(FormView):
 
+    @method_decorator(login_required)
+    def dispatch(self, request, *args, **kwargs):
+        return super(AddQuestionView, self).dispatch(request, *args, **kwargs)
+
     def get(self, request):
         content = {}
-        template = "questions.html"
-        return render(request, template, content)
+        content['form'] = QuestionForm()
+        return render(request, 'question.html', content)
+
+    def post(self, request):
+        content = {}
+        form = QuestionForm(request.POST)
+        if form.is_valid():
+            # suggest existing questions first, unless the user has seen them
+            similar = [] if request.POST.get('confirm') else duplicates.find_duplicates(form.cleaned_data['title'])
+            if not similar:
+                question = form.save(commit=False)
+                question.user = request.user
+                question.save()
+                return redirect(question)
+            content['similar'] = similar
+        content['form'] = form
+        return render(request, 'question.html', content)
+
+
+class QuestionDetailView(View):
+
+    def get(self, request, slug):
+        content = {}
+        content['question'] = get_object_or_404(Questions, slug=slug)
+        content['answers'] = Answers.objects.filter(question=content['question']).select_related('user').order_by('id')
+        return render(request, 'question_detail.html', content)
+
+
+class SimilarQuestionsView(View):
+    """Suggestions for a title being typed, as JSON"""
+
+    def get(self, request):
+        similar = duplicates.find_duplicates(request.GET.get('title', ''))
+        return JsonResponse({'questions': [
+            {'title': question.title, 'url': question.get_absolute_url(), 'similarity': round(question.similarity, 3)}
+            for question in similar
+        ]})
+
+
+class SearchView(View):
+
+    def get(self, request):
+        query = request.GET.get('q', '')
+        try:
+            page = max(int(request.GET.get('page', 1)), 1)
+        except ValueError:
+            page = 1
+        # fetch one extra result to know whether there is a next page
+        results = search.search(query, limit=SEARCH_RESULTS_PER_PAGE + 1,
+                                offset=(page - 1) * SEARCH_RESULTS_PER_PAGE)
+        return render(request, 'search.html', {
+            'query': query,
+            'results': results[:SEARCH_RESULTS_PER_PAGE],
+            'page': page,
+            'has_next': len(results) > SEARCH_RESULTS_PER_PAGE,
+        })
@@ -0,0 +1,125 @@
+import datetime
+import json
+import random
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import urlencode
+
+from core.models import User
+from djen_common import loadtest
+from questans import duplicates, search
+from questans.models import Answers, Questions
+
+# Seeded content is dated back from here, so reruns see the same data
+EPOCH = datetime.datetime(2018, 1, 1, 12, 0)
+BATCH_SIZE = 500
+WORDS = ('python django database index query cache session template view model form test '
+         'server thread sqlite slug search answer question page user login deploy migrate').split()
+
+class Command(BaseCommand):
+    help = """
+            seeds a throwaway test database and measures the
+            dashboard, question pages, search and duplicate
+            suggestions under concurrent load
+
+            Users, questions and answers are bulk inserted
+            and indexed, then logged-in client threads hit
+            the views. Latency percentiles, query counts and
+            requests/sec are printed as JSON; --baseline
+            compares them with an earlier run. The same
+            --seed and sizes give the same run.
+           """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--questions', type=int, default=2000)
+        parser.add_argument('--answers-per-question', type=int, default=5)
+        parser.add_argument('--threads', type=int, default=4,
+                            help='Concurrent client threads (default: 4)')
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Requests per client thread (default: 200)')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Also write the JSON report to this file')
+        parser.add_argument('--baseline', help='JSON report of an earlier run to compare with')
+
+    def title(self, rng):
+        return ' '.join(rng.sample(WORDS, 6)).capitalize() + '?'
+
+    def seed(self, rng, options):
+        User.objects.bulk_create(
+            (User(username='user%d' % i, email='user%d@example.com' % i, password='!')
+             for i in range(max(options['users'], 1))), BATCH_SIZE)
+        user_ids = list(User.objects.order_by('pk').values_list('pk', flat=True))
+
+        answers = options['answers_per_question']
+        questions = []
+        for i in range(options['questions']):
+            active = timezone.make_aware(EPOCH - datetime.timedelta(minutes=rng.randrange(365 * 24 * 60)))
+            questions.append(Questions(user_id=rng.choice(user_ids), title=self.title(rng), slug='question-%d' % i,
+                                       answer_count=answers, last_activity=active))
+        Questions.objects.bulk_create(questions, BATCH_SIZE)
+        Answers.objects.bulk_create(
+            (Answers(question_id=pk, user_id=rng.choice(user_ids),
+                     answer_text='Answer %d: %s' % (i, ' '.join(rng.sample(WORDS, 12))))
+             for pk in Questions.objects.order_by('pk').values_list('pk', flat=True)
+             for i in range(answers)), BATCH_SIZE)
+
+        last_pk = 0
+        while True:
+            batch = list(Questions.objects.filter(pk__gt=last_pk).order_by('pk').only('id', 'title')[:BATCH_SIZE])
+            if not batch:
+                break
+            with transaction.atomic():
+                search.index_questions(batch)
+                search.index_answers(Answers.objects.filter(question__in=batch).only('question', 'answer_text'))
+                duplicates.index_questions(batch)
+            last_pk = batch[-1].pk
+
+    def targets(self):
+        slugs = list(Questions.objects.values_list('slug', flat=True))
+        targets = [
+            loadtest.Target('dashboard', lambda rng: reverse('dashboard-view')),
+            loadtest.Target('search', lambda rng: reverse('question-search') + '?' + urlencode(
+                {'q': ' '.join(rng.sample(WORDS, 2))})),
+            loadtest.Target('similar', lambda rng: reverse('question-similar') + '?' + urlencode(
+                {'title': self.title(rng)})),
+        ]
+        if slugs:
+            targets.append(loadtest.Target('question_detail', lambda rng: reverse(
+                'question-detail', args=[rng.choice(slugs)])))
+        return targets
+
+    def handle(self, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            rng = random.Random(options['seed'])
+            self.seed(rng, options)
+            users = list(User.objects.order_by('pk'))
+            # the profiling middleware would be measured along with the views
+            with override_settings(PROFILING_SAMPLE_RATE=0.0):
+                report = loadtest.run(self.targets(), options['threads'], options['requests'], options['seed'],
+                                      login=lambda index: users[index % len(users)])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        report['config'] = dict(
+            (name, options[name]) for name in ('users', 'questions', 'answers_per_question', 'threads',
+                                               'requests', 'seed'))
+        report['config']['cache'] = settings.CACHES['default']['BACKEND'].rsplit('.', 1)[-1]
+        output = json.dumps(report, indent=2, sort_keys=True)
+        self.stdout.write(output)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            for line in loadtest.compare(report, baseline):
+                self.stderr.write(line)
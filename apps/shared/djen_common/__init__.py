@@ -0,0 +1,7 @@
+"""
+Infrastructure shared by the djen_project and quora sites.
+
+Both settings modules put ``apps/shared`` on ``sys.path`` and list
+``djen_common`` in ``INSTALLED_APPS``, so its management commands are
+available to either ``manage.py``.
+"""
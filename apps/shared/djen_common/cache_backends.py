@@ -0,0 +1,50 @@
+"""
+Cache backends for development and benchmarking.
+"""
+
+import functools
+import threading
+import time
+
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def _round_trip(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        local = self._local
+        depth = getattr(local, 'depth', 0)
+        if depth == 0:
+            time.sleep(self.latency)
+        local.depth = depth + 1
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            local.depth = depth
+    return wrapper
+
+
+class SimulatedNetworkCache(LocMemCache):
+    """
+    Stand-in for a networked cache such as memcached or redis: a
+    ``LocMemCache`` that waits ``OPTIONS['LATENCY']`` seconds (default
+    0.5ms) per call, with ``get_many`` and friends costing one round trip
+    like they would on a real server. Lets benchmarks show what a cache
+    costs once it is no longer in-process.
+    """
+
+    def __init__(self, name, params):
+        super(SimulatedNetworkCache, self).__init__(name, params)
+        self.latency = float(params.get('OPTIONS', {}).get('LATENCY', 0.0005))
+        self._local = threading.local()
+
+    add = _round_trip(LocMemCache.add)
+    get = _round_trip(LocMemCache.get)
+    set = _round_trip(LocMemCache.set)
+    incr = _round_trip(LocMemCache.incr)
+    has_key = _round_trip(LocMemCache.has_key)
+    delete = _round_trip(LocMemCache.delete)
+    clear = _round_trip(LocMemCache.clear)
+    get_many = _round_trip(LocMemCache.get_many)
+    set_many = _round_trip(LocMemCache.set_many)
+    delete_many = _round_trip(LocMemCache.delete_many)
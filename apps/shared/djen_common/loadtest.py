@@ -0,0 +1,126 @@
+"""
+A small load generator for ``manage.py loadtest``.
+
+Each client thread owns a ``django.test.Client`` and a ``random.Random``
+seeded from the run's seed and the thread number, so a run with the same
+seed, dataset and settings requests the same URLs in the same order. Every
+request is timed and its queries counted through
+``connection.execute_wrapper``; the report is a JSON-friendly dict with
+per-view latency percentiles, query counts and request rates.
+"""
+
+import random
+import threading
+import time
+
+from django.db import connection, connections
+from django.test import Client
+
+from .profiling import percentile
+
+
+class Target(object):
+    """A view to hit: ``url(rng)`` picks the URL for one request"""
+
+    def __init__(self, name, url):
+        self.name = name
+        self.url = url
+
+
+def _summary(values, digits=2):
+    return {
+        'mean': round(sum(values) / len(values), digits) if values else None,
+        'p50': percentile(values, 0.5),
+        'p95': percentile(values, 0.95),
+        'p99': percentile(values, 0.99),
+        'max': max(values) if values else None,
+    }
+
+
+def _client_thread(index, targets, requests, seed, login, results, errors):
+    rng = random.Random('%s:%s' % (seed, index))
+    samples = dict((target.name, []) for target in targets)
+    queries = [0]
+
+    def count_queries(execute, sql, params, many, context):
+        queries[0] += 1
+        return execute(sql, params, many, context)
+
+    client = Client()
+    try:
+        if login is not None:
+            client.force_login(login(index))
+        with connection.execute_wrapper(count_queries):
+            for i in range(requests):
+                target = targets[(index + i) % len(targets)]
+                url = target.url(rng)
+                queries[0] = 0
+                started = time.perf_counter()
+                response = client.get(url)
+                elapsed = (time.perf_counter() - started) * 1000
+                samples[target.name].append((elapsed, queries[0], response.status_code))
+        results[index] = samples
+    except Exception as error:
+        # re-raised from run(), in the main thread
+        errors[index] = error
+    finally:
+        connections.close_all()
+
+
+def run(targets, threads=4, requests=100, seed=0, login=None):
+    """
+    Sends ``requests`` GETs from each of ``threads`` clients, cycling
+    through ``targets``. ``login(thread number)`` returns the user a client
+    logs in as, if given. Requests answering other than 200 count as errors;
+    an exception in a client thread is raised as a ``RuntimeError``.
+    """
+    results = [None] * threads
+    errors = [None] * threads
+    workers = [threading.Thread(target=_client_thread,
+                                args=(index, targets, requests, seed, login, results, errors))
+               for index in range(threads)]
+    started = time.monotonic()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.monotonic() - started
+    for index, error in enumerate(errors):
+        if error is not None:
+            raise RuntimeError("client thread %d failed: %r" % (index, error)) from error
+
+    views = {}
+    for target in targets:
+        samples = [sample for result in results for sample in result[target.name]]
+        views[target.name] = {
+            'requests': len(samples),
+            'errors': sum(1 for _, _, status in samples if status != 200),
+            'requests_per_sec': round(len(samples) / elapsed, 1),
+            'latency_ms': _summary([round(ms, 2) for ms, _, _ in samples]),
+            'queries': _summary([n for _, n, _ in samples]),
+        }
+    total = sum(view['requests'] for view in views.values())
+    return {
+        'total': {
+            'requests': total,
+            'errors': sum(view['errors'] for view in views.values()),
+            'seconds': round(elapsed, 3),
+            'requests_per_sec': round(total / elapsed, 1),
+        },
+        'views': views,
+    }
+
+
+def compare(report, baseline):
+    """Lines describing how ``report`` moved against an earlier ``baseline``"""
+    lines = []
+    for name, view in sorted(report['views'].items()):
+        before = baseline.get('views', {}).get(name)
+        if not before:
+            lines.append("%-24s new" % name)
+            continue
+        p95, old_p95 = view['latency_ms']['p95'], before['latency_ms']['p95']
+        change = (p95 - old_p95) / old_p95 * 100 if old_p95 else 0.0
+        lines.append("%-24s p95 %8.2fms -> %8.2fms (%+6.1f%%)  queries p95 %s -> %s" % (
+            name, old_p95, p95, change, before['queries']['p95'], view['queries']['p95']))
+    return lines
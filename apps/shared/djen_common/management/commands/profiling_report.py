@@ -0,0 +1,56 @@
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+
+from djen_common import profiling
+
+PERCENTILES = (0.5, 0.95, 0.99)
+
+class Command(BaseCommand):
+    help = """
+            prints per-URL request timings collected by the
+            profiling middleware: p50/p95/p99 of total time,
+            SQL time, query count and template time
+
+            Reads the PROFILING_CACHE cache, which has to be
+            shared with the server processes; a local-memory
+            cache is refused.
+           """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true',
+                            help='Print JSON instead of a table')
+        parser.add_argument('--reset', action='store_true',
+                            help='Clear the collected timings afterwards')
+
+    def summarize(self, samples):
+        columns = zip(*samples)
+        return dict((metric, [profiling.percentile(values, p) for p in PERCENTILES])
+                    for metric, values in zip(('total_ms', 'sql_ms', 'queries', 'template_ms'), columns))
+
+    def handle(self, **options):
+        if isinstance(caches[settings.PROFILING_CACHE], LocMemCache):
+            raise CommandError(
+                "PROFILING_CACHE %r is a local-memory cache, so the timings recorded by the server "
+                "processes are not visible here. Point it at a file-based or networked cache."
+                % settings.PROFILING_CACHE)
+        report = dict((name, dict(self.summarize(samples), requests=count))
+                      for name, (count, samples) in profiling.aggregates().items())
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2, sort_keys=True))
+        else:
+            self.stdout.write("%-32s %8s %22s %22s %16s %22s" % (
+                'url name', 'requests', 'total ms p50/95/99', 'sql ms p50/95/99', 'queries p50/95/99',
+                'template ms p50/95/99'))
+            for name, row in sorted(report.items(), key=lambda item: -item[1]['total_ms'][1]):
+                self.stdout.write("%-32s %8d %22s %22s %16s %22s" % (
+                    name[:32], row['requests'],
+                    '/'.join('%.0f' % v for v in row['total_ms']),
+                    '/'.join('%.0f' % v for v in row['sql_ms']),
+                    '/'.join('%d' % v for v in row['queries']),
+                    '/'.join('%.0f' % v for v in row['template_ms'])))
+        if options['reset']:
+            profiling.reset()
@@ -0,0 +1,187 @@
+"""
+Per-request database and template profiling.
+
+``QueryProfilingMiddleware`` profiles a random ``PROFILING_SAMPLE_RATE``
+share of requests; the rest pass straight through. For a profiled request
+it counts the queries on every database connection and their total time,
+notices statements run more than once (the usual sign of an N+1), and
+times template rendering through ``ProfilingTemplates``. The numbers go out
+as a ``Server-Timing`` header, requests over the ``PROFILING_*`` thresholds
+are logged, and timings are kept per URL name in the ``PROFILING_CACHE``
+cache for ``manage.py profiling_report``.
+
+Samples are buffered in each process and merged into the cache every
+``FLUSH_EVERY`` requests, so concurrent processes can occasionally
+overwrite each other's latest batch. The cache has to be shared between
+processes (not locmem) for the report to see anything, and the command
+refuses to read a local-memory one.
+"""
+
+import logging
+import math
+import random
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.template.backends.django import DjangoTemplates
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = 'profiling:'
+NAMES_KEY = CACHE_PREFIX + 'names'
+FLUSH_EVERY = 20
+
+_local = threading.local()
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+class RequestProfile(object):
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - started
+            self.queries += 1
+            self.statements[sql] += 1
+
+    def repeated(self):
+        """``[(sql, times)]`` for statements run more than once, most frequent first"""
+        return [(sql, n) for sql, n in self.statements.most_common() if n > 1]
+
+    def duplicates(self):
+        return sum(n - 1 for _, n in self.repeated())
+
+
+def current_profile():
+    return getattr(_local, 'profile', None)
+
+
+class ProfiledTemplate(object):
+    """Wraps a backend template to add its render time to the current profile"""
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        profile = current_profile()
+        if profile is None:
+            return self.template.render(context, request)
+        started = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            profile.template_time += time.perf_counter() - started
+
+
+class ProfilingTemplates(DjangoTemplates):
+    """The Django template backend, timed for ``QueryProfilingMiddleware``"""
+
+    def from_string(self, template_code):
+        return ProfiledTemplate(super(ProfilingTemplates, self).from_string(template_code))
+
+    def get_template(self, template_name):
+        return ProfiledTemplate(super(ProfilingTemplates, self).get_template(template_name))
+
+
+def record(name, sample):
+    """Buffers one ``(total ms, sql ms, queries, template ms)`` sample for ``name``"""
+    with _pending_lock:
+        _pending.setdefault(name, []).append(sample)
+        if sum(len(samples) for samples in _pending.values()) < FLUSH_EVERY:
+            return
+        pending = dict(_pending)
+        _pending.clear()
+    flush(pending)
+
+
+def flush(pending):
+    cache = caches[settings.PROFILING_CACHE]
+    names = cache.get(NAMES_KEY) or []
+    if not set(pending) <= set(names):
+        cache.set(NAMES_KEY, sorted(set(names) | set(pending)), None)
+    stored = cache.get_many([CACHE_PREFIX + name for name in pending])
+    for name, samples in pending.items():
+        count, kept = stored.get(CACHE_PREFIX + name, (0, []))
+        # keep the latest PROFILING_SAMPLES samples for the percentiles
+        stored[CACHE_PREFIX + name] = (count + len(samples), (kept + samples)[-settings.PROFILING_SAMPLES:])
+    cache.set_many(stored, None)
+
+
+def aggregates():
+    """``{url name: (requests seen, [samples])}`` from the cache"""
+    cache = caches[settings.PROFILING_CACHE]
+    names = cache.get(NAMES_KEY) or []
+    stored = cache.get_many([CACHE_PREFIX + name for name in names])
+    return dict((name, stored[CACHE_PREFIX + name]) for name in names if CACHE_PREFIX + name in stored)
+
+
+def reset():
+    cache = caches[settings.PROFILING_CACHE]
+    names = cache.get(NAMES_KEY) or []
+    cache.delete_many([NAMES_KEY] + [CACHE_PREFIX + name for name in names])
+    with _pending_lock:
+        _pending.clear()
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of ``values``, e.g. ``fraction=0.95``"""
+    values = sorted(values)
+    if not values:
+        return None
+    return values[max(1, math.ceil(fraction * len(values))) - 1]
+
+
+class QueryProfilingMiddleware(object):
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return self.get_response(request)
+        profile = _local.profile = RequestProfile()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile))
+                response = self.get_response(request)
+        finally:
+            _local.profile = None
+        total = (time.perf_counter() - started) * 1000
+        self.report(request, response, profile, total)
+        return response
+
+    def report(self, request, response, profile, total):
+        sql, template = profile.sql_time * 1000, profile.template_time * 1000
+        response['Server-Timing'] = ', '.join([
+            'db;dur=%.1f;desc="%d queries"' % (sql, profile.queries),
+            'dup;desc="%d repeated"' % profile.duplicates(),
+            'tpl;dur=%.1f' % template,
+            'total;dur=%.1f' % total,
+        ])
+        match = request.resolver_match
+        name = (match.url_name or match.view_name) if match else 'unresolved'
+        if (total > settings.PROFILING_SLOW_REQUEST_MS or profile.queries > settings.PROFILING_MAX_QUERIES
+                or profile.duplicates() > settings.PROFILING_MAX_DUPLICATES):
+            repeated = profile.repeated()[:3]
+            logger.warning(
+                "%s %s (%s): %.0fms, %d queries in %.0fms, %d repeated, templates %.0fms%s",
+                request.method, request.path, name, total, profile.queries, sql, profile.duplicates(), template,
+                ''.join('\n  %dx %s' % (n, statement) for statement, n in repeated))
+        record(name, (round(total, 2), round(sql, 2), profile.queries, round(template, 2)))
@@ -0,0 +1,176 @@
+"""
+Full-text search pieces shared by the wiki and question indexes.
+
+Each index is an SQLite FTS5 table when the database has one and a table of
+posting rows (``term``, document, ``frequency``) otherwise. Documents are a
+title and a body; what goes into them is up to the app. This module
+tokenizes and weights them, probes for, creates and fills the FTS5 table,
+runs a query against either index and cuts the highlighted snippets shown
+with the results.
+"""
+
+import re
+from collections import Counter
+
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.db.models import Count, Sum
+from django.dispatch import receiver
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+TITLE_WEIGHT = 5
+SNIPPET_CHARS = 80
+
+# Control characters wrapped around matches so snippets can be escaped
+# before the highlighting markup goes in.
+MATCH_START = '\x02'
+MATCH_END = '\x03'
+
+
+def tokenize(text):
+    return [token.lower() for token in TOKEN_RE.findall(text) if len(token) > 1]
+
+
+def query_terms(query):
+    return sorted(set(tokenize(query)))
+
+
+def postings_for(title, text):
+    counts = Counter(tokenize(text))
+    for token in tokenize(title):
+        counts[token] += TITLE_WEIGHT
+    return counts
+
+
+def fts_available(table):
+    # Tables only come and go with migrations, so each one is looked up
+    # once per database connection.
+    tables = getattr(connection, 'fts_tables', None)
+    if tables is None:
+        tables = connection.fts_tables = {}
+    if table not in tables:
+        tables[table] = False
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [table])
+                tables[table] = cursor.fetchone() is not None
+    return tables[table]
+
+
+@receiver(connection_created)
+def forget_fts_tables(sender, connection, **kwargs):
+    connection.fts_tables = {}
+
+
+def create_fts_table(schema_editor, table, columns, contentless=False):
+    """
+    Creates an FTS5 table if the SQLite build supports it. A contentless
+    one stores only the index; see ``delete_contentless_rows``.
+    """
+    if schema_editor.connection.vendor != 'sqlite':
+        return False
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if not cursor.fetchone()[0]:
+            return False
+    schema_editor.execute("CREATE VIRTUAL TABLE %s USING fts5(%s%s)" % (
+        table, ', '.join(columns), ", content=''" if contentless else ''))
+    schema_editor.connection.fts_tables = {}
+    return True
+
+
+def drop_fts_table(schema_editor, table):
+    schema_editor.execute("DROP TABLE IF EXISTS %s" % table)
+    schema_editor.connection.fts_tables = {}
+
+
+def insert_fts_rows(table, columns, documents):
+    """Adds ``(pk, *column values)`` documents to an FTS5 table"""
+    with connection.cursor() as cursor:
+        cursor.executemany("INSERT INTO %s (rowid, %s) VALUES (%s)" % (
+            table, ', '.join(columns), ', '.join(['%s'] * (len(columns) + 1))), list(documents))
+
+
+def delete_fts_rows(table, pks):
+    with connection.cursor() as cursor:
+        cursor.executemany("DELETE FROM %s WHERE rowid = %%s" % table, [(pk,) for pk in pks])
+
+
+def delete_contentless_rows(table, columns, documents):
+    """
+    Removes ``(pk, *column values)`` documents from a contentless table,
+    which needs the exact values that were indexed. Documents that never
+    made it into the index, e.g. bulk inserted rows, are skipped: deleting
+    them would corrupt it.
+    """
+    documents = list(documents)
+    if not documents:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT rowid FROM %s WHERE rowid IN (%s)" % (table, ', '.join(['%s'] * len(documents))),
+                       [document[0] for document in documents])
+        indexed = set(pk for pk, in cursor.fetchall())
+        cursor.executemany("INSERT INTO {table} ({table}, rowid, {columns}) VALUES ('delete', {params})".format(
+            table=table, columns=', '.join(columns), params=', '.join(['%s'] * (len(columns) + 1))),
+            [document for document in documents if document[0] in indexed])
+
+
+def clear_fts_table(table, contentless=False):
+    with connection.cursor() as cursor:
+        if contentless:
+            cursor.execute("INSERT INTO {table} ({table}) VALUES ('delete-all')".format(table=table))
+        else:
+            cursor.execute("DELETE FROM %s" % table)
+
+
+def create_postings(model, field, documents):
+    """Fallback index rows for ``(pk, title, text)`` documents"""
+    model.objects.bulk_create(
+        model(term=term[:model.TERM_LENGTH], frequency=frequency, **{field + '_id': pk})
+        for pk, title, text in documents
+        for term, frequency in postings_for(title, text).items()
+    )
+
+
+def search_fts(table, terms, limit, offset):
+    """``[(pk, score)]`` of the rows of ``table`` matching every term, best first"""
+    query = ' '.join('"%s"' % term.replace('"', '""') for term in terms)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT rowid, bm25({table}, %s, 1.0) FROM {table} WHERE {table} MATCH %s "
+            "ORDER BY 2 LIMIT %s OFFSET %s".format(table=table),
+            [float(TITLE_WEIGHT), query, limit, offset])
+        # bm25() is lower for better matches
+        return [(pk, -rank) for pk, rank in cursor.fetchall()]
+
+
+def search_postings(model, field, terms, limit, offset):
+    """Like ``search_fts``, over the posting rows of ``model``"""
+    # a document may have several rows per term, e.g. a question's title and answers
+    matches = (model.objects.filter(term__in=terms)
+               .values(field)
+               .annotate(matched=Count('term', distinct=True), score=Sum('frequency'))
+               .filter(matched=len(terms))
+               .order_by('-score', field))[offset:offset + limit]
+    return [(match[field], match['score']) for match in matches]
+
+
+def _make_snippet(text, terms):
+    lowered = text.lower()
+    positions = [match.start() for match in
+                 (re.search(r'\b%s\b' % re.escape(term), lowered) for term in terms) if match]
+    start = max(min(positions) - SNIPPET_CHARS // 2, 0) if positions else 0
+    snippet = text[start:start + SNIPPET_CHARS]
+    pattern = re.compile(r'\b(%s)\b' % '|'.join(re.escape(term) for term in terms), re.IGNORECASE)
+    snippet = pattern.sub(lambda match: MATCH_START + match.group(0) + MATCH_END, snippet)
+    prefix = '...' if start > 0 else ''
+    suffix = '...' if start + SNIPPET_CHARS < len(text) else ''
+    return prefix + snippet + suffix
+
+
+def snippet(text, terms):
+    """About ``SNIPPET_CHARS`` of ``text`` around the first term, escaped, with the terms in bold"""
+    snippet = escape(_make_snippet(text, terms))
+    return mark_safe(snippet.replace(MATCH_START, '<b>').replace(MATCH_END, '</b>'))
@@ -0,0 +1,28 @@
+"""
+SQLite backend that applies ``PRAGMA`` settings to every new connection.
+
+Use it as the ``ENGINE`` and list the pragmas under ``PRAGMAS`` in the
+database settings, e.g. ``{'journal_mode': 'WAL', 'synchronous': 'NORMAL'}``.
+In WAL mode readers no longer wait for writers, which is what keeps
+the site responsive while long write batches run.
+"""
+
+import re
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+PRAGMA_NAME_RE = re.compile(r'^[a-z_]+$')
+PRAGMA_VALUE_RE = re.compile(r'^-?\w+$')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_new_connection(self, conn_params):
+        conn = super(DatabaseWrapper, self).get_new_connection(conn_params)
+        for name, value in self.settings_dict.get('PRAGMAS', {}).items():
+            value = str(value)
+            if not PRAGMA_NAME_RE.match(name) or not PRAGMA_VALUE_RE.match(value):
+                raise ImproperlyConfigured("Invalid SQLite pragma %s = %r" % (name, value))
+            conn.execute('PRAGMA %s = %s' % (name, value))
+        return conn
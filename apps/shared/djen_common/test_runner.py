@@ -0,0 +1,29 @@
+"""
+The test runner of the projects using ``djen_common``.
+
+Tests run with request profiling off and the ``PROFILING_CACHE`` cache in
+local memory, whatever the settings say: otherwise a test run under DEBUG
+would profile every request into the file cache that
+``manage.py profiling_report`` reads for the development server. Tests of
+the profiler turn it back on with ``override_settings``.
+"""
+
+from django.conf import settings
+from django.test import override_settings
+from django.test.runner import DiscoverRunner as BaseRunner
+
+
+class DiscoverRunner(BaseRunner):
+    def setup_test_environment(self, **kwargs):
+        super(DiscoverRunner, self).setup_test_environment(**kwargs)
+        self._profiling_settings = override_settings(PROFILING_SAMPLE_RATE=0, CACHES=dict(settings.CACHES, **{
+            settings.PROFILING_CACHE: {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'profiling-tests',
+            },
+        }))
+        self._profiling_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._profiling_settings.disable()
+        super(DiscoverRunner, self).teardown_test_environment(**kwargs)